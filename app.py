@@ -1,13 +1,253 @@
-from flask import Flask, render_template, Blueprint, request, jsonify, send_file
+from flask import Flask, render_template, Blueprint, request, jsonify, send_file, g, Response, url_for
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.local import LocalProxy
+import contextlib
+import hashlib
+import hmac
+import importlib
 import os
-import tempfile
+import threading
+import time
+from core.compression import CompressionMiddleware
+from core.metrics import metrics, server_timing
+
+# Metric/tool label per blueprint
+BLUEPRINT_TOOLS = {'pelmoex': 'pelmo', 'toxswaex': 'toxswa', 'pearlex': 'pearl'}
+
+def _tool():
+    return BLUEPRINT_TOOLS.get(request.blueprint, 'app')
+
+try:
+    import orjson
+except ImportError:  # optional; the stdlib encoder is used instead
+    orjson = None
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """JSON provider backed by orjson when installed; records response serialization as the 'json' stage"""
+    # Result rows are sent in column order; sorting every key of every row costs time
+    sort_keys = False
+
+    def _orjson_dumps(self, obj, indent=None):
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=self.default, option=option)
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None or not kwargs.keys() <= {'indent', 'separators'}:
+            return super().dumps(obj, **kwargs)
+        return self._orjson_dumps(obj, kwargs.get('indent')).decode('utf-8')
+
+    def response(self, *args, **kwargs):
+        with metrics.stage('json', _tool()):
+            if orjson is None:
+                return super().response(*args, **kwargs)
+            obj = self._prepare_response_obj(args, kwargs)
+            indent = (self.compact is None and self._app.debug) or self.compact is False
+            # Bytes straight into the response, without a str round trip
+            return self._app.response_class(self._orjson_dumps(obj, indent) + b"\n", mimetype=self.mimetype)
 
 app = Flask(__name__)
+app.json = TimedJSONProvider(app)
+
+# Negotiated gzip/brotli for JSON, text and tabular export responses, so large
+# tables are compressed even without a compressing proxy in front.
+# MODELLING_TOOLS_COMPRESS=0 turns it off (e.g. when a proxy already does it).
+if os.environ.get('MODELLING_TOOLS_COMPRESS', '1') != '0':
+    app.wsgi_app = CompressionMiddleware(
+        app.wsgi_app,
+        min_size=int(os.environ.get('MODELLING_TOOLS_COMPRESS_MIN_BYTES', '1024')),
+        level=int(os.environ.get('MODELLING_TOOLS_COMPRESS_LEVEL', '6')),
+        brotli_quality=int(os.environ.get('MODELLING_TOOLS_BROTLI_QUALITY', '4')))
+
+@app.before_request
+def start_request_timing():
+    g.request_started = time.perf_counter()
+    metrics.begin_request()
+
+@app.after_request
+def add_server_timing(response):
+    timings = metrics.end_request()
+    started = g.pop('request_started', None)
+    total = time.perf_counter() - started if started is not None else None
+    response.headers['Server-Timing'] = server_timing(timings, total)
+    if g.get('profiles'):
+        response.headers['X-Profile'] = ', '.join(g.profiles)
+    return response
+
+# Extractor modules are imported and instantiated on first use, so a cold
+# start only pays for Flask itself. (module, class) per tool:
+EXTRACTOR_CLASSES = {
+    'pelmo': ('pelmoex.extractor', 'PELMOExtractor'),
+    'toxswa': ('toxswaex.extractor', 'TOXSWAExtractor'),
+    'pearl': ('pearlex.extractor', 'PearlGroundwaterExtractor'),
+}
+_lazy_instances = {}
+_lazy_lock = threading.RLock()
+
+def _lazy(name, factory):
+    instance = _lazy_instances.get(name)
+    if instance is None:
+        with _lazy_lock:
+            instance = _lazy_instances.get(name)
+            if instance is None:
+                instance = _lazy_instances[name] = factory()
+    return instance
+
+def get_results_index():
+    """Cross-project results index shared by all extractors; written off the request path"""
+    def create():
+        from core.results_index import ResultsIndex
+        return ResultsIndex(os.environ.get(
+            'MODELLING_TOOLS_INDEX_DB', os.path.join(app.instance_path, 'results_index.sqlite')), background=True)
+    return _lazy('results_index', create)
+
+def _extractor_class(name):
+    module_name, class_name = EXTRACTOR_CLASSES[name]
+    return getattr(importlib.import_module(module_name), class_name)
+
+def get_extractor(name):
+    """Global extractor instance for a tool, created on first request"""
+    def create():
+        if name == 'pearl':
+            return _extractor_class(name)(results_index=get_results_index(), batch_store=new_batch_store())
+        return _extractor_class(name)(results_index=get_results_index())
+    return _lazy(name, create)
+
+def new_batch_store():
+    """PEARL batch store; batches beyond the row budget are spilled to disk"""
+    from core.batch_store import BatchStore
+    return BatchStore(
+        memory_rows=int(os.environ.get('MODELLING_TOOLS_BATCH_MEMORY_ROWS', '100000')),
+        directory=os.environ.get('MODELLING_TOOLS_BATCH_DIR', os.path.join(app.instance_path, 'batches')))
+
+def new_extractor(name):
+    """Request-scoped extractor backed by the shared parse cache, for stateless exports"""
+    return _extractor_class(name)()
 
-# Import the extractors
-from pelmoex.extractor import PELMOExtractor
-from toxswaex.extractor import TOXSWAExtractor
-from pearlex.extractor import PearlGroundwaterExtractor
+def get_profile_store():
+    """Rolling directory of request profiles, created on first profiled request"""
+    def create():
+        from core.profiling import ProfileStore
+        return ProfileStore(
+            os.environ.get('MODELLING_TOOLS_PROFILE_DIR', os.path.join(app.instance_path, 'profiles')),
+            max_files=int(os.environ.get('MODELLING_TOOLS_PROFILE_KEEP', '20')))
+    return _lazy('profile_store', create)
+
+def is_admin():
+    """True if the request carries the admin token from MODELLING_TOOLS_ADMIN_TOKEN"""
+    token = os.environ.get('MODELLING_TOOLS_ADMIN_TOKEN', '')
+    supplied = request.headers.get('X-Admin-Token', '')
+    return bool(token) and hmac.compare_digest(token.encode(), supplied.encode())
+
+@contextlib.contextmanager
+def profiled(tool, stage):
+    """Profile the enclosed extract/export call if an admin asked for it (X-Profile header or ?profile=)"""
+    mode = request.headers.get('X-Profile') or request.args.get('profile')
+    if not mode or not is_admin():
+        yield
+        return
+    if mode in ('1', 'true'):
+        mode = 'cprofile'
+    with get_profile_store().profile(f'{tool}-{stage}', mode) as record:
+        yield
+    g.setdefault('profiles', []).append(record['name'])
+
+XLSX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+def get_export_store():
+    """Bounded, content-addressed directory of generated export files"""
+    def create():
+        from core.artifacts import ArtifactStore
+        return ArtifactStore(
+            os.environ.get('MODELLING_TOOLS_EXPORT_DIR', os.path.join(app.instance_path, 'exports')),
+            max_bytes=int(os.environ.get('MODELLING_TOOLS_EXPORT_MAX_MB', '1024')) * 2 ** 20,
+            max_age=float(os.environ.get('MODELLING_TOOLS_EXPORT_MAX_AGE_HOURS', '24')) * 3600)
+    return _lazy('export_store', create)
+
+def export_format(data):
+    """Requested export format: 'xlsx' unless the body or query string asks for csv, jsonl, json or parquet"""
+    fmt = (data.get('format') or request.args.get('format') or 'xlsx').lower()
+    if fmt != 'xlsx':
+        from core.formats import TABLE_FORMATS
+        if fmt not in TABLE_FORMATS:
+            raise ValueError(f"Unsupported export format: {fmt} (expected xlsx, {', '.join(TABLE_FORMATS)})")
+    return fmt
+
+def unavailable_format(fmt):
+    """501 response if fmt needs an optional package that is not installed, else None"""
+    if fmt == 'xlsx':
+        return None
+    from core.formats import missing_dependency
+    message = missing_dependency(fmt)
+    return (jsonify({'error': message}), 501) if message else None
+
+def table_writer(extractor, fmt, **table_options):
+    """write(path) callback streaming extractor.export_table() in a tabular format"""
+    from core.formats import write_table
+    return lambda path: write_table(path, fmt, *extractor.export_table(**table_options))
+
+def send_export(tool, fingerprint, options, write, download_name, fmt='xlsx'):
+    """Serve the export of (fingerprint, options, fmt), running write(path) only if it is not stored yet
+
+    fingerprint comes from the extractor's export_fingerprint(), so repeated
+    exports are served from the store until a source file changes.
+    """
+    if fmt == 'xlsx':
+        suffix, mimetype = '.xlsx', XLSX_MIMETYPE
+    else:
+        from core.formats import TABLE_FORMATS
+        suffix, mimetype = TABLE_FORMATS[fmt]
+    download_name += suffix
+    store = get_export_store()
+    key = store.key(tool, fingerprint, options, fmt)
+    path = store.get(key, suffix)
+    if path is None:
+        with metrics.stage('export', tool), profiled(tool, 'export'):
+            path = store.put(key, suffix, write)
+        metrics.inc('export_bytes', tool, os.path.getsize(path))
+    else:
+        metrics.inc('export_cache_hits', tool)
+    # Streamed from disk. Large workbooks can be re-fetched with Range requests
+    # from the GET URL in Content-Location
+    response = send_file(path, as_attachment=True, download_name=download_name, mimetype=mimetype,
+                         conditional=True, etag=key)
+    response.headers['Content-Location'] = url_for('download_export', name=key + suffix, download_name=download_name)
+    return response
+
+# Differs per process, so ETags issued before a restart or by another worker never match
+_ETAG_SALT = f"{os.getpid()}-{time.time_ns()}"
+
+def _revalidate(response):
+    """Let browsers keep the response but revalidate it with If-None-Match before each use"""
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+def versioned_json(tool, version, build):
+    """jsonify(build()) under a strong ETag of (result version, query string), or 304 Not Modified
+
+    build() only runs when the client's copy is stale, so repeated table
+    requests for an unchanged result skip both the table and the JSON work.
+    """
+    query = sorted(request.args.items(multi=True))
+    etag = hashlib.sha256(f"{_ETAG_SALT}\0{tool}\0{version}\0{query}".encode('utf-8')).hexdigest()[:32]
+    # Weak comparison: compressed responses carry the weak form of the same ETag
+    if request.if_none_match.contains_weak(etag):
+        metrics.inc('not_modified', tool)
+        response = app.response_class(status=304)
+    else:
+        response = jsonify(build())
+    response.set_etag(etag)
+    return _revalidate(response)
+
+def content_conditional(response):
+    """ETag from the response body; GET requests whose If-None-Match matches get a 304"""
+    response.add_etag()
+    response.make_conditional(request)
+    if response.status_code == 304:
+        metrics.inc('not_modified', _tool())
+    return _revalidate(response)
 
 # Create blueprints with full functionality
 pelmoex_bp = Blueprint('pelmoex', __name__, 
@@ -15,17 +255,18 @@ pelmoex_bp = Blueprint('pelmoex', __name__,
                       static_folder='pelmoex/static')
 
 # Global extractor instances
-pelmo_extractor = PELMOExtractor()
-pearl_extractor = PearlGroundwaterExtractor()
+pelmo_extractor = LocalProxy(lambda: get_extractor('pelmo'))
+pearl_extractor = LocalProxy(lambda: get_extractor('pearl'))
+results_index = LocalProxy(get_results_index)
 
 @pelmoex_bp.route('/')
 def pelmoex_index():
     return render_template('pelmoex/index.html')
 
-@pelmoex_bp.route('/scan_directory', methods=['POST'])
+@pelmoex_bp.route('/scan_directory', methods=['GET', 'POST'])
 def pelmoex_scan_directory():
     try:
-        data = request.get_json()
+        data = request.args if request.method == 'GET' else request.get_json()
         directory = data.get('directory', '').strip()
         
         if not directory:
@@ -41,17 +282,18 @@ def pelmoex_scan_directory():
         
         # Look for projects (folders ending with .run)
         projects = []
-        for item in os.listdir(focus_path):
-            item_path = os.path.join(focus_path, item)
-            if os.path.isdir(item_path) and item.endswith(".run"):
-                projects.append(item)
+        with metrics.stage('scan', 'pelmo'):
+            for item in os.listdir(focus_path):
+                item_path = os.path.join(focus_path, item)
+                if os.path.isdir(item_path) and item.endswith(".run"):
+                    projects.append(item)
         
         projects.sort()
         
-        return jsonify({
+        return content_conditional(jsonify({
             'projects': projects,
             'focus_path': focus_path
-        })
+        }))
         
     except Exception as e:
         return jsonify({'error': f'Error scanning directory: {str(e)}'})
@@ -78,14 +320,18 @@ def pelmoex_extract_data():
                 return jsonify({'error': 'Invalid limit value'})
         
         # Extract data
-        all_rows, header, errors = pelmo_extractor.extract_data(focus_path, selected_projects, limit_value)
+        with metrics.stage('extract', 'pelmo'), profiled('pelmo', 'extract'):
+            all_rows, header, errors = pelmo_extractor.extract_data(focus_path, selected_projects, limit_value)
+        metrics.inc('rows_emitted', 'pelmo', len(all_rows))
         
         return jsonify({
             'data': all_rows,
             'header': header,
             'limit_value': limit_value,
             'row_count': len(all_rows),
-            'errors': errors
+            'errors': errors,
+            'reused_files': pelmo_extractor.extract_stats['reused'],
+            'reparsed_files': pelmo_extractor.extract_stats['reparsed']
         })
         
     except Exception as e:
@@ -94,34 +340,53 @@ def pelmoex_extract_data():
 @pelmoex_bp.route('/export_excel', methods=['POST'])
 def pelmoex_export_excel():
     try:
-        if not pelmo_extractor.all_rows:
-            return jsonify({'error': 'No data to export'})
+        data = request.get_json(silent=True) or {}
+        fmt = export_format(data)
+        unavailable = unavailable_format(fmt)
+        if unavailable is not None:
+            return unavailable
+        focus_path = data.get('focus_path', '')
+        selected_projects = data.get('selected_projects', [])
         
-        # Create temporary file
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.xlsx') as tmp_file:
-            filepath = tmp_file.name
+        if focus_path and selected_projects:
+            # Stateless export: rebuild this selection from the parse cache, so
+            # no earlier extract on this worker is needed
+            limit_value = data.get('limit_value', None)
+            if limit_value:
+                try:
+                    limit_value = float(limit_value)
+                except ValueError:
+                    return jsonify({'error': 'Invalid limit value'})
+            extractor = new_extractor('pelmo')
+            with metrics.stage('extract', 'pelmo'), profiled('pelmo', 'extract'):
+                extractor.extract_data(focus_path, selected_projects, limit_value)
+        else:
+            extractor = pelmo_extractor
         
-        # Export to Excel
-        pelmo_extractor.export_to_excel(filepath)
+        if not extractor.all_rows:
+            return jsonify({'error': 'No data to export'})
         
-        # Send file
-        return send_file(
-            filepath,
-            as_attachment=True,
-            download_name='pelmo_extracted_data.xlsx',
-            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        )
+        write = extractor.export_to_excel if fmt == 'xlsx' else table_writer(extractor, fmt)
+        return send_export('pelmo', extractor.export_fingerprint(), {}, write, 'pelmo_extracted_data', fmt)
         
+    except ValueError as e:
+        return jsonify({'error': str(e)})
     except Exception as e:
         return jsonify({'error': f'Error exporting Excel: {str(e)}'})
 
 @pelmoex_bp.route('/get_table_data')
 def pelmoex_get_table_data():
     try:
-        return jsonify({
-            'data': pelmo_extractor.all_rows,
-            'header': ["Project", "Crop", "Scenario"] + sorted(set().union(*[set(row.keys()) for row in pelmo_extractor.all_rows]) - {"Project", "Crop", "Scenario"})
-        })
+        def build():
+            with metrics.stage('table', 'pelmo'):
+                header = ["Project", "Crop", "Scenario"] + sorted(set().union(*[set(row.keys()) for row in pelmo_extractor.all_rows]) - {"Project", "Crop", "Scenario"})
+            metrics.inc('rows_emitted', 'pelmo', len(pelmo_extractor.all_rows))
+            return {
+                'data': pelmo_extractor.all_rows,
+                'header': header
+            }
+        
+        return versioned_json('pelmo', pelmo_extractor.result_version, build)
         
     except Exception as e:
         return jsonify({'error': f'Error getting table data: {str(e)}'})
@@ -132,16 +397,16 @@ toxswaex_bp = Blueprint('toxswaex', __name__,
                         static_folder='toxswaex/static')
 
 # Global TOXSWA extractor instance
-toxswa_extractor = TOXSWAExtractor()
+toxswa_extractor = LocalProxy(lambda: get_extractor('toxswa'))
 
 @toxswaex_bp.route('/')
 def toxswaex_index():
     return render_template('toxswaex/index.html')
 
-@toxswaex_bp.route('/scan_directory', methods=['POST'])
+@toxswaex_bp.route('/scan_directory', methods=['GET', 'POST'])
 def toxswaex_scan_directory():
     try:
-        data = request.get_json()
+        data = request.args if request.method == 'GET' else request.get_json()
         directory = data.get('directory', '').strip()
         
         if not directory:
@@ -150,21 +415,15 @@ def toxswaex_scan_directory():
         if not os.path.exists(directory):
             return jsonify({'error': f'Directory does not exist: {directory}'})
         
-        # Look for projects (folders containing toxswa subfolder)
-        projects = []
-        for item in os.listdir(directory):
-            item_path = os.path.join(directory, item)
-            if os.path.isdir(item_path):
-                toxswa_path = os.path.join(item_path, "toxswa")
-                if os.path.exists(toxswa_path):
-                    projects.append(item)
-        
-        projects.sort()
+        # Look for projects (folders containing toxswa subfolder) with their metadata
+        with metrics.stage('scan', 'toxswa'):
+            project_info = toxswa_extractor.scan_projects(directory)
         
-        return jsonify({
-            'projects': projects,
+        return content_conditional(jsonify({
+            'projects': list(project_info),
+            'project_info': project_info,
             'main_dir': directory
-        })
+        }))
         
     except Exception as e:
         return jsonify({'error': f'Error scanning directory: {str(e)}'})
@@ -195,56 +454,52 @@ def toxswaex_extract_data():
                 return jsonify({'error': 'Invalid RAC value'})
         
         # Extract data
-        print(f"Extracting data from {main_dir} for projects: {selected_projects}")
-        print(f"Summary mode: {summary_mode}")
-        print(f"Project order: {project_order}")
-        all_data, errors = toxswa_extractor.extract_data(
-            main_dir, selected_projects, selected_files, rac_value, 
-            areic_comparison, summary_mode, project_order
-        )
-        print(f"Extraction result: {len(all_data) if all_data else 0} projects, {sum(len(rows) for rows in all_data.values()) if all_data else 0} total rows")
+        app.logger.debug('Extracting data from %s for projects: %s (summary mode: %s, project order: %s)',
+                         main_dir, selected_projects, summary_mode, project_order)
+        with metrics.stage('extract', 'toxswa'), profiled('toxswa', 'extract'):
+            all_data, errors = toxswa_extractor.extract_data(
+                main_dir, selected_projects, selected_files, rac_value, 
+                areic_comparison, summary_mode, project_order
+            )
+        app.logger.debug('Extraction result: %d projects, %d total rows',
+                         len(all_data), sum(len(rows) for rows in all_data.values()))
+        # Reuse counts are also in the response and in the parse cache metrics
+        app.logger.debug('toxswa extraction: %d files reused, %d re-parsed',
+                         toxswa_extractor.extract_stats['reused'], toxswa_extractor.extract_stats['reparsed'])
         if errors:
-            print(f"Extraction errors: {errors}")
+            app.logger.debug('Extraction errors: %s', errors)
         
-        # Convert all_data to flat list for client-side processing
+        # One array of cell values per row, in header order, for client-side processing
         all_rows = []
         headers = []
+        table_started = time.perf_counter()
         
         if all_data:
-            # Get all unique keys for headers
-            all_keys = set()
-            for project, rows in all_data.items():
-                for row in rows:
-                    all_keys.update(row.keys())
-            
             # Create headers list
             headers = ["Project", "Filename", "Compound", "Scenario", "Waterbody", "Max PECsw", "Max PECsed"]
             if areic_comparison:
                 headers.append("Areic dep.")
             headers.append("Route")
-            if "Type" in all_keys:
+            if any("Type" in row for rows in all_data.values() for row in rows):
                 headers.append("Type")
             
-            # Flatten the data
-            for project, rows in all_data.items():
-                for row in rows:
-                    flat_row = {"Project": project}
-                    for key in headers:
-                        if key == "Project":
-                            # Skip Project as it's already set
-                            continue
-                        if key in row:
-                            flat_row[key] = row[key]
-                        else:
-                            flat_row[key] = ""
-                    all_rows.append(flat_row)
+            # The extractor's rows projected onto the header columns as tuples;
+            # the headers are sent once instead of as keys of every row
+            columns = headers[1:]
+            blanks = [""] * len(columns)
+            all_rows = [(project, *map(row.get, columns, blanks))
+                        for project, rows in all_data.items() for row in rows]
+        metrics.observe('table', 'toxswa', time.perf_counter() - table_started)
+        metrics.inc('rows_emitted', 'toxswa', len(all_rows))
         
         return jsonify({
             'data': all_rows,
             'header': headers,
             'rac_value': rac_value,
             'row_count': len(all_rows),
-            'errors': errors
+            'errors': errors,
+            'reused_files': toxswa_extractor.extract_stats['reused'],
+            'reparsed_files': toxswa_extractor.extract_stats['reparsed']
         })
         
     except Exception as e:
@@ -253,27 +508,46 @@ def toxswaex_extract_data():
 @toxswaex_bp.route('/export_excel', methods=['POST'])
 def toxswaex_export_excel():
     try:
-        if not toxswa_extractor.all_data:
-            return jsonify({'error': 'No data to export'})
+        data = request.get_json(silent=True) or {}
+        fmt = export_format(data)
+        unavailable = unavailable_format(fmt)
+        if unavailable is not None:
+            return unavailable
+        main_dir = data.get('main_dir', '')
+        selected_projects = data.get('selected_projects', [])
+        
+        if main_dir and selected_projects:
+            # Stateless export: rebuild this selection from the parse cache, so
+            # no earlier extract on this worker is needed
+            rac_value = data.get('rac_value', None)
+            if rac_value:
+                try:
+                    rac_value = float(rac_value)
+                except ValueError:
+                    return jsonify({'error': 'Invalid RAC value'})
+            extractor = new_extractor('toxswa')
+            with metrics.stage('extract', 'toxswa'), profiled('toxswa', 'extract'):
+                extractor.extract_data(
+                    main_dir, selected_projects, data.get('selected_files', None), rac_value,
+                    data.get('areic_comparison', False), data.get('summary_mode', False),
+                    data.get('project_order', [])
+                )
+        else:
+            extractor = toxswa_extractor
         
-        # Create temporary file
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.xlsx') as tmp_file:
-            filepath = tmp_file.name
+        if not extractor.all_data:
+            return jsonify({'error': 'No data to export'})
         
         # Export to Excel (summary sheet will be created if batch_mode and summary_mode are enabled)
-        success = toxswa_extractor.export_to_excel(filepath)
+        def write_xlsx(filepath):
+            if not extractor.export_to_excel(filepath):
+                raise ValueError('Failed to export Excel file')
         
-        if not success:
-            return jsonify({'error': 'Failed to export Excel file'})
-        
-        # Send file
-        return send_file(
-            filepath,
-            as_attachment=True,
-            download_name='toxswa_extracted_data.xlsx',
-            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        )
+        write = write_xlsx if fmt == 'xlsx' else table_writer(extractor, fmt)
+        return send_export('toxswa', extractor.export_fingerprint(), {}, write, 'toxswa_extracted_data', fmt)
         
+    except ValueError as e:
+        return jsonify({'error': str(e)})
     except Exception as e:
         return jsonify({'error': f'Error exporting Excel: {str(e)}'})
 
@@ -283,12 +557,16 @@ def toxswaex_get_table_data():
         compound_type = request.args.get('compound_type', 'Parent')
         sort_by = request.args.get('sort_by', 'Filename')
         
-        table_data, headers = toxswa_extractor.get_table_data(compound_type, sort_by)
+        def build():
+            with metrics.stage('table', 'toxswa'):
+                table_data, headers = toxswa_extractor.get_table_data(compound_type, sort_by)
+            metrics.inc('rows_emitted', 'toxswa', len(table_data))
+            return {
+                'data': table_data,
+                'header': headers
+            }
         
-        return jsonify({
-            'data': table_data,
-            'header': headers
-        })
+        return versioned_json('toxswa', toxswa_extractor.result_version, build)
         
     except Exception as e:
         return jsonify({'error': f'Error getting table data: {str(e)}'})
@@ -302,10 +580,10 @@ pearlex_bp = Blueprint('pearlex', __name__,
 def pearlex_index():
     return render_template('pearlex/index.html')
 
-@pearlex_bp.route('/scan_directory', methods=['POST'])
+@pearlex_bp.route('/scan_directory', methods=['GET', 'POST'])
 def pearlex_scan_directory():
     try:
-        data = request.get_json()
+        data = request.args if request.method == 'GET' else request.get_json()
         directory = data.get('directory', '').strip()
         
         if not directory:
@@ -315,12 +593,13 @@ def pearlex_scan_directory():
             return jsonify({'error': f'Directory does not exist: {directory}'})
         
         # Scan for .sum files using the exact logic from original PEARLex
-        files = pearl_extractor.scan_directory(directory)
+        with metrics.stage('scan', 'pearl'):
+            files = pearl_extractor.scan_directory(directory)
         
-        return jsonify({
+        return content_conditional(jsonify({
             'files': files,
             'main_dir': directory
-        })
+        }))
         
     except Exception as e:
         return jsonify({'error': f'Error scanning directory: {str(e)}'})
@@ -349,10 +628,13 @@ def pearlex_extract_data():
                 return jsonify({'error': 'Invalid limit value'})
         
         # Extract data using the exact logic from original PEARLex
-        table_data = pearl_extractor.extract_data(selected_files)
+        with metrics.stage('extract', 'pearl'), profiled('pearl', 'extract'):
+            table_data = pearl_extractor.extract_data(selected_files)
         
         # Get filtered and sorted data for display
-        filtered_data = pearl_extractor.get_table_data(compound_type, sort_by, limit_value)
+        with metrics.stage('table', 'pearl'):
+            filtered_data = pearl_extractor.get_table_data(compound_type, sort_by, limit_value)
+        metrics.inc('rows_emitted', 'pearl', len(filtered_data))
         
         return jsonify({
             'data': filtered_data,
@@ -368,6 +650,10 @@ def pearlex_extract_data():
 def pearlex_export_excel():
     try:
         data = request.get_json()
+        fmt = export_format(data)
+        unavailable = unavailable_format(fmt)
+        if unavailable is not None:
+            return unavailable
         batch_mode = data.get('batch_mode', False)
         limit_value = data.get('limit_value', None)
         
@@ -378,24 +664,33 @@ def pearlex_export_excel():
             except ValueError:
                 return jsonify({'error': 'Invalid limit value'})
         
-        if batch_mode:
-            # Export batches
-            success, result = pearl_extractor.export_batches(limit_value)
+        def write_xlsx(filepath):
+            if batch_mode:
+                # Export batches
+                success, result = pearl_extractor.export_batches(limit_value)
+            else:
+                # Export single mode
+                success, result = pearl_extractor.export_to_excel_single(limit_value)
+            if not success:
+                raise ValueError(result)
+            with open(filepath, 'wb') as f:
+                f.write(result.getbuffer())
+        
+        if fmt == 'xlsx':
+            write = write_xlsx
+            options = {'batch_mode': bool(batch_mode), 'limit_value': limit_value}
         else:
-            # Export single mode
-            success, result = pearl_extractor.export_to_excel_single(limit_value)
-        
-        if not success:
-            return jsonify({'error': result})
-        
-        # Send file
-        return send_file(
-            result,
-            as_attachment=True,
-            download_name='pearl_extracted_data.xlsx',
-            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        )
-        
+            # The limit value only drives the workbook highlighting
+            if batch_mode and not pearl_extractor.batches:
+                return jsonify({'error': 'No batches to export'})
+            if not batch_mode and not pearl_extractor.all_data:
+                return jsonify({'error': 'No data to export'})
+            write = table_writer(pearl_extractor, fmt, batch_mode=bool(batch_mode))
+            options = {'batch_mode': bool(batch_mode)}
+        return send_export('pearl', pearl_extractor.export_fingerprint(), options, write, 'pearl_extracted_data', fmt)
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)})
     except Exception as e:
         return jsonify({'error': f'Error exporting Excel: {str(e)}'})
 
@@ -416,6 +711,69 @@ def pearlex_add_to_batch():
     except Exception as e:
         return jsonify({'error': f'Error adding to batch: {str(e)}'})
 
+@pearlex_bp.route('/build_batches', methods=['POST'])
+def pearlex_build_batches():
+    """Add one batch per subdirectory (or glob group) of main_dir in one call"""
+    try:
+        data = request.get_json()
+        main_dir = data.get('main_dir', '')
+        patterns = data.get('patterns') or None
+        limit_value = data.get('limit_value', None)
+
+        if not main_dir:
+            return jsonify({'error': 'No main directory specified'})
+
+        if not os.path.isdir(main_dir):
+            return jsonify({'error': f'Directory does not exist: {main_dir}'})
+
+        if patterns is not None and not isinstance(patterns, (dict, list)):
+            return jsonify({'error': 'patterns must be a list of globs or an object of batch name to glob'})
+
+        # Convert limit value to float if provided
+        if limit_value:
+            try:
+                limit_value = float(limit_value)
+            except ValueError:
+                return jsonify({'error': 'Invalid limit value'})
+
+        try:
+            max_workers = max(1, int(data.get('max_workers', 8)))
+        except (TypeError, ValueError):
+            return jsonify({'error': 'Invalid max_workers'})
+
+        if data.get('replace'):
+            pearl_extractor.clear_batches()
+
+        with metrics.stage('extract', 'pearl'), profiled('pearl', 'build_batches'):
+            built, errors = pearl_extractor.build_batches(main_dir, patterns, max_workers)
+
+        if not built:
+            return jsonify({'error': 'No .sum files found for any batch', 'errors': errors})
+
+        if data.get('export'):
+            # The same workbook as /pearlex/export_excel in batch mode
+            def write_xlsx(filepath):
+                success, result = pearl_extractor.export_batches(limit_value)
+                if not success:
+                    raise ValueError(result)
+                with open(filepath, 'wb') as f:
+                    f.write(result.getbuffer())
+            options = {'batch_mode': True, 'limit_value': limit_value}
+            return send_export('pearl', pearl_extractor.export_fingerprint(), options, write_xlsx, 'pearl_extracted_data')
+
+        return jsonify({
+            'success': True,
+            'message': f'{len(built)} batches added',
+            'built': [{'name': name, 'files': files, 'rows': rows} for name, (files, rows) in built.items()],
+            'errors': errors,
+            'batches': pearl_extractor.get_batches()
+        })
+
+    except ValueError as e:
+        return jsonify({'error': str(e)})
+    except Exception as e:
+        return jsonify({'error': f'Error building batches: {str(e)}'})
+
 @pearlex_bp.route('/clear_data', methods=['POST'])
 def pearlex_clear_data():
     try:
@@ -456,12 +814,16 @@ def pearlex_get_table_data():
             except ValueError:
                 limit_value = None
         
-        table_data = pearl_extractor.get_table_data(compound_type, sort_by, limit_value)
+        def build():
+            with metrics.stage('table', 'pearl'):
+                table_data = pearl_extractor.get_table_data(compound_type, sort_by, limit_value)
+            metrics.inc('rows_emitted', 'pearl', len(table_data))
+            return {
+                'data': table_data,
+                'header': ["Project", "Filename", "Compound Type", "Scenario", "Compound", "80th Percentile (µg/L)"]
+            }
         
-        return jsonify({
-            'data': table_data,
-            'header': ["Project", "Filename", "Compound Type", "Scenario", "Compound", "80th Percentile (µg/L)"]
-        })
+        return versioned_json('pearl', pearl_extractor.result_version, build)
         
     except Exception as e:
         return jsonify({'error': f'Error getting table data: {str(e)}'})
@@ -502,5 +864,135 @@ def smart_tool():
     except Exception as e:
         return jsonify({'success': False, 'error': f'Error opening file: {str(e)}'}), 500
 
+@app.route('/results/query')
+def results_query():
+    """Aggregate an indexed metric across projects, e.g. max PECsw per scenario for one compound"""
+    try:
+        metric = request.args.get('metric', 'Max PECsw')
+        rows = results_index.query(
+            metric,
+            compound=request.args.get('compound'),
+            scenario=request.args.get('scenario'),
+            project=request.args.get('project'),
+            model=request.args.get('model'),
+            compound_type=request.args.get('compound_type'),
+            agg=request.args.get('agg', 'max'),
+            group_by=request.args.get('group_by', 'scenario'),
+        )
+        
+        return jsonify({
+            'metric': metric,
+            'data': rows,
+            'row_count': len(rows)
+        })
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)})
+    except Exception as e:
+        return jsonify({'error': f'Error querying results: {str(e)}'})
+
+@app.route('/results/summary')
+def results_summary():
+    try:
+        return jsonify(results_index.summary())
+    except Exception as e:
+        return jsonify({'error': f'Error reading results index: {str(e)}'})
+
+# Optional background watcher that pre-parses model outputs into the parse cache
+def get_output_watcher():
+    def create():
+        from core.watcher import ModelOutputWatcher, toxswa_output, pelmo_output, pearl_output
+        return ModelOutputWatcher({
+            'toxswa': (toxswa_output, get_extractor('toxswa').parse_sum_file),
+            'pelmo': (pelmo_output, get_extractor('pelmo').extract_active_substance_and_metabolites),
+            'pearl': (pearl_output, get_extractor('pearl').parse_sum_file),
+        })
+    return _lazy('output_watcher', create)
+
+output_watcher = LocalProxy(get_output_watcher)
+
+_watch_roots_configured = False
+
+@app.before_request
+def start_configured_watcher():
+    """Register MODELLING_TOOLS_WATCH_ROOTS and start the watcher, once, on the first request
+
+    MODELLING_TOOLS_WATCH_ROOTS="toxswa=/data/swash<pathsep>pelmo=/data/FOCUS<pathsep>pearl=/data/pearl"
+    """
+    global _watch_roots_configured
+    if _watch_roots_configured:
+        return
+    with _lazy_lock:
+        if _watch_roots_configured:
+            return
+        _watch_roots_configured = True
+    entries = [e for e in os.environ.get('MODELLING_TOOLS_WATCH_ROOTS', '').split(os.pathsep) if '=' in e]
+    for entry in entries:
+        kind, root = entry.split('=', 1)
+        try:
+            output_watcher.add_root(root.strip(), kind.strip())
+        except ValueError as e:
+            app.logger.warning('Watcher root skipped: %s', e)
+    if entries and output_watcher.roots:
+        output_watcher.start()
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Per-stage timings and counters in Prometheus text format"""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/exports/<name>')
+def download_export(name):
+    """Stored export by content-addressed name; supports Range and If-None-Match"""
+    path = get_export_store().path(name)
+    if path is None:
+        return jsonify({'error': f'Export not found: {name}'}), 404
+    return send_file(path, as_attachment=True, download_name=request.args.get('download_name', name),
+                     conditional=True, etag=os.path.splitext(name)[0])
+
+@app.route('/admin/profiles')
+def admin_profiles():
+    """List stored request profiles (admin only)"""
+    if not is_admin():
+        return jsonify({'error': 'Admin token required'}), 403
+    return jsonify({'profiles': get_profile_store().list()})
+
+@app.route('/admin/profiles/<name>')
+def admin_profile_download(name):
+    if not is_admin():
+        return jsonify({'error': 'Admin token required'}), 403
+    path = get_profile_store().path(name)
+    if path is None:
+        return jsonify({'error': f'Profile not found: {name}'}), 404
+    return send_file(path, as_attachment=True, download_name=name, mimetype='application/octet-stream')
+
+@app.route('/watcher/status')
+def watcher_status():
+    if not is_admin():
+        return jsonify({'error': 'Admin token required'}), 403
+    return jsonify(output_watcher.status())
+
+@app.route('/watcher/roots', methods=['POST'])
+def watcher_add_root():
+    if not is_admin():
+        return jsonify({'error': 'Admin token required'}), 403
+    try:
+        data = request.get_json()
+        directory = data.get('directory', '').strip()
+        kind = data.get('kind', '').strip()
+        
+        if not directory:
+            return jsonify({'error': 'Please provide a directory path'})
+        
+        output_watcher.add_root(directory, kind)
+        output_watcher.start()
+        
+        return jsonify(output_watcher.status())
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)})
+    except Exception as e:
+        return jsonify({'error': f'Error registering watch root: {str(e)}'})
+
 if __name__ == '__main__':
     app.run(debug=True) 
\ No newline at end of file
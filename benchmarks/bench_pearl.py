@@ -0,0 +1,67 @@
+"""PEARL extractor benchmarks: scan, parse, table build, JSON and xlsx stages"""
+import json
+
+import pytest
+
+from core.parse_cache import ParseCache
+from pearlex.extractor import PearlGroundwaterExtractor
+
+pytestmark = pytest.mark.benchmark(group="pearl")
+
+
+def _extract(corpus, parse_cache=None):
+    extractor = PearlGroundwaterExtractor(parse_cache=ParseCache(max_entries=0) if parse_cache is None else parse_cache)
+    files = extractor.scan_directory(corpus["pearl_main_dir"])
+    extractor.extract_data(files)
+    return extractor
+
+
+def bench_pearl_scan(measure, corpus):
+    extractor = PearlGroundwaterExtractor()
+    files = extractor.scan_directory(corpus["pearl_main_dir"])
+    measure(lambda: extractor.scan_directory(corpus["pearl_main_dir"]), files=len(files))
+
+
+def bench_pearl_parse(measure, corpus):
+    extractor = _extract(corpus)
+    measure(lambda: _extract(corpus), files=len(extractor.sum_filepaths), rows=len(extractor.all_data))
+
+
+def bench_pearl_parse_cached(measure, corpus):
+    cache = ParseCache()
+    extractor = _extract(corpus, cache)
+    measure(lambda: _extract(corpus, cache), files=len(extractor.sum_filepaths), rows=len(extractor.all_data))
+
+
+def bench_pearl_table_build(measure, corpus):
+    extractor = _extract(corpus)
+    measure(lambda: extractor.get_table_data("Parent", "Filename", 0.1), rows=len(extractor.all_data))
+
+
+def bench_pearl_json_serialize(measure, corpus):
+    extractor = _extract(corpus)
+    table = extractor.get_table_data("Parent", "Filename", 0.1)
+    measure(lambda: json.dumps({"data": table}), rows=len(table))
+
+
+def bench_pearl_xlsx_write(measure, corpus):
+    extractor = _extract(corpus)
+    measure(lambda: extractor.export_to_excel_single(0.1), rows=len(extractor.all_data), rounds=3)
+
+
+def bench_pearl_batches_xlsx_write(measure, corpus):
+    extractor = _extract(corpus)
+    for i in range(5):
+        extractor.add_to_batch(f"Batch_{i + 1}")
+    measure(lambda: extractor.export_batches(0.1), rows=5 * len(extractor.all_data), rounds=3)
+
+
+def bench_pearl_end_to_end(measure, corpus):
+    rows = len(_extract(corpus).all_data)
+
+    def end_to_end():
+        extractor = _extract(corpus)
+        json.dumps({"data": extractor.get_table_data("Parent", "Filename", 0.1)})
+        extractor.export_to_excel_single(0.1)
+
+    measure(end_to_end, rows=rows, rounds=3)
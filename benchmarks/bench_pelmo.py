@@ -0,0 +1,87 @@
+"""PELMO extractor benchmarks: scan, parse, table build, JSON and xlsx stages"""
+import json
+import os
+
+import pytest
+
+from core import pelmo
+from core.parse_cache import ParseCache
+from pelmoex.extractor import PELMOExtractor
+
+pytestmark = pytest.mark.benchmark(group="pelmo")
+
+
+def _plm_files(corpus):
+    return [os.path.join(d, f) for d, _, files in os.walk(corpus["pelmo_focus_path"]) for f in files
+            if f == "period.plm"]
+
+
+def _extract(corpus, parse_cache=None):
+    extractor = PELMOExtractor(parse_cache=ParseCache(max_entries=0) if parse_cache is None else parse_cache)
+    extractor.extract_data(corpus["pelmo_focus_path"], corpus["pelmo_projects"], 0.1)
+    return extractor
+
+
+def _header(rows):
+    return ["Project", "Crop", "Scenario"] + sorted(set().union(*[set(row.keys()) for row in rows]) - {"Project", "Crop", "Scenario"})
+
+
+def bench_pelmo_corpus_pecs(corpus):
+    """Self-test: each substance gets its own 80th percentile PEC (the parent's is not overwritten)"""
+    differ = 0
+    for path in _plm_files(corpus):
+        with open(path, encoding="ISO-8859-1") as f:
+            percentiles = [line.split()[-1] for line in f if "80 Perc." in line]
+        active, active_pec, metabolites = pelmo.parse_period_plm(path)
+        assert [active_pec] + [pec for _, pec in metabolites] == percentiles, path
+        differ += any(pec != active_pec for _, pec in metabolites)
+    assert differ, "parent and metabolite PECs are identical in every file"
+
+
+def bench_pelmo_scan(measure, corpus):
+    focus = corpus["pelmo_focus_path"]
+
+    def scan():
+        return sorted(d for d in os.listdir(focus) if os.path.isdir(os.path.join(focus, d)) and d.endswith(".run"))
+
+    measure(scan, files=len(corpus["pelmo_projects"]))
+
+
+def bench_pelmo_parse(measure, corpus):
+    rows = len(_extract(corpus).all_rows)
+    measure(lambda: _extract(corpus), files=len(_plm_files(corpus)), rows=rows)
+
+
+def bench_pelmo_parse_cached(measure, corpus):
+    cache = ParseCache()
+    rows = len(_extract(corpus, cache).all_rows)
+    measure(lambda: _extract(corpus, cache), files=len(_plm_files(corpus)), rows=rows)
+
+
+def bench_pelmo_table_build(measure, corpus):
+    extractor = _extract(corpus)
+    measure(lambda: _header(extractor.all_rows), rows=len(extractor.all_rows))
+
+
+def bench_pelmo_json_serialize(measure, corpus):
+    extractor = _extract(corpus)
+    header = _header(extractor.all_rows)
+    measure(lambda: json.dumps({"data": extractor.all_rows, "header": header}), rows=len(extractor.all_rows))
+
+
+def bench_pelmo_xlsx_write(measure, corpus, tmp_path):
+    extractor = _extract(corpus)
+    path = str(tmp_path / "pelmo.xlsx")
+    measure(lambda: extractor.export_to_excel(path), rows=len(extractor.all_rows), rounds=3)
+
+
+def bench_pelmo_end_to_end(measure, corpus, tmp_path):
+    path = str(tmp_path / "pelmo.xlsx")
+    rows = len(_extract(corpus).all_rows)
+
+    def end_to_end():
+        extractor = _extract(corpus)
+        json.dumps({"data": extractor.all_rows, "header": _header(extractor.all_rows)})
+        extractor.export_to_excel(path)
+
+    measure(end_to_end, files=len(_plm_files(corpus)), rows=rows, rounds=3)
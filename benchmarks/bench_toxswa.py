@@ -0,0 +1,80 @@
+"""TOXSWA extractor benchmarks: scan, parse, table build, JSON and xlsx stages"""
+import json
+import os
+
+import pytest
+
+from core.parse_cache import ParseCache
+from toxswaex.extractor import TOXSWAExtractor
+
+pytestmark = pytest.mark.benchmark(group="toxswa")
+
+
+def _sum_files(corpus):
+    main_dir = corpus["toxswa_main_dir"]
+    return [
+        os.path.join(main_dir, p, "toxswa", f)
+        for p in corpus["toxswa_projects"]
+        for f in os.listdir(os.path.join(main_dir, p, "toxswa"))
+        if f.endswith(".sum")
+    ]
+
+
+def _extract(corpus, parse_cache=None, summary_mode=True):
+    extractor = TOXSWAExtractor(parse_cache=ParseCache(max_entries=0) if parse_cache is None else parse_cache)
+    extractor.extract_data(corpus["toxswa_main_dir"], corpus["toxswa_projects"],
+                           areic_comparison=True, summary_mode=summary_mode)
+    return extractor
+
+
+def _row_count(extractor):
+    return sum(len(rows) for rows in extractor.all_data.values())
+
+
+def bench_toxswa_scan(measure, corpus):
+    extractor = TOXSWAExtractor()
+    main_dir = corpus["toxswa_main_dir"]
+    measure(lambda: extractor.scan_projects(main_dir), files=len(_sum_files(corpus)))
+
+
+def bench_toxswa_parse(measure, corpus):
+    extractor = _extract(corpus)
+    measure(lambda: _extract(corpus), files=len(_sum_files(corpus)), rows=_row_count(extractor))
+
+
+def bench_toxswa_parse_cached(measure, corpus):
+    cache = ParseCache()
+    extractor = _extract(corpus, cache)
+    measure(lambda: _extract(corpus, cache), files=len(_sum_files(corpus)), rows=_row_count(extractor))
+
+
+def bench_toxswa_table_build(measure, corpus):
+    extractor = _extract(corpus)
+    rows, _ = extractor.get_table_data("Parent", "Filename")
+    measure(lambda: extractor.get_table_data("Parent", "Filename"), rows=len(rows))
+
+
+def bench_toxswa_json_serialize(measure, corpus):
+    extractor = _extract(corpus)
+    rows, headers = extractor.get_table_data("Parent", "Filename")
+    measure(lambda: json.dumps({"data": rows, "header": headers}), rows=len(rows))
+
+
+def bench_toxswa_xlsx_write(measure, corpus, tmp_path):
+    extractor = _extract(corpus)
+    path = str(tmp_path / "toxswa.xlsx")
+    measure(lambda: extractor.export_to_excel(path), files=len(_sum_files(corpus)),
+            rows=_row_count(extractor), rounds=3)
+
+
+def bench_toxswa_end_to_end(measure, corpus, tmp_path):
+    path = str(tmp_path / "toxswa.xlsx")
+    count = _row_count(_extract(corpus))
+
+    def end_to_end():
+        extractor = _extract(corpus)
+        rows, headers = extractor.get_table_data("Parent", "Filename")
+        json.dumps({"data": rows, "header": headers})
+        extractor.export_to_excel(path)
+
+    measure(end_to_end, files=len(_sum_files(corpus)), rows=count, rounds=3)
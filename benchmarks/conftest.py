@@ -0,0 +1,113 @@
+"""Fixtures for the extractor benchmark suite (see README "Benchmarks")"""
+import contextlib
+import io
+import json
+import os
+import tracemalloc
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from benchmarks.corpus import SIZES, generate_corpus
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("extractor benchmarks")
+    group.addoption("--corpus-size", choices=sorted(SIZES), default="small",
+                    help="Synthetic corpus size to benchmark against (default: small)")
+    group.addoption("--bench-baseline", default=DEFAULT_BASELINE,
+                    help="JSON file with stored mean timings to compare against")
+    group.addoption("--bench-threshold", type=float, default=0.25,
+                    help="Allowed slowdown versus the baseline mean before failing (default 0.25 = 25%%)")
+    group.addoption("--bench-update-baseline", action="store_true",
+                    help="Write this run's mean timings to the baseline file instead of comparing")
+
+
+@pytest.fixture(scope="session")
+def corpus(request, tmp_path_factory):
+    """Generated corpus paths for the selected size"""
+    size = request.config.getoption("--corpus-size")
+    root = tmp_path_factory.mktemp(f"corpus-{size}")
+    info = generate_corpus(str(root), size)
+    info["size"] = size
+    return info
+
+
+@pytest.fixture(scope="session")
+def baseline(request):
+    path = request.config.getoption("--bench-baseline")
+    stored = {}
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            stored = json.load(f)
+    results = {}
+    yield stored, results
+    if request.config.getoption("--bench-update-baseline") and results:
+        stored.update(results)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(stored, f, indent=2, sort_keys=True)
+
+
+@contextlib.contextmanager
+def quiet():
+    # The extractors print debug output per file and row
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+@pytest.fixture
+def measure(request, benchmark, corpus, baseline):
+    """Benchmark fn, record throughput and peak memory, and check the stored baseline
+
+    files/rows are the number of input files and output rows one call
+    handles; they are turned into files/s and rows/s from the mean time.
+    """
+    stored, results = baseline
+
+    def run(fn, files=0, rows=0, setup=None, rounds=None):
+        def call():
+            with quiet():
+                return fn()
+
+        # Peak Python heap of a single call, outside the timed rounds
+        if setup:
+            setup()
+        tracemalloc.start()
+        try:
+            call()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        if setup or rounds:
+            result = benchmark.pedantic(call, setup=setup, rounds=rounds or 5, iterations=1)
+        else:
+            result = benchmark(call)
+
+        benchmark.extra_info["corpus_size"] = corpus["size"]
+        benchmark.extra_info["peak_memory_mb"] = round(peak / 2 ** 20, 2)
+        stats = getattr(benchmark, "stats", None)
+        mean = stats.stats.mean if stats else None
+        if mean:
+            if files:
+                benchmark.extra_info["files_per_s"] = round(files / mean, 1)
+            if rows:
+                benchmark.extra_info["rows_per_s"] = round(rows / mean, 1)
+
+            key = f"{corpus['size']}::{request.node.name}"
+            results[key] = {"mean": mean, "peak_memory_mb": benchmark.extra_info["peak_memory_mb"]}
+            threshold = request.config.getoption("--bench-threshold")
+            previous = stored.get(key)
+            if previous and not request.config.getoption("--bench-update-baseline"):
+                limit = previous["mean"] * (1 + threshold)
+                if mean > limit:
+                    pytest.fail(
+                        f"{key}: mean {mean * 1000:.2f} ms exceeds baseline "
+                        f"{previous['mean'] * 1000:.2f} ms by more than {threshold:.0%}"
+                    )
+        return result
+
+    return run
@@ -0,0 +1,274 @@
+"""Synthetic model-output corpus for benchmarking the extractors.
+
+Writes files that follow the patterns the parsers in toxswaex/extractor.py,
+pelmoex/extractor.py and pearlex/extractor.py look for, so perf work can be
+measured without confidential FOCUS data:
+
+    python -m benchmarks.corpus /tmp/corpus --size medium
+    python -m benchmarks.corpus /tmp/corpus --toxswa-projects 20 --sum-files 50 --metabolites 3
+
+Layout produced under the output directory:
+
+    toxswa/<project>/toxswa/*.sum            (+ SWAN_log.txt for mitigated projects)
+    pelmo/FOCUS/<project>.run/<crop>.run/<scenario>_-_<crop>.run/period.plm
+    pearl/<run>/*.sum
+"""
+import argparse
+import datetime
+import os
+import random
+
+DAY_LABELS = ["1_day", "2_days", "3_days", "4_days", "7_days", "14_days",
+              "21_days", "28_days", "42_days", "50_days", "100_days"]
+TOXSWA_SCENARIOS = ["D1_Ditch", "D1_Stream", "D2_Ditch", "D2_Stream", "D3_Ditch", "D4_Pond",
+                    "D4_Stream", "D5_Pond", "D5_Stream", "D6_Ditch", "R1_Pond", "R1_Stream",
+                    "R2_Stream", "R3_Stream", "R4_Stream"]
+PELMO_SCENARIOS = ["Chateaudun", "Hamburg", "Jokioinen", "Kremsmuenster", "Okehampton",
+                   "Piacenza", "Porto", "Sevilla", "Thiva"]
+PELMO_CROPS = ["Maize", "Winter_cereals", "Potatoes", "Sugar_beets", "Vines", "Apples"]
+PEARL_LOCATIONS = [s.upper() for s in PELMO_SCENARIOS]
+MITIGATIONS = [
+    # (buffer m, nozzle %, run-off mode, filter strip m, fractional volume reduction)
+    (5, 0, None, None, None),
+    (10, 50, None, None, None),
+    (20, 75, "VfsMod", 10, None),
+    (10, 0, "ManualReduction", None, 0.6),
+    (20, 90, "ManualReduction", None, 0.8),
+]
+
+SIZES = {
+    # toxswa projects / files, pelmo projects / crops, pearl runs / files, metabolites, table rows
+    "small": dict(toxswa_projects=2, sum_files=10, pelmo_projects=2, crops=2, pearl_runs=2,
+                  pearl_files=10, metabolites=1, daily_rows=50),
+    "medium": dict(toxswa_projects=5, sum_files=60, pelmo_projects=5, crops=4, pearl_runs=5,
+                   pearl_files=40, metabolites=2, daily_rows=400),
+    "large": dict(toxswa_projects=10, sum_files=100, pelmo_projects=10, crops=6, pearl_runs=10,
+                  pearl_files=100, metabolites=4, daily_rows=2000),
+}
+
+
+def _date(rng, year=1992):
+    day = datetime.date(year, 1, 1) + datetime.timedelta(days=rng.randrange(60, 300))
+    return day.strftime("%d-%b-%Y"), f"{rng.randrange(6, 18):02d}h00"
+
+
+def _pec(rng, scale=1.0):
+    # Log-uniform values with a share below the 1E-06 reporting limit
+    return scale * 10 ** rng.uniform(-6.5, 0.5)
+
+
+def _substance_tables(lines, rng, substance, version, daily_rows, app_stamp):
+    """Water and sediment tables for one substance, with Global max and daily PEC/TWAEC blocks"""
+    if version == 3:
+        def daily(label, value):
+            return f"{label:<13}{value:>22.6e}"
+    else:
+        def daily(label, value):
+            return f"{label:<18}{value:>18.6e}"
+
+    for layer, prefix in (("water layer", "sw"), ("sediment", "sed")):
+        max_value = _pec(rng, 10 if prefix == "sed" else 1)
+        max_date = app_stamp if rng.random() < 0.6 else "-".join(_date(rng))
+        lines += [
+            f"* Table: PEC in {layer} of substance: {substance}",
+            "* Time (d)      Date/Hour           PEC (ug.L-1)",
+        ]
+        start = datetime.datetime(1992, 1, 1)
+        for i in range(daily_rows):
+            stamp = (start + datetime.timedelta(hours=i)).strftime("%d-%b-%Y-%Hh00")
+            lines.append(f"{i / 24:12.3f}    {stamp}    {_pec(rng):14.6e}")
+        lines += [
+            "",
+            # The parsers read Global max in fixed notation (no exponent)
+            f"Global max{'':7}{max_value:>19.6f}   {max_date}",
+            "",
+        ]
+        for label in DAY_LABELS:
+            value = max_value * rng.uniform(0.2, 1.0)
+            lines.append(daily(f"PEC{prefix}_{label}", value))
+        for label in DAY_LABELS:
+            value = max_value * rng.uniform(0.05, 0.8)
+            lines.append(daily(f"TWAEC{prefix}_{label}", value))
+        lines.append("")
+
+
+def toxswa_sum(rng, parent, metabolites, scenario, version=4, applications=2, daily_rows=200):
+    """Content of one TOXSWA .sum file (v3.3.1 or v4 layout)"""
+    header = "* FOCUS_TOXSWA v3.3.1" if version == 3 else "* FOCUS  TOXSWA version   : 4.4.3"
+    lines = [
+        header,
+        "* Summary report",
+        f"* Scenario        : {scenario}",
+        f"* Water Body Type : {scenario.split('_')[1] if '_' in scenario else 'Ditch'}",
+        f"* Substance       : {parent}",
+    ]
+    for i, met in enumerate(metabolites, start=1):
+        lines.append(f"* Substance {i}: {met}")
+    lines += [
+        "",
+        "Appl.No  Date/Hour            Dosage (kg.ha-1)  Drift (%)",
+    ]
+    app_stamps = []
+    for n in range(1, applications + 1):
+        date, hour = _date(rng)
+        stamp = f"{date}-{hour}"
+        app_stamps.append(stamp)
+        lines.append(f"  {n}      {stamp}   {rng.uniform(0.05, 1.5):16.4f}  {rng.uniform(0.1, 3):9.3f}")
+    lines += [
+        "",
+        "Areic mean deposition (mg.m-2) on the water surface",
+        f"  1      {parent}   {rng.uniform(1e-4, 0.5):.4E}",
+        "",
+        "",
+    ]
+    for substance in [parent] + list(metabolites):
+        _substance_tables(lines, rng, substance, version, daily_rows, app_stamps[0])
+    return "\n".join(lines) + "\n"
+
+
+def swan_log(mitigation):
+    buffer, nozzle, mode, strip, volume = mitigation
+    lines = [
+        "SWASH / SWAN log",
+        "Spray drift mitigation",
+        f"  Buffer width (m) : {buffer}",
+        f"  Nozzle reduction (%) : {nozzle}",
+        "Run-off mitigation",
+    ]
+    if mode == "VfsMod":
+        lines += ["  Reduction run-off mode: VfsMod", f"  Filter strip buffer width : {strip}"]
+    elif mode == "ManualReduction":
+        lines += ["  Reduction run-off mode: ManualReduction",
+                  f"  Fractional reduction in run-off volume : {volume}"]
+    else:
+        lines.append("  Reduction run-off mode: None")
+    lines += ["Dry deposition", "  Not considered", ""]
+    return "\n".join(lines)
+
+
+def period_plm(rng, active, metabolites, filler_lines=200):
+    """Content of one PELMO period.plm with yearly tables and 80th percentile results"""
+    lines = ["PELMO 5.5.3  FOCUS period output", ""]
+    for substance, label in [(active, "ACTIVE SUBSTANCE")] + [(m, f"METABOLITE A{i}") for i, m in enumerate(metabolites, 1)]:
+        lines.append(f" Results for {label} ({substance}) in the percolate at 1 m soil depth")
+        lines.append(" Period   Percolate (mm)   Flux (g/ha)   Conc. (ug/L)")
+        for year in range(1, filler_lines // (1 + len(metabolites)) + 1):
+            lines.append(f" {year:6d}   {rng.uniform(50, 400):14.2f}   {rng.uniform(0, 5):11.5f}   {_pec(rng):12.6f}")
+        lines.append(f" 80 Perc.                                            {_pec(rng):.6f}")
+        lines.append("")
+    return "\n".join(lines)
+
+
+def pearl_sum(rng, scheme, location, parent, metabolites, filler_lines=200):
+    """Content of one PEARL .sum file"""
+    lines = [
+        "* PEARL summary file",
+        f"Application_scheme  {scheme}",
+        f"Location            : {location}",
+        "",
+    ]
+    for i in range(filler_lines):
+        lines.append(f"* {i:5d} {rng.uniform(0, 1):.6f} {rng.uniform(0, 1):.6f}")
+    lines.append("")
+    for substance in [parent] + list(metabolites):
+        lines.append(f"Result_{substance}    {_pec(rng, 0.5):.6f}")
+    lines.append("")
+    return "\n".join(lines)
+
+
+def _write(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="ISO-8859-1") as f:
+        f.write(content)
+
+
+def generate_toxswa(root, projects=2, sum_files=10, metabolites=1, daily_rows=200, seed=0):
+    """SWASH main directory with Step 3 and mitigated projects; returns the project names"""
+    rng = random.Random(seed)
+    names = []
+    mets = [f"Met{chr(65 + i)}" for i in range(metabolites)]
+    for p in range(projects):
+        project = f"Project_{p + 1:03d}"
+        names.append(project)
+        project_dir = os.path.join(root, project)
+        if p:
+            _write(os.path.join(project_dir, "SWAN_log.txt"), swan_log(MITIGATIONS[(p - 1) % len(MITIGATIONS)]))
+        for f in range(sum_files):
+            scenario = TOXSWA_SCENARIOS[f % len(TOXSWA_SCENARIOS)]
+            version = 3 if f % 4 == 3 else 4
+            content = toxswa_sum(rng, "ParentX", mets, scenario, version, rng.randint(1, 3), daily_rows)
+            _write(os.path.join(project_dir, "toxswa", f"{project}_{f + 1:05d}.sum"), content)
+    return names
+
+
+def generate_pelmo(root, projects=2, crops=2, metabolites=1, filler_lines=200, seed=0):
+    """PELMO directory with a FOCUS folder; returns the FOCUS path"""
+    rng = random.Random(seed)
+    focus = os.path.join(root, "FOCUS")
+    mets = [f"Met{chr(65 + i)}" for i in range(metabolites)]
+    for p in range(projects):
+        project_dir = os.path.join(focus, f"Project_{p + 1:03d}.run")
+        for crop in PELMO_CROPS[:crops]:
+            crop_dir = os.path.join(project_dir, f"{crop}.run")
+            for scenario in PELMO_SCENARIOS:
+                path = os.path.join(crop_dir, f"{scenario}_-_{crop}.run", "period.plm")
+                _write(path, period_plm(rng, "ParentX", mets, filler_lines))
+    return focus
+
+
+def generate_pearl(root, runs=2, files=10, metabolites=1, filler_lines=200, seed=0):
+    """PEARL directory with one subdirectory per run; returns the root"""
+    rng = random.Random(seed)
+    mets = [f"Met{chr(65 + i)}" for i in range(metabolites)]
+    for r in range(runs):
+        for f in range(files):
+            location = PEARL_LOCATIONS[f % len(PEARL_LOCATIONS)]
+            path = os.path.join(root, f"Run_{r + 1:03d}", f"run{r + 1:03d}_{f + 1:05d}.sum")
+            _write(path, pearl_sum(rng, f"Scheme_{r + 1:03d}", location, "ParentX", mets, filler_lines))
+    return root
+
+
+def generate_corpus(root, size="small", seed=0, **overrides):
+    """Generate all three corpora; returns the paths and selections needed to extract them"""
+    params = dict(SIZES[size], **overrides)
+    toxswa_dir = os.path.join(root, "toxswa")
+    pearl_dir = os.path.join(root, "pearl")
+    projects = generate_toxswa(toxswa_dir, params["toxswa_projects"], params["sum_files"],
+                               params["metabolites"], params["daily_rows"], seed)
+    focus = generate_pelmo(os.path.join(root, "pelmo"), params["pelmo_projects"], params["crops"],
+                           params["metabolites"], params["daily_rows"], seed)
+    generate_pearl(pearl_dir, params["pearl_runs"], params["pearl_files"], params["metabolites"],
+                   params["daily_rows"], seed)
+    return {
+        "toxswa_main_dir": toxswa_dir,
+        "toxswa_projects": projects,
+        "pelmo_focus_path": focus,
+        "pelmo_projects": sorted(d for d in os.listdir(focus) if d.endswith(".run")),
+        "pearl_main_dir": pearl_dir,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic TOXSWA / PELMO / PEARL corpus")
+    parser.add_argument("output", help="Directory to write the corpus to")
+    parser.add_argument("--size", choices=sorted(SIZES), default="small")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--toxswa-projects", type=int)
+    parser.add_argument("--sum-files", type=int, help="TOXSWA .sum files per project")
+    parser.add_argument("--pelmo-projects", type=int)
+    parser.add_argument("--crops", type=int, help=f"PELMO crops per project (max {len(PELMO_CROPS)})")
+    parser.add_argument("--pearl-runs", type=int)
+    parser.add_argument("--pearl-files", type=int, help="PEARL .sum files per run")
+    parser.add_argument("--metabolites", type=int)
+    parser.add_argument("--daily-rows", type=int, help="Rows per time-series table (controls file size)")
+    args = parser.parse_args(argv)
+
+    overrides = {k: v for k, v in vars(args).items()
+                 if k not in ("output", "size", "seed") and v is not None}
+    info = generate_corpus(args.output, args.size, args.seed, **overrides)
+    for key, value in info.items():
+        print(f"{key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Cold-start import budget for the Flask app.
+
+Runs ``python -X importtime -c "import app"`` in fresh interpreters and fails
+(exit code 1) when the cumulative import time of ``app`` exceeds the budget,
+or when an export-only / per-tool module is imported eagerly again.
+
+    python -m benchmarks.startup_budget --budget-ms 400 --runs 5
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that must only be loaded on first request / first export
+DEFERRED_MODULES = [
+    "xlsxwriter",
+    "pelmoex.extractor",
+    "toxswaex.extractor",
+    "pearlex.extractor",
+    "core.results_index",
+    "core.watcher",
+    "core.profiling",
+    "core.artifacts",
+    "sqlite3",
+]
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def measure(module="app"):
+    """Return ({module: (self_us, cumulative_us)}, cumulative_us of module) for one cold import"""
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_ROOT, env=env, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr}")
+    timings = {}
+    for line in proc.stderr.splitlines():
+        m = IMPORTTIME_LINE.match(line)
+        if m:
+            timings[m.group(4)] = (int(m.group(1)), int(m.group(2)))
+    return timings, timings[module][1]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--budget-ms", type=float, default=float(os.environ.get("STARTUP_BUDGET_MS", 400)),
+                        help="Maximum cumulative import time of app (default 400 ms or $STARTUP_BUDGET_MS)")
+    parser.add_argument("--runs", type=int, default=5, help="Cold imports to run; the fastest one is compared")
+    parser.add_argument("--top", type=int, default=10, help="Slowest imports to list")
+    args = parser.parse_args(argv)
+
+    best_timings, best = None, None
+    for _ in range(args.runs):
+        timings, total = measure()
+        if best is None or total < best:
+            best_timings, best = timings, total
+
+    best_ms = best / 1000
+    print(f"Cold import of app: {best_ms:.1f} ms (best of {args.runs}, budget {args.budget_ms:.0f} ms)")
+    slowest = sorted(best_timings.items(), key=lambda item: item[1][0], reverse=True)[:args.top]
+    for name, (self_us, cumulative_us) in slowest:
+        print(f"  {self_us / 1000:8.1f} ms self {cumulative_us / 1000:8.1f} ms total  {name}")
+
+    failed = False
+    eager = [name for name in DEFERRED_MODULES if name in best_timings]
+    if eager:
+        print(f"FAIL: imported at startup but should be deferred: {', '.join(eager)}")
+        failed = True
+    if best_ms > args.budget_ms:
+        print(f"FAIL: cold import exceeds budget by {best_ms - args.budget_ms:.1f} ms")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1 @@
+# Shared core package (GUI-free and Flask-free helpers used by every tool)
@@ -0,0 +1,113 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import uuid
+
+_ARTIFACT_NAME = re.compile(r"^[0-9a-f]{32}\.[a-z]+$")
+
+
+class ArtifactStore:
+    """Content-addressed export files in a directory bounded by total size and age"""
+
+    def __init__(self, directory, max_bytes=1024 * 2 ** 20, max_age=24 * 3600):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(*parts):
+        """Stable name for an artifact built from (result ID, options, ...)"""
+        encoded = json.dumps(parts, sort_keys=True, default=str, separators=(",", ":"))
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()[:32]
+
+    def _path(self, key, suffix):
+        return os.path.join(self.directory, key + suffix)
+
+    def get(self, key, suffix):
+        """Path of a stored artifact, or None; a hit counts as a use for eviction"""
+        path = self._path(key, suffix)
+        try:
+            os.utime(path)
+        except OSError:
+            return None
+        return path
+
+    def path(self, name):
+        """Path of a stored artifact by file name, or None for unknown or unsafe names"""
+        if not _ARTIFACT_NAME.match(name):
+            return None
+        key, suffix = os.path.splitext(name)
+        return self.get(key, suffix)
+
+    def put(self, key, suffix, write):
+        """Create the artifact with write(path) unless it exists, and return its path
+
+        write() fills a temporary file that is renamed into place, so concurrent
+        readers never see a partial artifact.
+        """
+        path = self.get(key, suffix)
+        if path is not None:
+            return path
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(key, suffix)
+        tmp_path = os.path.join(self.directory, f".{key}.{uuid.uuid4().hex}.tmp{suffix}")
+        try:
+            write(tmp_path)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        self.evict(keep=path)
+        return path
+
+    def evict(self, keep=None):
+        """Remove expired artifacts, then the least recently used ones until under max_bytes"""
+        with self._lock:
+            now = time.time()
+            artifacts = []
+            try:
+                entries = list(os.scandir(self.directory))
+            except FileNotFoundError:
+                return
+            for entry in entries:
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                if not entry.is_file():
+                    continue
+                # Leftover temporary files of crashed writes only expire by age
+                if entry.name.startswith(".") and now - stat.st_mtime < self.max_age:
+                    continue
+                artifacts.append((stat.st_mtime, stat.st_size, entry.path))
+
+            artifacts.sort()
+            total = sum(size for _, size, _ in artifacts)
+            for mtime, size, path in artifacts:
+                if path == keep:
+                    continue
+                if now - mtime <= self.max_age and total <= self.max_bytes:
+                    continue
+                try:
+                    # Open downloads keep streaming on POSIX; on Windows the
+                    # file is busy and is retried on the next eviction
+                    os.remove(path)
+                    total -= size
+                except OSError:
+                    pass
+
+    def usage(self):
+        """(file count, total bytes) currently stored"""
+        count = total = 0
+        try:
+            for entry in os.scandir(self.directory):
+                if entry.is_file() and not entry.name.startswith("."):
+                    count += 1
+                    total += entry.stat().st_size
+        except FileNotFoundError:
+            pass
+        return count, total
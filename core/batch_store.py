@@ -0,0 +1,192 @@
+import functools
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import uuid
+import weakref
+
+
+class _Batch:
+    __slots__ = ("name", "rows", "path", "count", "digest")
+
+    def __init__(self, name, rows, digest):
+        self.name = name
+        self.rows = rows  # tuple of row tuples, or None once spilled to path
+        self.path = None
+        self.count = len(rows)
+        self.digest = digest
+
+
+class _SpilledRows:
+    """Row tuples of a spill file, opened on creation so the file can be removed while they are read"""
+
+    _file = None
+
+    def __init__(self, path):
+        self._file = open(path, "r", encoding="utf-8")
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        line = next(self._file, "") if not self._file.closed else ""
+        if not line:
+            self.close()
+            raise StopIteration
+        return tuple(json.loads(line))
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+
+    __del__ = close
+
+
+class BatchStore:
+    """Named snapshots of immutable result rows, spilled to disk beyond a memory budget
+
+    add() keeps references to the (tuple) rows instead of copying them, so a
+    batch costs one pointer per row and rows shared with the current result or
+    other batches are stored once. When the batches held in memory exceed
+    memory_rows, the oldest ones are written to JSON Lines files under
+    directory (a private temporary directory by default) and read back one
+    batch at a time when iterated. Spill files replaced or cleared while an
+    iteration is running are removed once the last iteration finishes.
+    """
+
+    def __init__(self, memory_rows=100000, directory=None):
+        self.memory_rows = memory_rows
+        self.directory = directory
+        self._spill_dir = None
+        self._cleanup = None
+        self._batches = []
+        self._lock = threading.Lock()
+        self._readers = 0
+        self._deferred = []
+
+    @staticmethod
+    def _digest(rows):
+        h = hashlib.sha256()
+        for row in rows:
+            h.update(json.dumps(row, default=str).encode("utf-8"))
+            h.update(b"\n")
+        return h.hexdigest()[:32]
+
+    def add(self, name, rows, replace=False):
+        """Snapshot rows (a sequence of tuples) as a new batch
+
+        With replace, a batch of the same name is swapped out in place (and its
+        spill file removed) instead of adding a second batch under that name.
+        """
+        snapshot = tuple(rows)
+        with self._lock:
+            # Adding the same result again shares the previous snapshot outright
+            last = self._batches[-1] if self._batches else None
+            if last is not None and last.rows is not None and len(last.rows) == len(snapshot) \
+                    and all(a is b for a, b in zip(last.rows, snapshot)):
+                batch = _Batch(name, last.rows, last.digest)
+            else:
+                batch = _Batch(name, snapshot, self._digest(snapshot))
+            for i, existing in enumerate(self._batches if replace else ()):
+                if existing.name == name:
+                    self._batches[i] = batch
+                    if existing.path is not None:
+                        self._discard(functools.partial(_remove, existing.path))
+                    break
+            else:
+                self._batches.append(batch)
+            self._spill()
+
+    def _spill(self):
+        """Write the oldest in-memory batches to disk until the rest fit memory_rows"""
+        in_memory = [batch for batch in self._batches if batch.rows is not None]
+        total = sum(batch.count for batch in in_memory)
+        for batch in in_memory:
+            if total <= self.memory_rows:
+                break
+            if self._spill_dir is None:
+                if self.directory:
+                    os.makedirs(self.directory, exist_ok=True)
+                self._spill_dir = tempfile.mkdtemp(prefix="batches-", dir=self.directory or None)
+                # Spill files go with the store, or at the latest at interpreter exit
+                self._cleanup = weakref.finalize(self, shutil.rmtree, self._spill_dir, True)
+            path = os.path.join(self._spill_dir, f"{uuid.uuid4().hex}.jsonl")
+            with open(path, "w", encoding="utf-8") as f:
+                for row in batch.rows:
+                    f.write(json.dumps(row, default=str))
+                    f.write("\n")
+            batch.path = path
+            batch.rows = None
+            total -= batch.count
+
+    def _discard(self, remove):
+        """Run remove now, or after the running iterations if there are any (hold the lock)"""
+        if self._readers:
+            self._deferred.append(remove)
+        else:
+            remove()
+
+    @staticmethod
+    def _read(path):
+        return _SpilledRows(path)
+
+    def __iter__(self):
+        """(name, rows) per batch in insertion order; spilled rows are read lazily"""
+        with self._lock:
+            batches = [(batch.name, batch.rows, batch.path) for batch in self._batches]
+            self._readers += 1
+        try:
+            for name, rows, path in batches:
+                yield name, (rows if rows is not None else self._read(path))
+        finally:
+            with self._lock:
+                self._readers -= 1
+                if not self._readers:
+                    deferred, self._deferred = self._deferred, []
+                    for remove in deferred:
+                        remove()
+
+    def __len__(self):
+        return len(self._batches)
+
+    def __bool__(self):
+        return bool(self._batches)
+
+    def names(self):
+        """Batch names in insertion order, without touching spilled rows"""
+        with self._lock:
+            return [batch.name for batch in self._batches]
+
+    def fingerprint(self):
+        """(name, row digest) per batch; changes whenever any batch does"""
+        with self._lock:
+            return [(batch.name, batch.digest) for batch in self._batches]
+
+    def stats(self):
+        """Batch, row and spilled row counts"""
+        with self._lock:
+            return {
+                "batches": len(self._batches),
+                "rows": sum(batch.count for batch in self._batches),
+                "spilled_rows": sum(batch.count for batch in self._batches if batch.rows is None),
+            }
+
+    def clear(self):
+        """Drop every batch and remove the spill files (after any running iteration)"""
+        with self._lock:
+            self._batches = []
+            if self._cleanup is not None:
+                self._discard(self._cleanup)
+                self._cleanup = None
+                self._spill_dir = None
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        # Still open elsewhere (Windows); the spill directory cleanup takes it
+        pass
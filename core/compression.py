@@ -0,0 +1,169 @@
+import zlib
+
+from werkzeug.http import parse_accept_header
+
+# Media types worth compressing; xlsx and parquet are compressed containers already
+COMPRESSIBLE_TYPES = {
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+}
+
+
+def _brotli():
+    """The brotli module, or None when it is not installed"""
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+
+class _Encoder:
+    """Incremental gzip or brotli encoder with a common compress/finish interface"""
+
+    def __init__(self, encoding, level):
+        self.encoding = encoding
+        if encoding == "br":
+            self._compressor = _brotli().Compressor(quality=level)
+            self.compress = self._compressor.process
+            self.finish = self._compressor.finish
+        else:
+            # wbits 16 + 15: gzip container
+            self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+            self.compress = self._compressor.compress
+            self.finish = self._compressor.flush
+
+
+class CompressionMiddleware:
+    """WSGI middleware that gzip/brotli-encodes text and JSON responses
+
+    The encoding is negotiated from Accept-Encoding (brotli preferred when the
+    brotli package is installed). Bodies are compressed chunk by chunk as the
+    application yields them, so streamed responses stay streamed; bodies
+    smaller than min_size are sent as they are.
+    """
+
+    def __init__(self, app, min_size=1024, level=6, brotli_quality=4):
+        self.app = app
+        self.min_size = min_size
+        self.level = level
+        self.brotli_quality = brotli_quality
+        self.brotli_available = _brotli() is not None
+
+    def choose_encoding(self, environ):
+        """'br', 'gzip' or None for the client's Accept-Encoding"""
+        if environ.get("REQUEST_METHOD") == "HEAD":
+            return None
+        accept = parse_accept_header(environ.get("HTTP_ACCEPT_ENCODING", ""))
+        if self.brotli_available and accept.quality("br") > 0:
+            return "br"
+        if accept.quality("gzip") > 0:
+            return "gzip"
+        return None
+
+    def compressible(self, status, headers):
+        """Whether a response with this status and these headers may be encoded"""
+        if not status.startswith("200"):
+            # 206 ranges address the identity bytes; 204/304 have no body
+            return False
+        content_type = ""
+        for name, value in headers:
+            lname = name.lower()
+            if lname == "content-encoding":
+                return False
+            if lname == "cache-control" and "no-transform" in value.lower():
+                return False
+            if lname == "content-length" and value.isdigit() and int(value) < self.min_size:
+                return False
+            if lname == "content-type":
+                content_type = value.split(";", 1)[0].strip().lower()
+        return content_type.startswith("text/") or content_type in COMPRESSIBLE_TYPES
+
+    def __call__(self, environ, start_response):
+        encoding = self.choose_encoding(environ)
+        if encoding is None:
+            return self.app(environ, start_response)
+
+        response = {}
+
+        def capture(status, headers, exc_info=None):
+            if exc_info is not None and response.get("started"):
+                raise exc_info[1].with_traceback(exc_info[2])
+            response["status"] = status
+            response["headers"] = headers
+            response["exc_info"] = exc_info
+            return response.setdefault("written", []).append
+
+        body = self.app(environ, capture)
+        return self._respond(body, response, encoding, start_response)
+
+    def _respond(self, body, response, encoding, start_response):
+        try:
+            chunks = iter(body)
+            # Buffer the first chunks until the threshold is reached or the body ends
+            pending = list(response.get("written", ()))
+            size = sum(len(c) for c in pending)
+            exhausted = False
+            if "status" in response and self.compressible(response["status"], response["headers"]):
+                while size < self.min_size:
+                    chunk = next(chunks, None)
+                    if chunk is None:
+                        exhausted = True
+                        break
+                    pending.append(chunk)
+                    size += len(chunk)
+            else:
+                exhausted = None
+
+            status, headers = response["status"], response["headers"]
+            if exhausted is None or (exhausted and size < self.min_size):
+                response["started"] = True
+                start_response(status, headers, response["exc_info"])
+                yield from pending
+                yield from chunks
+                return
+
+            encoder = _Encoder(encoding, self.brotli_quality if encoding == "br" else self.level)
+            start_response(status, self._encoded_headers(headers, encoding), response["exc_info"])
+            response["started"] = True
+            for chunk in pending:
+                data = encoder.compress(chunk)
+                if data:
+                    yield data
+            for chunk in chunks:
+                data = encoder.compress(chunk)
+                if data:
+                    yield data
+            yield encoder.finish()
+        finally:
+            close = getattr(body, "close", None)
+            if close is not None:
+                close()
+
+    @staticmethod
+    def _encoded_headers(headers, encoding):
+        """Response headers for the encoded body"""
+        encoded = []
+        vary = None
+        for name, value in headers:
+            lname = name.lower()
+            # The encoded length is unknown up front, and byte ranges refer to the identity body
+            if lname in ("content-length", "accept-ranges"):
+                continue
+            if lname == "etag" and not value.startswith("W/"):
+                # Same content in another encoding: only weakly equal to the identity ETag
+                value = "W/" + value
+            if lname == "vary":
+                vary = value
+                continue
+            encoded.append((name, value))
+        if vary is None:
+            vary = "Accept-Encoding"
+        elif "accept-encoding" not in vary.lower() and vary.strip() != "*":
+            vary += ", Accept-Encoding"
+        encoded.append(("Vary", vary))
+        encoded.append(("Content-Encoding", encoding))
+        return encoded
@@ -0,0 +1,85 @@
+import csv
+import importlib.util
+import json
+
+# format -> (file extension, mimetype); the writers below stream rows as they come
+TABLE_FORMATS = {
+    "csv": (".csv", "text/csv"),
+    "jsonl": (".jsonl", "application/x-ndjson"),
+    "json": (".json", "application/json"),
+    "parquet": (".parquet", "application/vnd.apache.parquet"),
+}
+TABULAR_FORMATS = tuple(TABLE_FORMATS)
+# format -> optional package it needs (see requirements-optional.txt)
+OPTIONAL_DEPENDENCIES = {"parquet": "pyarrow"}
+
+
+def missing_dependency(fmt):
+    """Error message if fmt needs an optional package that is not installed, else None"""
+    module = OPTIONAL_DEPENDENCIES.get(fmt)
+    if module is None or importlib.util.find_spec(module) is not None:
+        return None
+    return f"{fmt.capitalize()} output requires {module} (pip install -r requirements-optional.txt)"
+
+
+def write_table(path, fmt, header, rows):
+    """Write rows (sequences ordered like header) to a CSV, JSON Lines, JSON or Parquet file
+
+    rows may be any iterable; CSV, JSON Lines and JSON are written row by row
+    without materialising the table.
+    """
+    writer = _WRITERS.get(fmt)
+    if writer is None:
+        raise ValueError(f"Unsupported format: {fmt} (expected one of {', '.join(TABULAR_FORMATS)})")
+    writer(path, header, rows)
+
+
+def _write_csv(path, header, rows):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+
+def _write_jsonl(path, header, rows):
+    with open(path, "w", encoding="utf-8") as f:
+        for row in rows:
+            f.write(json.dumps(dict(zip(header, row)), ensure_ascii=False))
+            f.write("\n")
+
+
+def _write_json(path, header, rows):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("[")
+        for i, row in enumerate(rows):
+            f.write(",\n" if i else "\n")
+            f.write(json.dumps(dict(zip(header, row)), ensure_ascii=False))
+        f.write("\n]\n")
+
+
+def _write_parquet(path, header, rows):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Parquet output requires pyarrow (pip install -r requirements-optional.txt)")
+    # Columnar: a column's type depends on all of its values, so the rows are collected first
+    rows = list(rows)
+    columns = list(zip(*rows)) if rows else [() for _ in header]
+    table = pa.table({name: _parquet_column(col) for name, col in zip(header, columns)})
+    pq.write_table(table, path, compression="zstd")
+
+
+def _parquet_column(values):
+    """Keep purely numeric columns numeric; mixed columns (e.g. "<1E-06" markers) become text"""
+    if all(v is None or (isinstance(v, (int, float)) and not isinstance(v, bool)) for v in values):
+        return [None if v is None else float(v) for v in values]
+    return ["" if v is None else str(v) for v in values]
+
+
+_WRITERS = {
+    "csv": _write_csv,
+    "jsonl": _write_jsonl,
+    "json": _write_json,
+    "parquet": _write_parquet,
+}
@@ -0,0 +1,126 @@
+import contextlib
+import contextvars
+import threading
+import time
+
+# Upper bounds (seconds) of the stage duration histogram buckets
+STAGE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+COUNTER_HELP = {
+    "files_parsed": "Model output files parsed (cache misses)",
+    "bytes_read": "Bytes of model output read by the parsers",
+    "cache_hits": "Model output files served from the parse cache",
+    "rows_emitted": "Result rows returned to clients",
+    "export_bytes": "Bytes of exported workbooks and tables",
+    "export_cache_hits": "Exports served from the export artifact store",
+    "not_modified": "Table and scan responses answered with 304 Not Modified",
+}
+
+# Stage timings of the request being handled, None outside a request
+_request_timings = contextvars.ContextVar("request_timings", default=None)
+
+
+class Metrics:
+    """Per-tool counters and per-stage duration histograms in Prometheus text format"""
+
+    def __init__(self, namespace="modelling_tools", buckets=STAGE_BUCKETS):
+        self.namespace = namespace
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+
+    def inc(self, name, tool, amount=1):
+        """Add amount to the named counter for a tool"""
+        key = (name, tool)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, stage, tool, seconds):
+        """Record one stage duration, also adding it to the current request's Server-Timing"""
+        key = (stage, tool)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [[0] * len(self.buckets), 0, 0.0]
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    histogram[0][i] += 1
+                    break
+            histogram[1] += 1
+            histogram[2] += seconds
+
+        timings = _request_timings.get()
+        if timings is not None:
+            entry = timings.setdefault(stage, [0, 0.0])
+            entry[0] += 1
+            entry[1] += seconds
+
+    @contextlib.contextmanager
+    def stage(self, stage, tool):
+        """Time the enclosed block as one stage of a tool's scan/extract/export path"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, tool, time.perf_counter() - start)
+
+    def begin_request(self):
+        """Start collecting stage timings for the request handled in this context"""
+        _request_timings.set({})
+
+    def end_request(self):
+        """Stop collecting and return {stage: (count, seconds)} for the finished request"""
+        timings = _request_timings.get() or {}
+        _request_timings.set(None)
+        return {stage: tuple(entry) for stage, entry in timings.items()}
+
+    def render(self):
+        """Render all metrics in the Prometheus text exposition format"""
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted((key, ([*h[0]], h[1], h[2])) for key, h in self._histograms.items())
+
+        lines = []
+        seen = set()
+        for (name, tool), value in counters:
+            metric = f"{self.namespace}_{name}_total"
+            if metric not in seen:
+                seen.add(metric)
+                lines.append(f"# HELP {metric} {COUNTER_HELP.get(name, name)}")
+                lines.append(f"# TYPE {metric} counter")
+            lines.append(f'{metric}{{tool="{tool}"}} {value}')
+
+        metric = f"{self.namespace}_stage_duration_seconds"
+        if histograms:
+            lines.append(f"# HELP {metric} Time spent per stage of the scan/extract/export paths")
+            lines.append(f"# TYPE {metric} histogram")
+        for (stage, tool), (counts, count, total) in histograms:
+            labels = f'stage="{stage}",tool="{tool}"'
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f'{metric}_bucket{{{labels},le="{bound:g}"}} {cumulative}')
+            lines.append(f'{metric}_bucket{{{labels},le="+Inf"}} {count}')
+            lines.append(f"{metric}_sum{{{labels}}} {total:.6f}")
+            lines.append(f"{metric}_count{{{labels}}} {count}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        """Drop all recorded values"""
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+
+def server_timing(timings, total=None):
+    """Format {stage: (count, seconds)} as a Server-Timing header value"""
+    parts = [f'{stage};dur={seconds * 1000:.1f};desc="{count}x"'
+             for stage, (count, seconds) in timings.items()]
+    if total is not None:
+        parts.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(parts)
+
+
+# Process-wide registry shared by the extractors, the parse cache and the web app
+metrics = Metrics()
@@ -0,0 +1,90 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from core.metrics import metrics
+
+_MISSING = object()
+
+
+class ParseCache:
+    """Parsed model output keyed by file path and (size, mtime) fingerprint"""
+
+    def __init__(self, max_entries=50000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def fingerprint(stat_result):
+        """Build the change-detection fingerprint for a stat result"""
+        return (stat_result.st_size, stat_result.st_mtime_ns)
+
+    def get(self, kind, path, fingerprint, default=None):
+        """Return the cached value if the file is unchanged since it was parsed"""
+        key = (kind, os.path.abspath(path))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != fingerprint:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, kind, path, fingerprint, value):
+        """Store a parsed value, evicting the least recently used entries"""
+        key = (kind, os.path.abspath(path))
+        with self._lock:
+            self._entries[key] = (fingerprint, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_parse(self, kind, path, parse, stat_result=None):
+        """Return (value, reused); parse(path) is only called for new or modified files"""
+        if stat_result is None:
+            stat_result = os.stat(path)
+        fingerprint = self.fingerprint(stat_result)
+        value = self.get(kind, path, fingerprint, _MISSING)
+        if value is not _MISSING:
+            metrics.inc("cache_hits", kind)
+            return value, True
+        with metrics.stage("parse", kind):
+            value = parse(path)
+        metrics.inc("files_parsed", kind)
+        metrics.inc("bytes_read", kind, stat_result.st_size)
+        self.put(kind, path, fingerprint, value)
+        return value, False
+
+    def clear(self):
+        """Drop all cached entries"""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def source_fingerprint(paths, *options):
+    """Digest of the current (size, mtime) of each source file plus options
+
+    Changes as soon as any source file is modified, added or removed, so it
+    can key derived artifacts such as exports.
+    """
+    digest = hashlib.sha256(json.dumps(options, sort_keys=True, default=str).encode("utf-8"))
+    for path in paths:
+        try:
+            fingerprint = ParseCache.fingerprint(os.stat(path))
+        except OSError:
+            fingerprint = None
+        digest.update(f"\0{path}\0{fingerprint}".encode("utf-8"))
+    return digest.hexdigest()[:32]
+
+
+# Process-wide cache shared by the extractors
+parse_cache = ParseCache()
@@ -0,0 +1,117 @@
+# PEARL .sum parsing shared by the web app, the PyQt tool and the CLI.
+# No Flask, PyQt or xlsxwriter imports here.
+import os
+from typing import NamedTuple
+
+from core.metrics import metrics
+
+# Positions in the result rows returned by parse_sum_file
+PROJECT, FILENAME, SCENARIO, COMPOUND, VALUE, TYPE = range(6)
+
+_RESULT_PREFIX = b"Result_"
+_ENCODING = "ISO-8859-1"
+
+
+class PearlResult(NamedTuple):
+    """One Result_<substance> line"""
+    substance: str
+    value: float          # first number on the line (the 80th percentile, µg/L)
+    values: tuple         # every number on the line
+    is_parent: bool
+
+
+class PearlSummary(NamedTuple):
+    """Everything read_summary takes from a .sum file"""
+    path: str
+    fields: dict          # "Key value" / "Key : value" lines before the results, first occurrence wins
+    application_scheme: str
+    location: str
+    parent: str           # None without result lines
+    metabolites: tuple
+    results: tuple        # PearlResult per result line, in file order
+
+    def rows(self):
+        """(project, filename, scenario, compound, value, type) rows as returned by parse_sum_file"""
+        project = self.application_scheme or "Unknown"
+        scenario = (self.location or "Unknown").capitalize()
+        filename = os.path.basename(self.path)
+        return [
+            (project, filename, scenario, r.substance, r.value, "Parent" if r.is_parent else "Metabolite")
+            for r in self.results
+        ]
+
+
+def _numbers(tokens):
+    values = []
+    for token in tokens:
+        try:
+            values.append(float(token))
+        except ValueError:
+            break
+    return tuple(values)
+
+
+def read_summary(file_path):
+    """Read a PEARL .sum file in one pass over its lines into a PearlSummary
+
+    Lines are split as bytes and only the tokens that are kept are decoded.
+    Lines starting with "*" are comments and skipped. Reading stops at the
+    first line after the block of Result_ lines. The parent is the substance
+    named by a Substance field when it has a result line, otherwise the first
+    result line; the other results are metabolites.
+    """
+    fields = {}
+    found = []
+    with metrics.stage("read", "pearl"), open(file_path, "rb") as f:
+        for line in f:
+            if line.startswith(b"*"):
+                if found:
+                    break  # comments after the result block
+                continue
+            parts = line.split(None, 1)
+            if parts and parts[0].startswith(_RESULT_PREFIX):
+                values = _numbers(parts[1].split()) if len(parts) > 1 else ()
+                if values:
+                    found.append((parts[0][len(_RESULT_PREFIX):].decode(_ENCODING), values))
+                continue
+            if found:
+                break  # the result block is done
+            if not parts:
+                continue
+            # "Key value", "Key : value" or "Key: value"
+            key, _, value = parts[0].partition(b":")
+            if len(parts) > 1:
+                value += b" " + parts[1]
+            key = key.decode(_ENCODING)
+            if key not in fields:
+                fields[key] = value.strip().lstrip(b":").strip().decode(_ENCODING)
+
+    substances = [substance for substance, _ in found]
+    parent = fields.get("Substance")
+    if parent not in substances:
+        parent = substances[0] if substances else None
+    # Only one result line is the parent, even if the substance is listed twice
+    parent_index = substances.index(parent) if parent is not None else -1
+    results = tuple(
+        PearlResult(substance, values[0], values, i == parent_index)
+        for i, (substance, values) in enumerate(found)
+    )
+    scheme = fields.get("Application_scheme", "").split()
+    return PearlSummary(
+        path=file_path,
+        fields=fields,
+        application_scheme=scheme[0] if scheme else "",
+        location=fields.get("Location", ""),
+        parent=parent,
+        metabolites=tuple(r.substance for r in results if not r.is_parent),
+        results=results,
+    )
+
+
+def parse_sum_file(file_path):
+    """Parse one PEARL .sum file into (project, filename, scenario, compound, value, type) rows
+
+    See read_summary for the parent/metabolite rule. Rows are tuples so
+    extractions and batches can share them without copying.
+    """
+    return read_summary(file_path).rows()
@@ -0,0 +1,92 @@
+# PELMO period.plm parsing shared by the web app, the standalone Flask app,
+# the PyQt tool and the CLI. No Flask, PyQt or xlsxwriter imports here.
+import os
+import re
+
+# Leading columns of every result row; the substance columns ("<name> µg/l") follow
+FIXED_COLUMNS = ["Project", "Crop", "Scenario"]
+
+_ACTIVE = re.compile(r"Results for ACTIVE SUBSTANCE \((.*?)\)")
+_METABOLITE = re.compile(r"Results for METABOLITE.*?\((.*?)\)")
+
+
+def parse_period_plm(file_path):
+    """(active substance, its 80th percentile PEC, [(metabolite, PEC), ...]) of a period.plm file
+
+    Values are kept as the strings found in the file. The active substance PEC
+    is the last "80 Perc." line before the first metabolite block.
+    """
+    active_substance = None
+    active_pec_value = None
+    metabolites = []
+    metabolite = None
+    in_metabolites = False
+
+    with open(file_path, "r", encoding="ISO-8859-1") as file:
+        for line in file:
+            if "percolate at 1 m soil depth" in line:
+                if "Results for ACTIVE SUBSTANCE" in line:
+                    match = _ACTIVE.search(line)
+                    if match:
+                        active_substance = match.group(1)
+                if "Results for METABOLITE" in line:
+                    match = _METABOLITE.search(line)
+                    if match:
+                        metabolite = match.group(1)
+                        in_metabolites = True
+            if "80 Perc." in line:
+                if active_substance and not in_metabolites:
+                    active_pec_value = line.split()[-1]
+                if metabolite:
+                    metabolites.append((metabolite, line.split()[-1]))
+                    metabolite = None
+
+    return active_substance, active_pec_value, metabolites
+
+
+def scenario_from_path(file_path):
+    """Scenario of a .../<crop>.run/<Scenario>_-_<...>.run/period.plm path"""
+    folder_name = os.path.basename(os.path.dirname(file_path))
+    return folder_name.split("_-_")[0] if "_-_" in folder_name else folder_name
+
+
+def crop_from_path(file_path):
+    """Crop of a .../<crop>.run/<scenario>.run/period.plm path, None for shorter paths"""
+    folder_parts = os.path.normpath(file_path).split(os.sep)
+    if len(folder_parts) >= 3:
+        third_last_folder = folder_parts[-3]
+        crop = third_last_folder.split(".run")[0] if ".run" in third_last_folder else third_last_folder
+        return crop.replace("_-_", " ")
+    return None
+
+
+def convert_to_numeric(value):
+    try:
+        return float(value)
+    except ValueError:
+        return value
+
+
+def result_row(project, period_plm_path, parsed):
+    """Result row {Project, Crop, Scenario, "<substance> µg/l": PEC, ...} of one parsed
+    period.plm, or None when it has no active substance result"""
+    active_substance, active_pec_value, metabolites = parsed
+    if not active_substance or not active_pec_value:
+        return None
+    row = {
+        "Project": project,
+        "Crop": crop_from_path(period_plm_path),
+        "Scenario": scenario_from_path(period_plm_path),
+        f"{active_substance} µg/l": convert_to_numeric(active_pec_value),
+    }
+    for met, pec in metabolites:
+        row[f"{met} µg/l"] = convert_to_numeric(pec)
+    return row
+
+
+def result_header(rows):
+    """Fixed columns followed by the sorted substance columns of all rows"""
+    extra_keys = set()
+    for row in rows:
+        extra_keys.update(row)
+    return FIXED_COLUMNS + sorted(extra_keys - set(FIXED_COLUMNS))
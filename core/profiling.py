@@ -0,0 +1,130 @@
+import collections
+import contextlib
+import cProfile
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+
+# mode -> file extension of the stored profile
+PROFILE_MODES = {
+    "cprofile": ".prof",       # pstats / snakeviz
+    "sample": ".collapsed",    # flamegraph.pl / speedscope collapsed stacks
+}
+
+_SAFE_NAME = re.compile(r"^[A-Za-z0-9_.-]+$")
+
+
+class StackSampler:
+    """Low-overhead sampler that records the collapsed call stacks of one thread"""
+
+    def __init__(self, thread_id=None, interval=0.005):
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self.interval = interval
+        self.stacks = collections.Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}:{code.co_firstlineno}")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread = threading.Thread(target=self._sample, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def write(self, path):
+        """Write one 'frame;frame;frame count' line per distinct stack"""
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class ProfileStore:
+    """Rolling directory of profiles, bounded by file count and total size"""
+
+    def __init__(self, directory, max_files=20, max_bytes=200 * 2 ** 20):
+        self.directory = directory
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def profile(self, label, mode="cprofile"):
+        """Profile the enclosed block and store it; yields a dict that receives the file 'name'"""
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode: {mode} (expected one of {', '.join(PROFILE_MODES)})")
+        label = re.sub(r"[^A-Za-z0-9_-]+", "_", label)
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{label}-{uuid.uuid4().hex[:8]}{PROFILE_MODES[mode]}"
+        record = {"name": name, "mode": mode}
+
+        if mode == "cprofile":
+            profiler = cProfile.Profile()
+            profiler.enable()
+        else:
+            profiler = StackSampler()
+            profiler.start()
+        started = time.perf_counter()
+        try:
+            yield record
+        finally:
+            if mode == "cprofile":
+                profiler.disable()
+            else:
+                profiler.stop()
+            record["seconds"] = round(time.perf_counter() - started, 6)
+            os.makedirs(self.directory, exist_ok=True)
+            path = os.path.join(self.directory, name)
+            if mode == "cprofile":
+                profiler.dump_stats(path)
+            else:
+                profiler.write(path)
+            self._evict()
+
+    def _evict(self):
+        """Drop the oldest profiles until the directory is within its limits"""
+        with self._lock:
+            profiles = self.list()
+            total = sum(p["size"] for p in profiles)
+            while profiles and (len(profiles) > self.max_files or total > self.max_bytes):
+                oldest = profiles.pop()
+                total -= oldest["size"]
+                try:
+                    os.remove(os.path.join(self.directory, oldest["name"]))
+                except OSError:
+                    pass
+
+    def list(self):
+        """Stored profiles, newest first"""
+        profiles = []
+        try:
+            entries = list(os.scandir(self.directory))
+        except FileNotFoundError:
+            return profiles
+        for entry in entries:
+            if entry.is_file() and entry.name.endswith(tuple(PROFILE_MODES.values())):
+                stat = entry.stat()
+                profiles.append({"name": entry.name, "size": stat.st_size, "mtime": stat.st_mtime})
+        profiles.sort(key=lambda p: (p["mtime"], p["name"]), reverse=True)
+        return profiles
+
+    def path(self, name):
+        """Absolute path of a stored profile, or None for unknown or unsafe names"""
+        if not _SAFE_NAME.match(name) or not name.endswith(tuple(PROFILE_MODES.values())):
+            return None
+        path = os.path.join(self.directory, name)
+        return path if os.path.isfile(path) else None
@@ -0,0 +1,322 @@
+import atexit
+import contextlib
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS project (
+    id INTEGER PRIMARY KEY,
+    model TEXT NOT NULL,
+    root TEXT NOT NULL,
+    name TEXT NOT NULL,
+    indexed_at REAL NOT NULL,
+    UNIQUE (model, root, name)
+);
+CREATE TABLE IF NOT EXISTS file (
+    id INTEGER PRIMARY KEY,
+    project_id INTEGER NOT NULL REFERENCES project(id) ON DELETE CASCADE,
+    path TEXT NOT NULL,
+    UNIQUE (project_id, path)
+);
+CREATE TABLE IF NOT EXISTS scenario (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    detail TEXT NOT NULL DEFAULT '',
+    UNIQUE (name, detail)
+);
+CREATE TABLE IF NOT EXISTS compound (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE COLLATE NOCASE
+);
+CREATE TABLE IF NOT EXISTS metric (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE COLLATE NOCASE,
+    unit TEXT NOT NULL DEFAULT ''
+);
+CREATE TABLE IF NOT EXISTS value (
+    file_id INTEGER NOT NULL REFERENCES file(id) ON DELETE CASCADE,
+    scenario_id INTEGER NOT NULL REFERENCES scenario(id),
+    compound_id INTEGER NOT NULL REFERENCES compound(id),
+    metric_id INTEGER NOT NULL REFERENCES metric(id),
+    compound_type TEXT NOT NULL DEFAULT '',
+    value REAL,
+    text TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS idx_value_metric_compound ON value (metric_id, compound_id, scenario_id);
+CREATE INDEX IF NOT EXISTS idx_value_metric_scenario ON value (metric_id, scenario_id);
+CREATE INDEX IF NOT EXISTS idx_value_file ON value (file_id);
+CREATE INDEX IF NOT EXISTS idx_file_project ON file (project_id);
+CREATE INDEX IF NOT EXISTS idx_project_name ON project (name);
+"""
+
+TOXSWA_METRICS = [
+    ("Max PECsw", "µg/L"),
+    ("Max PECsed", "µg/L"),
+    ("Areic mean deposition", "mg/m²"),
+]
+LEACHING_METRIC = ("80th Percentile", "µg/L")
+
+GROUP_COLUMNS = {
+    "scenario": ("s.id", "s.name AS scenario, s.detail AS detail"),
+    "project": ("p.id", "p.name AS project, p.model AS model"),
+    "compound": ("c.id", "c.name AS compound"),
+    "file": ("f.id", "f.path AS file, p.name AS project"),
+}
+AGGREGATES = {"max": "MAX", "min": "MIN", "avg": "AVG", "count": "COUNT"}
+
+logger = logging.getLogger(__name__)
+
+
+def numeric_value(value):
+    """Convert display values such as "<1E-06" or "N/A" to a float or None"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = str(value).strip().lstrip("<").strip()
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+
+class ResultsIndex:
+    """Embedded SQLite index of extracted results for cross-project queries
+
+    Files whose records are unchanged since this instance last indexed them
+    are skipped. With background, the index_* methods only queue the changed
+    records and a writer thread applies them; queries wait for queued writes.
+    """
+
+    def __init__(self, db_path, background=False):
+        self.db_path = db_path
+        self._write_lock = threading.Lock()
+        # (model, root, project, file path) -> hash of the records last indexed for it
+        self._indexed = {}
+        self._indexed_lock = threading.Lock()
+        directory = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+        self._queue = None
+        if background:
+            self._queue = queue.Queue()
+            threading.Thread(target=self._write_loop, name="results-index-writer", daemon=True).start()
+            atexit.register(self.flush)
+
+    @contextlib.contextmanager
+    def _connect(self):
+        """Connection for one transaction (committed unless an error escapes), then closed"""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            conn.execute("PRAGMA foreign_keys=ON")
+            conn.row_factory = sqlite3.Row
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _lookup_id(self, conn, cache, table, columns, values):
+        key = (table,) + tuple(values)
+        if key in cache:
+            return cache[key]
+        where = " AND ".join(f"{c} = ?" for c in columns)
+        row = conn.execute(f"SELECT id FROM {table} WHERE {where}", values).fetchone()
+        if row is None:
+            cols = ", ".join(columns)
+            marks = ", ".join("?" for _ in columns)
+            row_id = conn.execute(f"INSERT INTO {table} ({cols}) VALUES ({marks})", values).lastrowid
+        else:
+            row_id = row[0]
+        cache[key] = row_id
+        return row_id
+
+    def _replace_files(self, model, root, records):
+        """Replace the indexed values of each file in records
+
+        records is an iterable of (project, file_path, scenario, detail,
+        compound, compound_type, metric, unit, value, text), value being the
+        unrounded number (or None) and text the value as displayed. Files of a
+        project that are not in records keep their values, so indexing part
+        of a project does not drop the rest.
+        """
+        root = os.path.abspath(root) if root else ""
+        by_project = {}
+        for record in records:
+            by_project.setdefault(record[0], []).append(record)
+        with self._write_lock, self._connect() as conn:
+            ids = {}
+            now = time.time()
+            for project, project_records in by_project.items():
+                row = conn.execute(
+                    "SELECT id FROM project WHERE model = ? AND root = ? AND name = ?", (model, root, project)
+                ).fetchone()
+                if row is None:
+                    project_id = conn.execute(
+                        "INSERT INTO project (model, root, name, indexed_at) VALUES (?, ?, ?, ?)",
+                        (model, root, project, now),
+                    ).lastrowid
+                else:
+                    project_id = row[0]
+                    conn.execute("UPDATE project SET indexed_at = ? WHERE id = ?", (now, project_id))
+                # Values go with their file row (ON DELETE CASCADE)
+                conn.executemany(
+                    "DELETE FROM file WHERE project_id = ? AND path = ?",
+                    [(project_id, path) for path in dict.fromkeys(r[1] for r in project_records)],
+                )
+                values = []
+                for _, file_path, scenario, detail, compound, ctype, metric, unit, value, text in project_records:
+                    file_id = self._lookup_id(conn, ids, "file", ("project_id", "path"), (project_id, file_path))
+                    scenario_id = self._lookup_id(conn, ids, "scenario", ("name", "detail"), (scenario or "", detail or ""))
+                    compound_id = self._lookup_id(conn, ids, "compound", ("name",), (compound,))
+                    metric_id = self._lookup_id(conn, ids, "metric", ("name",), (metric,))
+                    values.append((file_id, scenario_id, compound_id, metric_id, ctype or "", value, text))
+                conn.executemany(
+                    "INSERT INTO value (file_id, scenario_id, compound_id, metric_id, compound_type, value, text) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    values,
+                )
+            self._set_units(conn, TOXSWA_METRICS + [LEACHING_METRIC])
+        return sum(len(r) for r in by_project.values())
+
+    def _submit(self, model, root, records):
+        """Index the records of files that changed since they were last indexed; returns their count"""
+        root = os.path.abspath(root) if root else ""
+        by_file = {}
+        for record in records:
+            by_file.setdefault((model, root, record[0], record[1]), []).append(record)
+        changed = []
+        with self._indexed_lock:
+            for key, file_records in by_file.items():
+                digest = hash(tuple(file_records))
+                if self._indexed.get(key) != digest:
+                    self._indexed[key] = digest
+                    changed.append(key)
+        if not changed:
+            return 0
+        records = [record for key in changed for record in by_file[key]]
+        if self._queue is None:
+            self._write(model, root, records, changed)
+        else:
+            self._queue.put((model, root, records, changed))
+        return len(records)
+
+    def _write(self, model, root, records, keys):
+        try:
+            self._replace_files(model, root, records)
+        except Exception:
+            # Not indexed after all; the next extraction of these files retries
+            with self._indexed_lock:
+                for key in keys:
+                    self._indexed.pop(key, None)
+            raise
+
+    def _write_loop(self):
+        while True:
+            job = self._queue.get()
+            try:
+                self._write(*job)
+            except Exception as e:
+                logger.warning("Error indexing results: %s", e)
+            finally:
+                self._queue.task_done()
+
+    def flush(self):
+        """Wait until the queued background writes are in the database"""
+        if self._queue is not None:
+            self._queue.join()
+
+    def _set_units(self, conn, metrics):
+        for name, unit in metrics:
+            conn.execute("UPDATE metric SET unit = ? WHERE name = ? AND unit = ''", (unit, name))
+
+    def index_toxswa(self, main_dir, all_data):
+        """Index TOXSWAExtractor.all_data ({project: [row, ...]})"""
+        records = []
+        for project, rows in all_data.items():
+            for row in rows:
+                # Unrounded numbers where the parser provides them, not the display text
+                raw = row.get("RawValues", {})
+                for metric, unit in TOXSWA_METRICS:
+                    if metric in row:
+                        value = raw[metric] if metric in raw else numeric_value(row[metric])
+                        records.append((
+                            project, row["FilePath"], row["Scenario"], row["Waterbody"],
+                            row["Compound"], row["Type"], metric, unit, value, str(row[metric]),
+                        ))
+        return self._submit("toxswa", main_dir, records)
+
+    def index_pelmo(self, focus_path, rows, row_files, active_columns=()):
+        """Index PELMOExtractor.all_rows; compound columns are named "<compound> µg/l" """
+        metric, unit = LEACHING_METRIC
+        records = []
+        for row, file_path in zip(rows, row_files):
+            for key, value in row.items():
+                if not key.endswith(" µg/l") or value == "":
+                    continue
+                ctype = "Parent" if key in active_columns else "Metabolite"
+                records.append((
+                    row["Project"], file_path, row["Scenario"], row["Crop"] or "",
+                    key[:-len(" µg/l")], ctype, metric, unit, numeric_value(value), str(value),
+                ))
+        return self._submit("pelmo", focus_path, records)
+
+    def index_pearl(self, main_dir, all_data, file_paths=()):
+        """Index PearlGroundwaterExtractor.all_data rows"""
+        metric, unit = LEACHING_METRIC
+        paths = {os.path.basename(p): p for p in file_paths}
+        records = [
+            (project, paths.get(filename, filename), scenario, "", compound, ctype, metric, unit,
+             numeric_value(value), str(value))
+            for project, filename, scenario, compound, value, ctype in all_data
+        ]
+        return self._submit("pearl", main_dir, records)
+
+    def query(self, metric, compound=None, scenario=None, project=None, model=None,
+              compound_type=None, agg="max", group_by="scenario"):
+        """Aggregate one metric across all indexed projects
+
+        For max/min the project and file holding the extreme value are
+        returned alongside the aggregate.
+        """
+        if agg not in AGGREGATES:
+            raise ValueError(f"Unsupported aggregate: {agg}")
+        if group_by not in GROUP_COLUMNS:
+            raise ValueError(f"Unsupported grouping: {group_by}")
+        group_key, group_select = GROUP_COLUMNS[group_by]
+        where = ["m.name = ?", "v.value IS NOT NULL"]
+        params = [metric]
+        for column, value in (("c.name", compound), ("s.name", scenario), ("p.name", project),
+                              ("p.model", model), ("v.compound_type", compound_type)):
+            if value:
+                where.append(f"{column} = ?")
+                params.append(value)
+        extra = ", p.name AS source_project, f.path AS source_file" if agg in ("max", "min") else ""
+        self.flush()
+        sql = (
+            f"SELECT {group_select}, {AGGREGATES[agg]}(v.value) AS value, COUNT(*) AS n{extra} "
+            "FROM value v "
+            "JOIN metric m ON m.id = v.metric_id "
+            "JOIN compound c ON c.id = v.compound_id "
+            "JOIN scenario s ON s.id = v.scenario_id "
+            "JOIN file f ON f.id = v.file_id "
+            "JOIN project p ON p.id = f.project_id "
+            f"WHERE {' AND '.join(where)} "
+            f"GROUP BY {group_key} ORDER BY 1"
+        )
+        with self._connect() as conn:
+            return [dict(row) for row in conn.execute(sql, params)]
+
+    def summary(self):
+        """Counts of indexed projects, files and values"""
+        self.flush()
+        with self._connect() as conn:
+            return {
+                "projects": conn.execute("SELECT COUNT(*) FROM project").fetchone()[0],
+                "files": conn.execute("SELECT COUNT(*) FROM file").fetchone()[0],
+                "values": conn.execute("SELECT COUNT(*) FROM value").fetchone()[0],
+                "metrics": [r[0] for r in conn.execute("SELECT name FROM metric ORDER BY name")],
+            }
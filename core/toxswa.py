@@ -0,0 +1,377 @@
+# TOXSWA .sum / SWAN_log.txt parsing shared by the web app, the standalone Flask app,
+# the PyQt tool and the CLI. No Flask, PyQt or xlsxwriter imports here.
+import os
+import re
+
+from core.metrics import metrics
+
+# parse_sum_file returns one dict per compound (parent first) with these keys;
+# "Areic mean deposition" is only set on the parent row. The PEC columns hold
+# display text; RawValues maps the same column names to the unrounded floats.
+# WaterValues / SedimentValues are the export workbook cells of the compound:
+# (max, date of max, *daily PECs, *TWAECs), see sheet_values.
+ROW_KEYS = ("Filename", "Scenario", "Waterbody", "Compound", "Max PECsw", "Max PECsed",
+            "Areic mean deposition", "Route", "Type", "ApplicationDates", "FilePath", "RawValues",
+            "WaterValues", "SedimentValues")
+
+# Labels of the daily PEC and TWAEC lines in a .sum file, in workbook column order
+SW_DAILY_LABELS = (
+    "PECsw_1_day",
+    "PECsw_2 days",  # sic, kept as the export has always searched it
+    "PECsw_3_days",
+    "PECsw_4_days",
+    "PECsw_7_days",
+    "PECsw_14_days",
+    "PECsw_21_days",
+    "PECsw_28_days",
+    "PECsw_42_days",
+    "PECsw_50_days",
+    "PECsw_100_days",
+)
+TWAEC_SW_LABELS = (
+    "TWAECsw_1_day",
+    "TWAECsw_2_days",
+    "TWAECsw_3_days",
+    "TWAECsw_4_days",
+    "TWAECsw_7_days",
+    "TWAECsw_14_days",
+    "TWAECsw_21_days",
+    "TWAECsw_28_days",
+    "TWAECsw_42_days",
+    "TWAECsw_50_days",
+    "TWAECsw_100_days",
+)
+SED_DAILY_LABELS = (
+    "PECsed_1_day",
+    "PECsed_2_days",
+    "PECsed_3_days",
+    "PECsed_4_days",
+    "PECsed_7_days",
+    "PECsed_14_days",
+    "PECsed_21_days",
+    "PECsed_28_days",
+    "PECsed_42_days",
+    "PECsed_50_days",
+    "PECsed_100_days",
+)
+TWAEC_SED_LABELS = (
+    "TWAECsed_1_day",
+    "TWAECsed_2_days",
+    "TWAECsed_3_days",
+    "TWAECsed_4_days",
+    "TWAECsed_7_days",
+    "TWAECsed_14_days",
+    "TWAECsed_21_days",
+    "TWAECsed_28_days",
+    "TWAECsed_42_days",
+    "TWAECsed_50_days",
+    "TWAECsed_100_days",
+)
+
+_SCENARIO = re.compile(r"\* Scenario\s*:\s*([^\r\n]+)")
+_WATER_BODY = re.compile(r"\* Water Body Type\s*:\s*(\S+)")
+_APPLICATIONS = re.compile(r"Appl\.No\s+Date/Hour.*?\n(.*?)\n\n", re.DOTALL)
+_DATE_HOUR = re.compile(r"\d{2}-[A-Za-z]{3}-\d{4}-\d{2}h\d{2}")
+_MAX_DATE = re.compile(r"Global max.*?(\d{2}-[A-Za-z]{3}-\d{4}-\d{2}h\d{2})", re.IGNORECASE | re.DOTALL)
+_PARENT = re.compile(r"\* Substance\s*:\s*(\S+)", re.DOTALL)
+_PARENT_MAX_SW = re.compile(r"Global max.*?([\d.]+)")
+_PARENT_MAX_SED = re.compile(
+    r"PEC in sediment of substance:\s*\S+.*?Global max\s+([<]?\s*\d+(?:\.\d+)?(?:e[+-]?\d+)?)", re.DOTALL
+)
+_SUBSTANCES = re.compile(r"\* Substance\s+\d+:\s+(\S+)")
+_SOIL_METABOLITE = re.compile(r"\* Soil metabolite:\s*(\S+)", re.DOTALL)
+_AREIC = re.compile(r"Areic mean deposition\s*\(mg\.m-2\).*?\n\s*\d+\s+[^\n]*\s+([\d\.Ee-]+)", re.IGNORECASE)
+_DATE = re.compile(r"(\d{2}-[A-Za-z]{3}-\d{4})")
+
+
+def parse_value(value_str):
+    """Parse a PEC string: a float, "<1E-06" for values below the detection limit, or None"""
+    if not value_str:
+        return None
+    value_str = value_str.strip()
+    if value_str.startswith("<"):
+        return "<1E-06"
+    try:
+        numeric_val = float(value_str)
+        if numeric_val < 1E-6:
+            return "<1E-06"
+        return numeric_val
+    except ValueError:
+        return None
+
+
+def raw_value(value_str):
+    """Unrounded float of a PEC or deposition string ("<" markers stripped), or None"""
+    try:
+        return float(str(value_str).strip().lstrip("<").strip())
+    except (TypeError, ValueError):
+        return None
+
+
+def format_for_display(val, compound_type="Parent"):
+    """Format a PEC for the results table: 4 (parent) or 6 (metabolite) decimals below 1, else 2"""
+    try:
+        num = float(val)
+    except (TypeError, ValueError):
+        return str(val)
+    if num <= 1E-6:
+        return "<1E-06"
+    if compound_type == "Parent":
+        decimals = 4 if num < 1 else 2
+    else:
+        decimals = 6 if num < 1 else 2
+    return f"{num:.{decimals}f}"
+
+
+def format_for_excel(value):
+    """Number for a workbook cell, "<1E-06" below the detection limit, or the value unchanged"""
+    try:
+        num = float(value)
+        if num <= 1E-6:
+            return "<1E-06"
+        return num
+    except Exception:
+        return value
+
+
+def extract_value(content, pattern, default_value):
+    """First group of pattern (dot matches newlines) stripped, or default_value"""
+    m = re.search(pattern, content, re.DOTALL)
+    return m.group(1).strip() if m else default_value
+
+
+def extract_areic_mean_deposition(content):
+    """Areic mean deposition (mg/m²) of the first application, or "N/A" """
+    m = _AREIC.search(content)
+    return m.group(1).strip() if m else "N/A"
+
+
+def extract_daily_value(content, label, version, start_index=0):
+    """Value of a daily PEC/TWAEC table line; the column layout depends on the TOXSWA version"""
+    pos = content.find(label, start_index)
+    if pos == -1:
+        return "N/A"
+    if version == 3:
+        offset = 13
+        length = 22
+    else:
+        offset = 18
+        length = 18
+    start = pos + offset
+    val_str = content[start : start + length].strip()
+    if val_str.startswith("<"):
+        try:
+            return "< " + str(float(val_str.lstrip("<").strip()))
+        except ValueError:
+            return "< 1E-6"
+    try:
+        numeric_val = float(val_str)
+        if numeric_val < 1E-6:
+            return "<1E-06"
+        return numeric_val
+    except ValueError:
+        return "N/A"
+
+
+def extract_date_only(date_str):
+    """dd-Mon-yyyy part of a dd-Mon-yyyy-HHhMM timestamp"""
+    m = _DATE.match(date_str)
+    return m.group(1) if m else date_str
+
+
+def toxswa_version(content):
+    """3 for FOCUS_TOXSWA v3.3.1 output, else 4 (decides the daily table layout)"""
+    return 3 if "FOCUS_TOXSWA v3.3.1" in content else 4
+
+
+def sheet_values(content, compound, is_parent, version, medium):
+    """Workbook cells of one compound for medium "water" or "sediment"
+
+    Returns (max, date of max, *daily PECs, *TWAECs). The maximum is read at a
+    fixed offset after the "Global max" label of the compound's table: the
+    first one after it for water, the last one for sediment.
+    """
+    if medium == "water":
+        table, daily_labels, twaec_labels = "water layer", SW_DAILY_LABELS, TWAEC_SW_LABELS
+    else:
+        table, daily_labels, twaec_labels = "sediment", SED_DAILY_LABELS, TWAEC_SED_LABELS
+    start = 0
+    if not is_parent:
+        m = re.search(rf"\* Table:\s*PEC in {table} of substance:\s+" + re.escape(compound), content, re.IGNORECASE)
+        start = m.start() if m else 0
+    pos = content.find("Global max", start) if medium == "water" else content.rfind("Global max", start)
+    try:
+        max_val = float(content[pos + 0x11 : pos + 0x11 + 0x13].strip())
+    except ValueError:
+        max_val = 0.0
+    m = _DATE.search(content[pos:])
+    max_date = m.group(1) if m else ""
+    return (
+        format_for_excel(max_val),
+        max_date,
+        *(extract_daily_value(content, label, version, start) for label in daily_labels),
+        *(extract_daily_value(content, label, version, start) for label in twaec_labels),
+    )
+
+
+def route_of_entry(content, scenario, application_dates):
+    """Spray drift when the global maximum falls on an application, else drainage/runoff by scenario"""
+    max_match = _MAX_DATE.search(content)
+    max_date = max_match.group(1).strip() if max_match else ""
+    if max_date in application_dates:
+        return "Spray Drift"
+    scenario_code = scenario[:1].upper() if scenario else ""
+    if scenario_code == "D":
+        return "Drainage"
+    if scenario_code == "R":
+        return "Runoff"
+    return "Spray Drift"
+
+
+def parse_sum_file(file_path):
+    """Parse one TOXSWA .sum file into parent and metabolite rows (see ROW_KEYS)"""
+    filename = os.path.basename(file_path)
+    with metrics.stage("read", "toxswa"), open(file_path, "r", encoding="ISO-8859-1") as f:
+        content = f.read()
+
+    scenario = "Unknown"
+    waterbody = "Unknown"
+    scenario_match = _SCENARIO.search(content)
+    if scenario_match:
+        scenario_raw = scenario_match.group(1).strip()
+        if "_" in scenario_raw:
+            parts = scenario_raw.split("_", 1)
+            scenario = parts[0].strip()
+            waterbody = parts[1].strip().capitalize()
+        else:
+            scenario = scenario_raw
+            wb_match = _WATER_BODY.search(content)
+            waterbody = wb_match.group(1).capitalize() if wb_match else "Unknown"
+
+    app_dates = []
+    app_section = _APPLICATIONS.search(content)
+    if app_section:
+        for line in app_section.group(1).split("\n"):
+            date_match = _DATE_HOUR.search(line)
+            if date_match:
+                app_dates.append(date_match.group().strip())
+
+    route = route_of_entry(content, scenario, app_dates)
+    version = toxswa_version(content)
+
+    m = _PARENT.search(content)
+    parent_compound = m.group(1).strip() if m else "Unknown"
+    m = _PARENT_MAX_SW.search(content)
+    parent_sw_str = m.group(1).strip() if m else None
+    parent_max_sw = parse_value(parent_sw_str)
+    m = _PARENT_MAX_SED.search(content)
+    parent_sed_str = m.group(1).strip() if m else "0"
+    parent_max_sed = parse_value(parent_sed_str)
+    areic = extract_areic_mean_deposition(content)
+
+    rows = [{
+        "Filename": filename,
+        "Scenario": scenario,
+        "Waterbody": waterbody,
+        "Compound": parent_compound,
+        "Max PECsw": format_for_display(parent_max_sw),
+        "Max PECsed": format_for_display(parent_max_sed),
+        "Areic mean deposition": areic,
+        "Route": route,
+        "Type": "Parent",
+        "ApplicationDates": app_dates,
+        "FilePath": file_path,
+        "RawValues": {
+            "Max PECsw": raw_value(parent_sw_str),
+            "Max PECsed": raw_value(parent_sed_str),
+            "Areic mean deposition": raw_value(areic),
+        },
+        "WaterValues": sheet_values(content, parent_compound, True, version, "water"),
+        "SedimentValues": sheet_values(content, parent_compound, True, version, "sediment"),
+    }]
+
+    subs = [m.group(1).strip() for m in _SUBSTANCES.finditer(content)]
+    subs = [sub for sub in subs if sub != parent_compound]
+    if not subs:
+        m = _SOIL_METABOLITE.search(content)
+        soil = m.group(1).strip() if m else ""
+        if soil and soil != parent_compound:
+            subs.append(soil)
+    for sub in subs:
+        max_sw_str = extract_value(content, rf"\* Table:\s*PEC in water layer of substance:\s+{re.escape(sub)}.*?Global max\s+([<]?\s*\S+)", "0")
+        max_sed_str = extract_value(content, rf"\* Table:\s*PEC in sediment of substance:\s+{re.escape(sub)}.*?Global max\s+([<]?\s*\S+)", "0")
+        rows.append({
+            "Filename": filename,
+            "Scenario": scenario,
+            "Waterbody": waterbody,
+            "Compound": sub,
+            "Max PECsw": format_for_display(parse_value(max_sw_str)),
+            "Max PECsed": format_for_display(parse_value(max_sed_str)),
+            "Route": route,
+            "Type": "Metabolite",
+            "ApplicationDates": app_dates,
+            "FilePath": file_path,
+            "RawValues": {
+                "Max PECsw": raw_value(max_sw_str),
+                "Max PECsed": raw_value(max_sed_str),
+            },
+            "WaterValues": sheet_values(content, sub, False, version, "water"),
+            "SedimentValues": sheet_values(content, sub, False, version, "sediment"),
+        })
+
+    return rows
+
+
+def extract_shortcode(project_root):
+    """Mitigation shortcode (buffer, VFS, nozzle reduction) from a project's SWAN_log.txt, "" if none"""
+    swan_log_path = os.path.join(project_root, "SWAN_log.txt")
+    if not os.path.exists(swan_log_path):
+        return ""
+    try:
+        with open(swan_log_path, "r", encoding="ISO-8859-1") as f:
+            content = f.read()
+    except Exception as e:
+        print(f"Error reading {swan_log_path}: {e}")
+        return ""
+
+    buffer = ""
+    nozzle = ""
+    vfs = ""
+    vfs_flag = ""
+
+    spray_section = re.search(r"Spray drift mitigation.*?(?=Run-off mitigation)", content, re.DOTALL | re.IGNORECASE)
+    spray_content = spray_section.group(0) if spray_section else content
+
+    m = re.search(r"Buffer\s*width\s*\(m\)\s*:\s*(\d+)", spray_content, re.IGNORECASE)
+    if m:
+        buffer = f"{m.group(1)}b"
+
+    m = re.search(r"Nozzle\s*reduction\s*\(\%\)\s*:\s*(\d+)", spray_content, re.IGNORECASE)
+    if m:
+        nozzle_val = int(m.group(1))
+        if nozzle_val > 0:
+            nozzle = f"{nozzle_val}%"
+
+    runoff_section = re.search(r"Run-off mitigation.*?(?=Dry deposition)", content, re.DOTALL | re.IGNORECASE)
+    if runoff_section:
+        runoff_content = runoff_section.group(0)
+        if re.search(r"Reduction\s*run-?off\s*mode:\s*VfsMod", runoff_content, re.IGNORECASE):
+            m = re.search(r"Filter\s*strip\s*buffer\s*width\s*:\s*(\d+)", runoff_content, re.IGNORECASE)
+            if m:
+                vfs = f"{m.group(1)}vfs"
+            vfs_flag = " VFSMOD"
+
+        elif re.search(r"Reduction\s*run-?off\s*mode:\s*ManualReduction", runoff_content, re.IGNORECASE):
+            fr_volume_match = re.search(r"Fractional\s+reduction\s+in\s+run-off\s+volume\s*:\s*([\d.]+)", runoff_content, re.IGNORECASE)
+            if fr_volume_match:
+                try:
+                    vol_value = float(fr_volume_match.group(1))
+                except ValueError:
+                    vol_value = None
+                if vol_value is not None:
+                    if abs(vol_value - 0.6) < 1E-6:
+                        vfs = "10vfs"
+                    elif abs(vol_value - 0.8) < 1E-6:
+                        vfs = "20vfs"
+
+    return f"{buffer}{vfs}{nozzle}{vfs_flag}"
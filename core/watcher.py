@@ -0,0 +1,320 @@
+import ctypes
+import ctypes.util
+import logging
+import os
+import queue
+import select
+import struct
+import sys
+import threading
+import time
+
+from core.parse_cache import parse_cache as shared_parse_cache
+
+# inotify flags (see <sys/inotify.h>)
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = getattr(os, "O_CLOEXEC", 0o2000000)
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+
+_EVENT_HEADER = struct.Struct("iIII")
+
+logger = logging.getLogger(__name__)
+
+
+def toxswa_output(path):
+    """TOXSWA summaries live in <project>/toxswa/*.sum"""
+    return path.endswith(".sum") and os.path.basename(os.path.dirname(path)) == "toxswa"
+
+
+def pelmo_output(path):
+    return os.path.basename(path) == "period.plm"
+
+
+def pearl_output(path):
+    return path.endswith(".sum")
+
+
+class _Inotify:
+    """Minimal ctypes binding for recursive inotify watches"""
+
+    def __init__(self):
+        libc_name = ctypes.util.find_library("c")
+        if not sys.platform.startswith("linux") or not libc_name:
+            raise OSError("inotify is only available on Linux")
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self.fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.watches = {}
+
+    def add_tree(self, root):
+        """Watch root and every directory below it"""
+        for dirpath, _, _ in os.walk(root):
+            self.add(dirpath)
+
+    def add(self, directory):
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {directory}")
+        self.watches[wd] = directory
+
+    def read_events(self, timeout):
+        """Yield (path, mask) for events that arrive within timeout seconds"""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return
+        try:
+            buf = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(buf):
+            wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(buf, offset)
+            offset += _EVENT_HEADER.size
+            name = buf[offset:offset + length].rstrip(b"\0")
+            offset += length
+            if mask & IN_IGNORED:
+                self.watches.pop(wd, None)
+                continue
+            directory = self.watches.get(wd)
+            if mask & IN_Q_OVERFLOW or directory is None:
+                yield None, mask
+                continue
+            yield os.path.join(directory, os.fsdecode(name)), mask
+
+    def close(self):
+        os.close(self.fd)
+
+
+class ModelOutputWatcher:
+    """Background service that pre-parses new or changed model outputs into the parse cache
+
+    parsers maps a root kind ("toxswa", "pelmo", "pearl") to a (matches, parse)
+    pair: matches(path) selects the output files of that model and parse(path)
+    is the extractor's own file parser.
+    """
+
+    def __init__(self, parsers, parse_cache=None, queue_size=1000, debounce=5.0, poll_interval=10.0):
+        self.parsers = parsers
+        self.parse_cache = parse_cache if parse_cache is not None else shared_parse_cache
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.roots = {}
+        self.mode = None
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._pending = {}
+        self._seen = {}
+        self._unscanned = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._threads = []
+        self._inotify = None
+        self.stats = {"parsed": 0, "skipped": 0, "deferred": 0, "errors": 0}
+        self.last_error = ""
+
+    def add_root(self, path, kind):
+        """Register a FOCUS folder, PEARL run dir or SWASH project dir to watch
+
+        The root is watched and scanned by the detector thread, so this returns
+        without walking the tree.
+        """
+        if kind not in self.parsers:
+            raise ValueError(f"Unknown root kind: {kind}")
+        if not os.path.isdir(path):
+            raise ValueError(f"Directory does not exist: {path}")
+        path = os.path.abspath(path)
+        with self._lock:
+            self.roots[path] = kind
+            self._unscanned.append((path, kind))
+
+    @property
+    def running(self):
+        return any(t.is_alive() for t in self._threads)
+
+    def start(self):
+        """Start the detector and parser threads"""
+        if self.running:
+            return
+        self._stop.clear()
+        try:
+            self._inotify = _Inotify()
+            self.mode = "inotify"
+        except OSError as e:
+            self._inotify = None
+            self.mode = "polling"
+            self.last_error = str(e)
+        with self._lock:
+            self._unscanned = list(self.roots.items())
+        self._threads = [
+            threading.Thread(target=self._detect_loop, name="model-output-detector", daemon=True),
+            threading.Thread(target=self._parse_loop, name="model-output-parser", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self):
+        """Stop the background threads"""
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout=5)
+        self._threads = []
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+
+    def status(self):
+        """Snapshot of the watcher state for the status endpoint"""
+        with self._lock:
+            return {
+                "running": self.running,
+                "mode": self.mode,
+                "roots": [{"path": path, "kind": kind} for path, kind in self.roots.items()],
+                "pending": len(self._pending),
+                "queued": self._queue.qsize(),
+                "queue_size": self._queue.maxsize,
+                "debounce_seconds": self.debounce,
+                "cached_files": len(self.parse_cache),
+                "last_error": self.last_error,
+                **self.stats,
+            }
+
+    def _roots(self):
+        with self._lock:
+            return list(self.roots.items())
+
+    def _kind_for(self, path):
+        for root, kind in self._roots():
+            if path.startswith(root + os.sep) and self.parsers[kind][0](path):
+                return kind
+        return None
+
+    def _scan_root(self, root, kind):
+        """Walk a root and mark every changed output file as pending"""
+        matches = self.parsers[kind][0]
+        for dirpath, _, filenames in os.walk(root):
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                if not matches(path):
+                    continue
+                try:
+                    fingerprint = self.parse_cache.fingerprint(os.stat(path))
+                except OSError:
+                    continue
+                with self._lock:
+                    if self._seen.get(path) != fingerprint:
+                        self._seen[path] = fingerprint
+                        self._pending[path] = (kind, fingerprint, time.monotonic())
+
+    def _touch(self, path):
+        kind = self._kind_for(path)
+        if kind is None:
+            return
+        with self._lock:
+            self._pending[path] = (kind, None, time.monotonic())
+
+    def _record_error(self, message):
+        self.last_error = message
+        logger.exception("Model output watcher: %s", message)
+
+    def _watch_new_roots(self):
+        """Watch and scan the roots registered since the last pass"""
+        while True:
+            with self._lock:
+                if not self._unscanned:
+                    return
+                root, kind = self._unscanned.pop(0)
+            if self._inotify is not None:
+                try:
+                    self._inotify.add_tree(root)
+                except OSError as e:
+                    # Out of watches: fall back to polling, which rescans every root
+                    self._inotify.close()
+                    self._inotify = None
+                    self.mode = "polling"
+                    self.last_error = str(e)
+            self._scan_root(root, kind)
+
+    def _read_events(self):
+        for path, mask in self._inotify.read_events(timeout=min(self.debounce, 1.0)):
+            if path is None:
+                # Event queue overflowed, fall back to a full rescan
+                for root, kind in self._roots():
+                    self._scan_root(root, kind)
+            elif mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    try:
+                        self._inotify.add_tree(path)
+                    except OSError as e:
+                        self.last_error = str(e)
+                    kind = next((k for r, k in self._roots() if path.startswith(r + os.sep)), None)
+                    if kind:
+                        self._scan_root(path, kind)
+            else:
+                self._touch(path)
+
+    def _detect_loop(self):
+        last_poll = time.monotonic()
+        while not self._stop.is_set():
+            try:
+                self._watch_new_roots()
+                if self._inotify is not None:
+                    self._read_events()
+                else:
+                    self._stop.wait(min(self.debounce, 1.0))
+                    if time.monotonic() - last_poll >= self.poll_interval:
+                        for root, kind in self._roots():
+                            self._scan_root(root, kind)
+                        last_poll = time.monotonic()
+                self._flush_stable()
+            except Exception as e:
+                # Keep the detector alive; status() reports the failure
+                self._record_error(f"detector: {e}")
+                self._stop.wait(min(self.debounce, 1.0))
+
+    def _flush_stable(self):
+        """Queue pending files whose size and mtime stopped changing for the debounce period"""
+        now = time.monotonic()
+        with self._lock:
+            candidates = [(p, v) for p, v in self._pending.items() if now - v[2] >= self.debounce]
+        for path, (kind, fingerprint, _) in candidates:
+            try:
+                current = self.parse_cache.fingerprint(os.stat(path))
+            except OSError:
+                with self._lock:
+                    self._pending.pop(path, None)
+                continue
+            with self._lock:
+                if current != fingerprint:
+                    # Still being written, check again after another debounce period
+                    self._pending[path] = (kind, current, now)
+                    continue
+                try:
+                    self._queue.put_nowait((kind, path))
+                except queue.Full:
+                    self.stats["deferred"] += 1
+                    continue
+                self._pending.pop(path, None)
+                self._seen[path] = current
+
+    def _parse_loop(self):
+        while not self._stop.is_set():
+            try:
+                kind, path = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            try:
+                _, reused = self.parse_cache.get_or_parse(kind, path, self.parsers[kind][1])
+                self.stats["skipped" if reused else "parsed"] += 1
+            except Exception as e:
+                self.stats["errors"] += 1
+                self.last_error = f"{path}: {e}"
+                logger.warning("Model output watcher could not parse %s: %s", path, e)
+            finally:
+                self._queue.task_done()
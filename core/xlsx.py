@@ -0,0 +1,118 @@
+# Shared xlsxwriter helpers for the TOXSWA, PELMO and PEARL workbook exports.
+# xlsxwriter itself is only imported by the exporters, when a workbook is written.
+
+# Named cell styles shared by all exporters
+STYLES = {
+    "title": {"bold": True},
+    # PEARL table headers
+    "header": {"bold": True, "bg_color": "#82C940"},
+    # TOXSWA project sheet headers
+    "header_left": {"bold": True, "bg_color": "#82C940", "font_color": "#000000", "align": "left"},
+    # PELMO sheet headers
+    "header_boxed": {"bold": True, "bg_color": "#DFF0D8", "border": 1},
+    # TOXSWA summary sheet headers
+    "header_boxed_centered": {"bold": True, "bg_color": "#DFF0D8", "border": 1, "align": "center", "valign": "vcenter"},
+    "right": {"align": "right"},
+    "right_bold": {"align": "right", "bold": True},
+    "scientific": {"num_format": '[<=0.000001]"<1E-06";0.000000', "align": "right"},
+    "exceeds": {"font_color": "red"},
+    "within": {"font_color": "green"},
+}
+
+
+class WorkbookStyles:
+    """Per-workbook format registry: each named style is added to the workbook once, on first use"""
+
+    def __init__(self, workbook, styles=None):
+        self.workbook = workbook
+        self.styles = STYLES if styles is None else styles
+        self._formats = {}
+
+    def __getitem__(self, name):
+        fmt = self._formats.get(name)
+        if fmt is None:
+            fmt = self._formats[name] = self.workbook.add_format(self.styles[name])
+        return fmt
+
+
+def safe_sheet_name(name, existing_names):
+    """Excel-safe, unique sheet name: invalid characters removed, at most 31 characters
+
+    A numeric suffix is appended on collisions; the name is added to existing_names.
+    """
+    for ch in "[]:*?/\\":
+        name = name.replace(ch, "")
+    name = name.strip()
+    if len(name) > 31:
+        name = name[:31]
+    base_name = name
+    counter = 1
+    while name in existing_names:
+        suffix = str(counter)
+        name = base_name[:31 - len(suffix)] + suffix
+        counter += 1
+    existing_names.add(name)
+    return name
+
+
+def highlight_numbers(worksheet, first_row, col, last_row, op, limit, fmt):
+    """Conditionally format numeric cells of a column range that satisfy `cell <op> limit`
+
+    One rule per range replaces per-cell styling; text cells such as "<1E-06"
+    are never highlighted.
+    """
+    if last_row < first_row:
+        return
+    from xlsxwriter.utility import xl_rowcol_to_cell
+    cell = xl_rowcol_to_cell(first_row, col)
+    worksheet.conditional_format(first_row, col, last_row, col, {
+        "type": "formula",
+        "criteria": f"=AND(ISNUMBER({cell}),{cell}{op}{float(limit):.15G})",
+        "format": fmt,
+    })
+
+
+class SheetWriter:
+    """Writes cells to one worksheet and tracks each column's display width as it goes
+
+    Widths are measured while the cells are emitted, so fitting the columns
+    needs no second pass over the data. For very large sheets pass
+    sample_rows: only the first sample_rows rows and then every
+    sample_stride-th row are measured.
+    """
+
+    def __init__(self, worksheet, sample_rows=None, sample_stride=100):
+        self.worksheet = worksheet
+        self.sample_rows = sample_rows
+        self.sample_stride = sample_stride
+        self.widths = {}
+
+    def _measure(self, row, col, value):
+        if self.sample_rows is not None and row >= self.sample_rows and row % self.sample_stride:
+            return
+        width = len(value) if isinstance(value, str) else len(str(value))
+        if width > self.widths.get(col, 0):
+            self.widths[col] = width
+
+    def write(self, row, col, value, fmt=None):
+        self._measure(row, col, value)
+        return self.worksheet.write(row, col, value, fmt)
+
+    def write_number(self, row, col, value, fmt=None):
+        self._measure(row, col, value)
+        return self.worksheet.write_number(row, col, value, fmt)
+
+    def write_row(self, row, first_col, values, fmt=None):
+        """Write values left to right starting at (row, first_col)"""
+        for offset, value in enumerate(values):
+            self.write(row, first_col + offset, value, fmt)
+
+    def fit_columns(self, padding=2, min_width=0, max_width=80, formats=None):
+        """Set every written column to its widest measured cell plus padding
+
+        formats optionally maps column -> default cell format for that column.
+        """
+        formats = formats or {}
+        for col, width in sorted(self.widths.items()):
+            width = min(max(width + padding, min_width), max_width)
+            self.worksheet.set_column(col, col, width, formats.get(col))
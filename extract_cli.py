@@ -0,0 +1,226 @@
+"""Headless batch extractor for TOXSWA, PELMO and PEARL outputs.
+
+Drives the same extractors as the web app without importing Flask or PyQt:
+
+    python extract_cli.py toxswa "/data/swash/*" -o results.xlsx --workers 8
+    python extract_cli.py pelmo "/data/dossier/FOCUS/*.run" -o results.csv
+    python extract_cli.py pelmo "/data/dossier/FOCUS/*.run" -o results.jsonl
+    python extract_cli.py pearl /data/pearl --project-list runs.txt -o results.parquet
+"""
+import argparse
+import contextlib
+import glob
+import io
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from core.formats import TABULAR_FORMATS, missing_dependency, write_table
+
+
+def _quiet(verbose):
+    # The extractors print progress/debug output; keep batch logs readable
+    return contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+
+
+def extract_toxswa_project(project_dir, verbose=False):
+    """Worker: extract one SWASH project directory (containing a toxswa folder)"""
+    from toxswaex.extractor import TOXSWAExtractor
+    main_dir, project = os.path.split(os.path.normpath(project_dir))
+    extractor = TOXSWAExtractor()
+    with _quiet(verbose):
+        all_data, errors = extractor.extract_data(main_dir, [project])
+    return project_dir, dict(all_data), dict(extractor.project_shortcodes), errors
+
+
+def extract_pelmo_project(project_dir, verbose=False):
+    """Worker: extract one PELMO project (<FOCUS>/<project>.run)"""
+    from pelmoex.extractor import PELMOExtractor
+    focus_path, project = os.path.split(os.path.normpath(project_dir))
+    extractor = PELMOExtractor()
+    with _quiet(verbose):
+        rows, _, errors = extractor.extract_data(focus_path, [project])
+    return project_dir, rows, extractor.row_files, extractor.active_columns, errors
+
+
+def extract_pearl_file(file_path, verbose=False):
+    """Worker: extract one PEARL .sum file"""
+    from pearlex.extractor import PearlGroundwaterExtractor
+    extractor = PearlGroundwaterExtractor()
+    extractor.sum_filepaths = [file_path]
+    with _quiet(verbose):
+        extractor.extract_data([os.path.basename(file_path)])
+    return file_path, list(extractor.all_data), []
+
+
+def resolve_inputs(model, patterns, project_list=None):
+    """Expand globs and project lists into the unit of work for each model"""
+    candidates = list(patterns)
+    if project_list:
+        with open(project_list, encoding="utf-8") as f:
+            candidates.extend(line.strip() for line in f if line.strip() and not line.startswith("#"))
+
+    paths = []
+    for pattern in candidates:
+        matches = sorted(glob.glob(pattern, recursive=True)) if glob.has_magic(pattern) else [pattern]
+        for path in matches:
+            path = os.path.abspath(path)
+            if model == "toxswa":
+                if os.path.isdir(os.path.join(path, "toxswa")):
+                    paths.append(path)
+                elif os.path.isdir(path):
+                    # A SWASH main directory: take every project below it
+                    paths.extend(
+                        os.path.join(path, d) for d in sorted(os.listdir(path))
+                        if os.path.isdir(os.path.join(path, d, "toxswa"))
+                    )
+            elif model == "pelmo":
+                if path.endswith(".run") and os.path.isdir(path):
+                    paths.append(path)
+                elif os.path.isdir(path):
+                    # A project directory or a FOCUS folder: take its .run projects
+                    focus = os.path.join(path, "FOCUS") if os.path.isdir(os.path.join(path, "FOCUS")) else path
+                    paths.extend(
+                        os.path.join(focus, d) for d in sorted(os.listdir(focus))
+                        if d.endswith(".run") and os.path.isdir(os.path.join(focus, d))
+                    )
+            else:
+                if os.path.isfile(path) and path.endswith(".sum"):
+                    paths.append(path)
+                elif os.path.isdir(path):
+                    # Same layout as the PEARLex scan: top level plus one subdirectory level
+                    for entry in sorted(os.listdir(path)):
+                        sub = os.path.join(path, entry)
+                        if entry.endswith(".sum"):
+                            paths.append(sub)
+                        elif os.path.isdir(sub):
+                            paths.extend(os.path.join(sub, f) for f in sorted(os.listdir(sub)) if f.endswith(".sum"))
+    # Keep the first occurrence of each input
+    return list(dict.fromkeys(paths))
+
+
+def run_parallel(worker, inputs, workers, verbose):
+    if workers <= 1 or len(inputs) <= 1:
+        return [worker(path, verbose) for path in inputs]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(worker, inputs, [verbose] * len(inputs), chunksize=max(1, len(inputs) // (workers * 4))))
+
+
+def export_toxswa(results, output, fmt, results_index=None):
+    from toxswaex.extractor import TOXSWAExtractor
+    extractor = TOXSWAExtractor()
+    for project_dir, all_data, shortcodes, _ in results:
+        for project, rows in all_data.items():
+            key = project if project not in extractor.all_data else project_dir
+            extractor.all_data[key] = rows
+            extractor.project_shortcodes[key] = shortcodes.get(project, "Step 3")
+        if results_index is not None and all_data:
+            results_index.index_toxswa(os.path.dirname(project_dir), all_data)
+
+    if fmt == "xlsx":
+        extractor.summary_mode = True
+        return extractor.export_to_excel(output)
+    write_table(output, fmt, *extractor.export_table())
+    return True
+
+
+def export_pelmo(results, output, fmt, results_index=None):
+    from pelmoex.extractor import PELMOExtractor
+    extractor = PELMOExtractor()
+    for project_dir, rows, row_files, active_columns, _ in results:
+        extractor.all_rows.extend(rows)
+        if results_index is not None and rows:
+            results_index.index_pelmo(os.path.dirname(project_dir), rows, row_files, active_columns)
+
+    if fmt == "xlsx":
+        extractor.export_to_excel(output)
+        return True
+    write_table(output, fmt, *extractor.export_table())
+    return True
+
+
+def export_pearl(results, output, fmt, results_index=None):
+    from pearlex.extractor import PearlGroundwaterExtractor
+    extractor = PearlGroundwaterExtractor()
+    for _, rows, _ in results:
+        extractor.all_data.extend(rows)
+    if results_index is not None and extractor.all_data:
+        root = os.path.commonpath([path for path, _, _ in results])
+        results_index.index_pearl(root, extractor.all_data, [path for path, _, _ in results])
+
+    if fmt == "xlsx":
+        success, result = extractor.export_to_excel_single()
+        if not success:
+            print(result, file=sys.stderr)
+            return False
+        with open(output, "wb") as f:
+            f.write(result.getvalue())
+        return True
+    write_table(output, fmt, *extractor.export_table())
+    return True
+
+
+MODELS = {
+    "toxswa": (extract_toxswa_project, export_toxswa),
+    "pelmo": (extract_pelmo_project, export_pelmo),
+    "pearl": (extract_pearl_file, export_pearl),
+}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Batch extract TOXSWA, PELMO and PEARL results without the UI")
+    parser.add_argument("model", choices=sorted(MODELS), help="Model whose outputs are extracted")
+    parser.add_argument("inputs", nargs="*",
+                        help="Project directories, parent directories or glob patterns "
+                             "(TOXSWA: SWASH projects, PELMO: FOCUS/*.run, PEARL: .sum files or run directories)")
+    parser.add_argument("--project-list", help="Text file with one input path or glob per line")
+    parser.add_argument("-o", "--output", required=True, help="Output file")
+    parser.add_argument("-f", "--format", choices=("xlsx",) + TABULAR_FORMATS,
+                        help="Output format (default: taken from the output file extension)")
+    parser.add_argument("-j", "--workers", type=int, default=os.cpu_count() or 1, help="Parallel worker processes")
+    parser.add_argument("--index", metavar="DB", help="Also write the results to this SQLite results index")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Show extractor output")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    fmt = args.format or os.path.splitext(args.output)[1].lstrip(".").lower()
+    if fmt not in ("xlsx",) + TABULAR_FORMATS:
+        print(f"Cannot infer output format from '{args.output}', use --format", file=sys.stderr)
+        return 2
+    # Checked before extracting, so a missing optional package fails fast
+    missing = missing_dependency(fmt)
+    if missing:
+        print(missing, file=sys.stderr)
+        return 2
+
+    inputs = resolve_inputs(args.model, args.inputs, args.project_list)
+    if not inputs:
+        print("No inputs found", file=sys.stderr)
+        return 2
+
+    worker, exporter = MODELS[args.model]
+    print(f"Extracting {len(inputs)} {args.model} input(s) with {args.workers} worker(s)", file=sys.stderr)
+    results = run_parallel(worker, inputs, args.workers, args.verbose)
+
+    errors = [error for result in results for error in result[-1]]
+    for error in errors:
+        print(f"  {error}", file=sys.stderr)
+
+    results_index = None
+    if args.index:
+        from core.results_index import ResultsIndex
+        results_index = ResultsIndex(args.index)
+
+    with _quiet(args.verbose):
+        written = exporter(results, args.output, fmt, results_index)
+    if not written:
+        print(f"Failed to write {args.output}", file=sys.stderr)
+        return 1
+    print(f"Wrote {args.output}", file=sys.stderr)
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1 @@
+# Shared PyQt helpers used by the desktop tools (not imported by the web app)
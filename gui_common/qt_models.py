@@ -0,0 +1,214 @@
+# Worker and results grid models shared by the PyQt tools
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from PyQt5.QtCore import (
+    Qt,
+    QObject,
+    QAbstractTableModel,
+    QModelIndex,
+    QSortFilterProxyModel,
+    pyqtSignal,
+)
+
+
+class ExtractionWorker(QObject):
+    """Runs parse(path) for every job off the GUI thread, several files at a time.
+
+    Each file's result is delivered through fileDone as soon as it is parsed.
+    After discard() the receiver drops whatever the worker still delivers
+    (signals already queued for the GUI thread cannot be taken back).
+    """
+
+    fileDone = pyqtSignal(object, object)  # job key, parse result
+    fileFailed = pyqtSignal(object, str)  # job key, error message
+    progress = pyqtSignal(int, int)  # files done, files total
+    finished = pyqtSignal(bool)  # True when cancelled
+
+    def __init__(self, jobs, parse, max_workers=4):
+        super().__init__()
+        self.jobs = jobs  # [(key, path), ...]
+        self.parse = parse
+        self.max_workers = max_workers
+        self._cancelled = False
+        self.discarded = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def discard(self):
+        """Cancel, and mark the results delivered from now on as unwanted"""
+        self.discarded = True
+        self.cancel()
+
+    def run(self):
+        done = 0
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {pool.submit(self.parse, path): key for key, path in self.jobs}
+            for future in as_completed(futures):
+                if self._cancelled:
+                    for pending in futures:
+                        pending.cancel()
+                    break
+                key = futures[future]
+                try:
+                    self.fileDone.emit(key, future.result())
+                except Exception as e:
+                    self.fileFailed.emit(key, str(e))
+                done += 1
+                self.progress.emit(done, len(futures))
+        self.finished.emit(self._cancelled)
+
+
+class ResultsTableModel(QAbstractTableModel):
+    """Read-only results grid over a compact row store.
+
+    The extracted rows are referenced as they are, without one item per cell.
+    columns is a list of (header, value) pairs where value(row) returns the
+    cell value, so a cell is only formatted when the view paints it.
+    foreground(column, value), when set, returns the text QColor of a cell or None.
+    Sorting keeps the rows as given and orders a list of their positions with
+    one key per row; the sort is kept when the rows are replaced.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.columns = []
+        self.givenRows = []
+        self.order = None  # positions into givenRows in view order, None for the given order
+        self.rows = []
+        self.headerTips = {}
+        self.cellTips = ()
+        self.foreground = None
+        self.sortColumn = -1
+        self.sortOrder = Qt.AscendingOrder
+
+    def setRows(self, columns, rows, headerTips=None, cellTips=()):
+        self.beginResetModel()
+        self.columns = columns
+        self.givenRows = rows
+        self.order = self.sortedOrder(range(len(rows)))
+        self.rows = self.arrangedRows()
+        self.headerTips = headerTips or {}  # header -> tooltip
+        self.cellTips = cellTips  # columns whose cells show their text as tooltip
+        self.endResetModel()
+
+    def setForeground(self, foreground):
+        """Replace the colouring rule and repaint; the rows themselves are untouched"""
+        self.foreground = foreground
+        if self.rows and self.columns:
+            self.dataChanged.emit(
+                self.index(0, 0),
+                self.index(len(self.rows) - 1, len(self.columns) - 1),
+                [Qt.ForegroundRole],
+            )
+
+    def sortedOrder(self, positions):
+        """positions (into givenRows) sorted by the sort column, or None when unsorted
+
+        The sort is stable, so rows with equal keys keep their order in positions.
+        """
+        if not 0 <= self.sortColumn < len(self.columns):
+            return None
+        value = self.columns[self.sortColumn][1]
+        rows = self.givenRows
+
+        def key(position):
+            # Numbers (and "<1E-06") sort before text
+            cell = str(value(rows[position]))
+            try:
+                return (0, float(cell.replace("<1E-06", "0.000001")), "")
+            except ValueError:
+                return (1, 0.0, cell.upper())
+
+        return sorted(positions, key=key, reverse=self.sortOrder == Qt.DescendingOrder)
+
+    def arrangedRows(self):
+        if self.order is None:
+            return self.givenRows
+        return [self.givenRows[position] for position in self.order]
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        """Sort by a column; -1 restores the order the rows were given in"""
+        self.sortColumn = column
+        self.sortOrder = order
+        self.layoutAboutToBeChanged.emit()
+        previous = self.order
+        self.order = self.sortedOrder(previous if previous is not None else range(len(self.givenRows)))
+        self.rows = self.arrangedRows()
+        persistent = self.persistentIndexList()
+        if persistent:
+            # given position -> new view row
+            moved = list(range(len(self.rows)))
+            if self.order is not None:
+                for row, position in enumerate(self.order):
+                    moved[position] = row
+
+            def newRow(row):
+                return moved[previous[row] if previous is not None else row]
+
+            self.changePersistentIndexList(
+                persistent, [self.index(newRow(index.row()), index.column()) for index in persistent]
+            )
+        self.layoutChanged.emit()
+
+    def headers(self):
+        return [header for header, _ in self.columns]
+
+    def text(self, row, column):
+        return str(self.columns[column][1](self.rows[row]))
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.columns)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and section < len(self.columns):
+            header = self.columns[section][0]
+            if role == Qt.DisplayRole:
+                return header
+            if role == Qt.ToolTipRole:
+                return self.headerTips.get(header)
+        return super().headerData(section, orientation, role)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        column = index.column()
+        value = self.columns[column][1](self.rows[index.row()])
+        if role == Qt.DisplayRole:
+            return str(value)
+        if role == Qt.ForegroundRole:
+            return self.foreground(column, value) if self.foreground is not None else None
+        if role == Qt.ToolTipRole and column in self.cellTips:
+            return str(value)
+        return None
+
+
+class ResultsProxyModel(QSortFilterProxyModel):
+    """Hides source rows rejected by rowFilter(row); sorting is left to the source model"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.rowFilter = None
+
+    def setRowFilter(self, rowFilter):
+        self.rowFilter = rowFilter
+        # Rebuild the row mapping in one go; invalidateFilter() would remove
+        # the hidden rows range by range, which is quadratic on large tables
+        self.invalidate()
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        # One Python sort of the row store instead of a data() call per comparison
+        self.sourceModel().sort(column, order)
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        return self.rowFilter is None or self.rowFilter(self.sourceModel().rows[source_row])
+
+    def rowsText(self):
+        """Cell texts of the visible rows, in view order"""
+        source = self.sourceModel()
+        for row in range(self.rowCount()):
+            source_row = self.mapToSource(self.index(row, 0)).row()
+            yield [source.text(source_row, column) for column in range(source.columnCount())]
@@ -1,6 +1,5 @@
 import os
 import sys
-import re
 
 from PyQt5.QtWidgets import (
     QApplication,
@@ -9,8 +8,7 @@ from PyQt5.QtWidgets import (
     QFileDialog,
     QVBoxLayout,
     QHBoxLayout,
-    QTableWidget,
-    QTableWidgetItem,
+    QTableView,
     QLabel,
     QListWidget,
     QComboBox,
@@ -19,11 +17,25 @@ from PyQt5.QtWidgets import (
     QMenu,
     QCheckBox,
     QInputDialog,
+    QProgressBar,
 )
 from PyQt5.QtGui import QPixmap, QColor, QFont, QIcon, QDesktopServices
-from PyQt5.QtCore import Qt, QUrl, QSize, QTimer
+from PyQt5.QtCore import (
+    Qt,
+    QUrl,
+    QSize,
+    QTimer,
+    QThread,
+)
 import qtawesome as qta
-import xlsxwriter
+
+# Let the script run from its own folder and still import the shared packages
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import pearl
+from core.parse_cache import parse_cache
+from gui_common.qt_models import ExtractionWorker, ResultsTableModel, ResultsProxyModel
+from pearlex.extractor import PearlGroundwaterExtractor as WorkbookExporter
 
 DESKTOP_SERVICES_AVAILABLE = True
 
@@ -36,6 +48,10 @@ class PearlGroundwaterExtractor(QWidget):
         self.all_data = []
         self.is_dark_mode = True
         self.batches = []
+        self.extractThread = None
+        self.extractWorker = None
+        self.extracted = {}
+        self.extractErrors = []
 
         self.dark_stylesheet = """
         QWidget {
@@ -44,7 +60,7 @@ class PearlGroundwaterExtractor(QWidget):
             font-family: 'Segoe UI', sans-serif;
             font-size: 16px;
         }
-        QTableWidget {
+        QTableView {
             background-color: #1E1E1E;
             gridline-color: #2E2E2E;
         }
@@ -81,7 +97,7 @@ class PearlGroundwaterExtractor(QWidget):
             font-family: 'Segoe UI', sans-serif;
             font-size: 16px;
         }
-        QTableWidget {
+        QTableView {
             background-color: #FFFFFF;
             gridline-color: #C0C0C0;
         }
@@ -160,7 +176,7 @@ class PearlGroundwaterExtractor(QWidget):
         top_filters = QHBoxLayout()
         self.compoundTypeDropdown = QComboBox()
         self.compoundTypeDropdown.addItems(["Parent", "Metabolite"])
-        self.compoundTypeDropdown.currentIndexChanged.connect(self.updateTable)
+        self.compoundTypeDropdown.currentIndexChanged.connect(self.applyCompoundFilter)
         self.compoundTypeDropdown.view().setMinimumWidth(110)
         self.compoundTypeDropdown.setMinimumWidth(110)
         top_filters.addWidget(QLabel("Compound Type:"))
@@ -168,7 +184,7 @@ class PearlGroundwaterExtractor(QWidget):
 
         self.sortDropdown = QComboBox()
         self.sortDropdown.addItems(["Filename", "Compound", "Scenario"])
-        self.sortDropdown.currentIndexChanged.connect(self.updateTable)
+        self.sortDropdown.currentIndexChanged.connect(self.onSortOptionChanged)
         self.sortDropdown.view().setMinimumWidth(110)
         self.sortDropdown.setMinimumWidth(110)
         top_filters.addWidget(QLabel("Sort by:"))
@@ -176,7 +192,7 @@ class PearlGroundwaterExtractor(QWidget):
 
         self.limitDropdown = QComboBox()
         self.limitDropdown.addItems(["", "0.1 µg/L", "0.001 µg/L"])
-        self.limitDropdown.currentIndexChanged.connect(self.updateTable)
+        self.limitDropdown.currentIndexChanged.connect(self.applyLimitHighlight)
         self.limitDropdown.setMinimumWidth(100)
         self.limitDropdown.view().setMinimumWidth(100)
         top_filters.addWidget(QLabel("Parametric Limit:"))
@@ -261,35 +277,30 @@ class PearlGroundwaterExtractor(QWidget):
         right_layout.addWidget(self.batchWidget)
         self.batchWidget.hide()  # Hidden by default
 
-        # TABLE WIDGET
-        self.tableWidget = QTableWidget()
-        self.tableWidget.setColumnCount(6)
-        self.tableWidget.setHorizontalHeaderLabels(
-            [
-                "Project",
-                "Filename",
-                "Compound Type",
-                "Scenario",
-                "Compound",
-                "80th Percentile (µg/L)",
-            ]
-        )
-        header = self.tableWidget.horizontalHeader()
-        header.setStretchLastSection(False)
-        for i in range(self.tableWidget.columnCount()):
-            if i == 5:
-                header.setSectionResizeMode(i, QHeaderView.Fixed)
-                self.tableWidget.setColumnWidth(
-                    i, 170
-                )  # Force column 6 to be 285 pixels wide
-            else:
-                header.setSectionResizeMode(i, QHeaderView.Stretch)
-        # Set a size hint on the header item for column 6
-        header_item = self.tableWidget.horizontalHeaderItem(5)
-        header_item.setSizeHint(QSize(285, header_item.sizeHint().height()))
-        self.tableWidget.setContextMenuPolicy(Qt.CustomContextMenu)
-        self.tableWidget.customContextMenuRequested.connect(self.showContextMenu)
-        right_layout.addWidget(self.tableWidget)
+        # TABLE VIEW
+        self.tableModel = ResultsTableModel(self)
+        self.tableModel.setRows(self.resultColumns(), [])
+        self.tableProxy = ResultsProxyModel(self)
+        self.tableProxy.setSourceModel(self.tableModel)
+        self.tableView = QTableView()
+        self.tableView.setModel(self.tableProxy)
+        # No header sort until a header is clicked: rows keep the sort dropdown order
+        self.tableView.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+        self.tableView.setSortingEnabled(True)
+        self.adjustColumnWidth()
+        self.tableView.setContextMenuPolicy(Qt.CustomContextMenu)
+        self.tableView.customContextMenuRequested.connect(self.showContextMenu)
+        right_layout.addWidget(self.tableView)
+
+        self.progressBar = QProgressBar()
+        self.progressBar.setVisible(False)
+        right_layout.addWidget(self.progressBar)
+
+        # Redraw the table at most every 300 ms while results stream in
+        self.refreshTimer = QTimer(self)
+        self.refreshTimer.setSingleShot(True)
+        self.refreshTimer.setInterval(300)
+        self.refreshTimer.timeout.connect(self.refreshExtractedData)
 
         main_layout.addLayout(left_layout, 1)
         main_layout.addLayout(right_layout, 5)
@@ -298,10 +309,27 @@ class PearlGroundwaterExtractor(QWidget):
         # Use QTimer to delay the adjustment until after the UI is shown
         QTimer.singleShot(0, self.adjustColumnWidth)
 
+    def resultColumns(self):
+        """(header, value) pairs of the results grid over [project, filename, scenario, compound, value, type] rows"""
+        return [
+            ("Project", lambda r: r[0]),
+            ("Filename", lambda r: r[1]),
+            ("Compound Type", lambda r: r[5]),
+            ("Scenario", lambda r: r[2]),
+            ("Compound", lambda r: r[3]),
+            ("80th Percentile (µg/L)", lambda r: r[4]),
+        ]
+
     def adjustColumnWidth(self):
-        header = self.tableWidget.horizontalHeader()
+        # Section resize modes are reset with the model, so this runs after every refill
+        header = self.tableView.horizontalHeader()
         header.setStretchLastSection(False)
-        self.tableWidget.setColumnWidth(5, 170)
+        for i in range(self.tableModel.columnCount()):
+            if i == 5:
+                header.setSectionResizeMode(i, QHeaderView.Fixed)
+            else:
+                header.setSectionResizeMode(i, QHeaderView.Stretch)
+        self.tableView.setColumnWidth(5, 170)
 
     def toggleBatchMode(self, state):
         is_checked = state == Qt.Checked
@@ -330,41 +358,26 @@ class PearlGroundwaterExtractor(QWidget):
     def showContextMenu(self, pos):
         menu = QMenu()
         actCopy = menu.addAction("Copy")
-        action = menu.exec_(self.tableWidget.mapToGlobal(pos))
+        action = menu.exec_(self.tableView.mapToGlobal(pos))
         if action == actCopy:
             self.copySelection()
 
     def copySelection(self):
-        rngs = self.tableWidget.selectedRanges()
-        if not rngs:
+        indexes = self.tableView.selectionModel().selectedIndexes()
+        if not indexes:
             return
-        lines = []
-        for r in rngs:
-            for row in range(r.topRow(), r.bottomRow() + 1):
-                row_items = []
-                for col in range(r.leftColumn(), r.rightColumn() + 1):
-                    it = self.tableWidget.item(row, col)
-                    row_items.append(it.text() if it else "")
-                lines.append("\t".join(row_items))
+        rows = {}
+        for index in sorted(indexes, key=lambda i: (i.row(), i.column())):
+            rows.setdefault(index.row(), []).append(index.data())
+        lines = ["\t".join(row_items) for row_items in rows.values()]
         QApplication.clipboard().setText("\n".join(lines))
 
     def copyTableToClipboard(self):
-        row_count = self.tableWidget.rowCount()
-        col_count = self.tableWidget.columnCount()
-        if row_count == 0:
+        if self.tableProxy.rowCount() == 0:
             QMessageBox.information(self, "Copy Table", "No data available to copy.")
             return
-        copied_text = ""
-        headers = [
-            self.tableWidget.horizontalHeaderItem(col).text()
-            for col in range(col_count)
-        ]
-        copied_text += "\t".join(headers) + "\n"
-        for row in range(row_count):
-            row_data = []
-            for col in range(col_count):
-                item = self.tableWidget.item(row, col)
-                row_data.append(item.text() if item else "")
+        copied_text = "\t".join(self.tableModel.headers()) + "\n"
+        for row_data in self.tableProxy.rowsText():
             copied_text += "\t".join(row_data) + "\n"
         QApplication.clipboard().setText(copied_text)
         QMessageBox.information(
@@ -413,6 +426,12 @@ class PearlGroundwaterExtractor(QWidget):
             self.fileList.addItem(os.path.basename(path))
 
     def extractData(self):
+        # While an extraction runs the Extract buttons cancel it
+        if self.extractWorker is not None:
+            self.extractWorker.cancel()
+            self.btnExtractSingle.setEnabled(False)
+            self.btnExtractBatch.setEnabled(False)
+            return
         sel = self.fileList.selectedIndexes()
         if not sel:
             QMessageBox.warning(
@@ -420,70 +439,138 @@ class PearlGroundwaterExtractor(QWidget):
             )
             return
         self.all_data.clear()
-        for idx in sel:
+        jobs = []
+        for order, idx in enumerate(sel):
             fp = self.sum_filepaths[idx.row()]
-            try:
-                with open(fp, "r", encoding="ISO-8859-1") as f:
-                    content = f.read()
-            except Exception as e:
-                QMessageBox.warning(self, "File Error", f"Cannot read {fp}\n{str(e)}")
-                continue
-            p = re.search(r"Application_scheme\s+(\S+)", content)
-            project = p.group(1) if p else "Unknown"
-            s = re.search(r"Location\s*[:]*\s*(.*)", content)
-            scenario_raw = s.group(1).strip() if s else "Unknown"
-            scenario = scenario_raw.capitalize()
-            comp_list = re.findall(r"Result_(\S+)\s+([\d.]+)", content)
-            for i, (comp, val_str) in enumerate(comp_list):
-                ctype = "Parent" if i == 0 else "Metabolite"
-                try:
-                    val = float(val_str)
-                except:
-                    val = 0.0
-                self.all_data.append(
-                    [project, os.path.basename(fp), scenario, comp, val, ctype]
-                )
+            jobs.append(((order, fp), fp))
+        self.startExtraction(jobs)
+
+    def parseSumFile(self, fp):
+        """Rows of one .sum file; runs on the extraction worker's threads"""
+        rows, _ = parse_cache.get_or_parse("pearl", fp, pearl.parse_sum_file)
+        return rows
+
+    def startExtraction(self, jobs):
+        self.extracted = {}
+        self.extractErrors = []
+        self.updateTable()
+        self.progressBar.setRange(0, len(jobs))
+        self.progressBar.setValue(0)
+        self.progressBar.setVisible(True)
+        self.btnExtractSingle.setText("Cancel Extraction")
+        self.btnExtractBatch.setText("Cancel Extraction")
+
+        self.extractThread = QThread(self)
+        self.extractWorker = ExtractionWorker(jobs, self.parseSumFile)
+        self.extractWorker.moveToThread(self.extractThread)
+        self.extractThread.started.connect(self.extractWorker.run)
+        self.extractWorker.fileDone.connect(self.onFileExtracted)
+        self.extractWorker.fileFailed.connect(self.onFileFailed)
+        self.extractWorker.progress.connect(self.onExtractionProgress)
+        self.extractWorker.finished.connect(self.onExtractionFinished)
+        self.extractWorker.finished.connect(self.extractThread.quit)
+        self.extractThread.finished.connect(self.extractWorker.deleteLater)
+        self.extractThread.finished.connect(self.extractThread.deleteLater)
+        self.extractThread.start()
+
+    def onFileExtracted(self, key, rows):
+        if self.extractWorker.discarded:
+            return  # cleared while the file was being parsed
+        self.extracted[key[0]] = rows
+        if not self.refreshTimer.isActive():
+            self.refreshTimer.start()
+
+    def onFileFailed(self, key, message):
+        if self.extractWorker.discarded:
+            return
+        self.extractErrors.append(f"Cannot read {key[1]}\n{message}")
+
+    def onExtractionProgress(self, done, total):
+        self.progressBar.setValue(done)
+        self.progressBar.setFormat(f"{done} / {total} files")
+
+    def onExtractionFinished(self, cancelled):
+        self.refreshTimer.stop()
+        discarded = self.extractWorker.discarded
+        if not discarded:
+            self.refreshExtractedData()
+        self.extractWorker = None
+        self.extractThread = None
+        self.progressBar.setVisible(False)
+        for button in (self.btnExtractSingle, self.btnExtractBatch):
+            button.setText("Extract Data")
+            button.setEnabled(True)
+
+        if discarded:
+            return
+        if self.extractErrors:
+            QMessageBox.warning(self, "File Error", "\n\n".join(self.extractErrors))
+        elif cancelled:
+            QMessageBox.information(self, "Extraction Cancelled", "Extraction cancelled; the files read so far are shown.")
+
+    def refreshExtractedData(self):
+        """Rebuild all_data from the files parsed so far, in selection order"""
+        self.all_data = [row for order in sorted(self.extracted) for row in self.extracted[order]]
         self.updateTable()
 
+    def closeEvent(self, event):
+        if self.extractWorker is not None:
+            self.extractWorker.cancel()
+            self.extractThread.quit()
+            self.extractThread.wait()
+        super().closeEvent(event)
+
     def updateTable(self):
-        target_type = self.compoundTypeDropdown.currentText()
+        # Every extracted row goes into the model; the proxy shows the selected compound type.
         sort_field = self.sortDropdown.currentText()
-        limit_val = None
-        if not self.limitDropdown.currentText().startswith("("):
-            try:
-                limit_val = float(self.limitDropdown.currentText().split()[0])
-            except:
-                pass
-        data_for_table = [r for r in self.all_data if r[5] == target_type]
         if sort_field == "Filename":
-            data_for_table.sort(key=lambda x: x[1].lower())
+            rows = sorted(self.all_data, key=lambda x: x[1].lower())
         elif sort_field == "Compound":
-            data_for_table.sort(key=lambda x: x[3].lower())
+            rows = sorted(self.all_data, key=lambda x: x[3].lower())
         elif sort_field == "Scenario":
-            data_for_table.sort(key=lambda x: x[2].lower())
-        self.tableWidget.setRowCount(len(data_for_table))
-        for row_i, row_data in enumerate(data_for_table):
-            display = [
-                row_data[0],
-                row_data[1],
-                row_data[5],
-                row_data[2],
-                row_data[3],
-                row_data[4],
-            ]
-            for col_i, val in enumerate(display):
-                item = QTableWidgetItem(str(val))
-                if col_i == 5 and limit_val is not None:
-                    try:
-                        if float(val) > limit_val:
-                            item.setForeground(QColor(255, 0, 0))
-                    except:
-                        pass
-                self.tableWidget.setItem(row_i, col_i, item)
+            rows = sorted(self.all_data, key=lambda x: x[2].lower())
+        else:
+            rows = list(self.all_data)
+        self.tableModel.setRows(self.resultColumns(), rows)
+        self.adjustColumnWidth()
+        self.applyCompoundFilter()
+        self.applyLimitHighlight()
+
+    def applyCompoundFilter(self):
+        target_type = self.compoundTypeDropdown.currentText()
+        self.tableProxy.setRowFilter(lambda r: r[5] == target_type)
+
+    def applyLimitHighlight(self):
+        limit_val = self.limitValue()
+        if limit_val is None:
+            self.tableModel.setForeground(None)
+            return
+        red = QColor(255, 0, 0)
+
+        def foreground(column, value):
+            if column == 5:
+                try:
+                    if float(value) > limit_val:
+                        return red
+                except (TypeError, ValueError):
+                    pass
+            return None
+
+        self.tableModel.setForeground(foreground)
+
+    def onSortOptionChanged(self):
+        # The dropdown order replaces any sort picked by clicking a header
+        self.tableView.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+        self.updateTable()
 
     def clearData(self):
+        if self.extractWorker is not None:
+            self.extractWorker.discard()
+        self.refreshTimer.stop()
+        self.extracted = {}
+        self.extractErrors = []
         self.all_data.clear()
-        self.tableWidget.setRowCount(0)
+        self.updateTable()
 
     def addToBatch(self):
         if not self.all_data:
@@ -492,10 +579,32 @@ class PearlGroundwaterExtractor(QWidget):
         batch_name, ok = QInputDialog.getText(self, "Batch Name", "Enter batch name:")
         if not ok or not batch_name.strip():
             batch_name = f"Batch_{len(self.batches) + 1}"
-        new_copy = [row[:] for row in self.all_data]
-        self.batches.append((batch_name, new_copy))
+        # Rows are immutable tuples, so the batch only holds references
+        self.batches.append((batch_name, tuple(self.all_data)))
         QMessageBox.information(self, "Batch Added", "Batch added successfully.")
 
+    def limitValue(self):
+        """Limit picked in the dropdown, or None for "(no limit)" """
+        ls = self.limitDropdown.currentText()
+        if not ls.startswith("("):
+            try:
+                return float(ls.split()[0])
+            except (IndexError, ValueError):
+                pass
+        return None
+
+    def writeWorkbook(self, path, export):
+        """Write the workbook built by export(exporter, limit) to path; raises on failure"""
+        # The workbook layout is shared with the web app and the CLI
+        exporter = WorkbookExporter()
+        exporter.all_data = self.all_data
+        exporter.batches = self.batches
+        ok, result = export(exporter, self.limitValue())
+        if not ok:
+            raise RuntimeError(result)
+        with open(path, "wb") as f:
+            f.write(result.getbuffer())
+
     def exportToExcelSingle(self):
         if not self.all_data:
             QMessageBox.warning(self, "No Data", "No extracted data.")
@@ -506,66 +615,7 @@ class PearlGroundwaterExtractor(QWidget):
         if not path:
             return
         try:
-            limit_val = None
-            ls = self.limitDropdown.currentText()
-            if not ls.startswith("("):
-                try:
-                    limit_val = float(ls.split()[0])
-                except:
-                    pass
-            parents = []
-            mets = []
-            for row in self.all_data:
-                if row[5] == "Parent":
-                    parents.append(row)
-                else:
-                    mets.append(row)
-            parents.sort(key=lambda x: x[1].lower())
-            mets.sort(key=lambda x: x[1].lower())
-            wb = xlsxwriter.Workbook(path)
-            ws = wb.add_worksheet("Results")
-            header_fmt = wb.add_format({"bold": True, "bg_color": "#82C940"})
-            red_fmt = wb.add_format({"font_color": "red"})
-            columns = [
-                "Project",
-                "Filename",
-                "Scenario",
-                "Compound",
-                "80th Percentile (µg/L)",
-            ]
-
-            def write_table(start_row, data_rows, title):
-                col_width = [len(c) for c in columns]
-                ws.write(start_row, 0, title, wb.add_format({"bold": True}))
-                row_cursor = start_row + 1
-                for col_i, h in enumerate(columns):
-                    ws.write(row_cursor, col_i, h, header_fmt)
-                row_cursor += 1
-                for rdat in data_rows:
-                    reorder = [rdat[0], rdat[1], rdat[2], rdat[3], rdat[4]]
-                    for cc, valx in enumerate(reorder):
-                        txt = str(valx)
-                        if cc == 4:
-                            try:
-                                fv = float(txt)
-                                ws.write_number(row_cursor, cc, fv)
-                                if limit_val is not None and fv > limit_val:
-                                    ws.write(row_cursor, cc, fv, red_fmt)
-                            except:
-                                ws.write(row_cursor, cc, txt)
-                            col_width[cc] = max(col_width[cc], len(txt))
-                        else:
-                            ws.write(row_cursor, cc, txt)
-                            col_width[cc] = max(col_width[cc], len(txt))
-                    row_cursor += 1
-                for cidx in range(len(columns)):
-                    ws.set_column(cidx, cidx, col_width[cidx] + 2)
-                return row_cursor
-
-            nextrow = write_table(0, parents, "Parent Table")
-            nextrow += 1
-            write_table(nextrow, mets, "Metabolite Table")
-            wb.close()
+            self.writeWorkbook(path, WorkbookExporter.export_to_excel_single)
             if self.chkOpenExcelSingle.isChecked():
                 QDesktopServices.openUrl(QUrl.fromLocalFile(path))
             QMessageBox.information(self, "Exported", "Exported successfully.")
@@ -582,67 +632,7 @@ class PearlGroundwaterExtractor(QWidget):
         if not path:
             return
         try:
-            limit_val = None
-            ls = self.limitDropdown.currentText()
-            if not ls.startswith("("):
-                try:
-                    limit_val = float(ls.split()[0])
-                except:
-                    pass
-            wb = xlsxwriter.Workbook(path)
-            hfmt = wb.add_format({"bold": True, "bg_color": "#82C940"})
-            redf = wb.add_format({"font_color": "red"})
-            columns = [
-                "Project",
-                "Filename",
-                "Scenario",
-                "Compound",
-                "80th Percentile (µg/L)",
-            ]
-
-            def write_section(ws, start, data_rows, title):
-                cw = [len(x) for x in columns]
-                ws.write(start, 0, title, wb.add_format({"bold": True}))
-                rowcur = start + 1
-                for c_i, h in enumerate(columns):
-                    ws.write(rowcur, c_i, h, hfmt)
-                rowcur += 1
-                for rowd in data_rows:
-                    reorder = [rowd[0], rowd[1], rowd[2], rowd[3], rowd[4]]
-                    for cc, vv in enumerate(reorder):
-                        txt = str(vv)
-                        if cc == 4:
-                            try:
-                                fv = float(txt)
-                                ws.write_number(rowcur, cc, fv)
-                                if limit_val is not None and fv > limit_val:
-                                    ws.write(rowcur, cc, fv, redf)
-                            except:
-                                ws.write(rowcur, cc, txt)
-                            cw[cc] = max(cw[cc], len(txt))
-                        else:
-                            ws.write(rowcur, cc, txt)
-                            cw[cc] = max(cw[cc], len(txt))
-                    rowcur += 1
-                for c_col in range(len(columns)):
-                    ws.set_column(c_col, c_col, cw[c_col] + 2)
-                return rowcur
-
-            for sheet_name, rows in self.batches:
-                p = []
-                m = []
-                for r in rows:
-                    if r[5] == "Parent":
-                        p.append(r)
-                    else:
-                        m.append(r)
-                p.sort(key=lambda x: x[1].lower())
-                m.sort(key=lambda x: x[1].lower())
-                wsheet = wb.add_worksheet(sheet_name[:31])
-                next_r = write_section(wsheet, 0, p, "Parent Table")
-                next_r += 1
-                write_section(wsheet, next_r, m, "Metabolite Table")
-            wb.close()
+            self.writeWorkbook(path, WorkbookExporter.export_batches)
             if self.chkBatchMode.isChecked():
                 if self.chkOpenExcelBatch.isChecked():
                     QDesktopServices.openUrl(QUrl.fromLocalFile(path))
@@ -653,7 +643,6 @@ class PearlGroundwaterExtractor(QWidget):
         except Exception as e:
             QMessageBox.warning(self, "Export Error", str(e))
 
-
 if __name__ == "__main__":
     app = QApplication(sys.argv)
     script_dir = os.path.dirname(os.path.realpath(__file__))
@@ -1,15 +1,31 @@
+import glob
+import hashlib
+import json
+import logging
 import os
-import re
-import xlsxwriter
+from concurrent.futures import ThreadPoolExecutor
 from io import BytesIO
-from flask import send_file
+from core import pearl
+from core.batch_store import BatchStore
+from core.parse_cache import parse_cache as shared_parse_cache
+from core.xlsx import SheetWriter, WorkbookStyles, highlight_numbers, safe_sheet_name
+
+logger = logging.getLogger(__name__)
+
+# Columns of the flat CSV / JSON Lines / Parquet export
+TABLE_COLUMNS = ["Project", "Filename", "Compound Type", "Scenario", "Compound", "80th Percentile (µg/L)"]
 
 class PearlGroundwaterExtractor:
-    def __init__(self):
+    def __init__(self, parse_cache=None, results_index=None, batch_store=None):
         self.main_dir = ""
         self.sum_filepaths = []
         self.all_data = []
-        self.batches = []
+        self.batches = batch_store if batch_store is not None else BatchStore()
+        # Bumped whenever all_data changes; keys the ETags of table responses
+        self.result_version = 0
+        self._data_digest = (None, None)  # (result_version, digest of all_data)
+        self.parse_cache = parse_cache if parse_cache is not None else shared_parse_cache
+        self.results_index = results_index
 
     def scan_directory(self, directory_path):
         """Scan directory for .sum files and return list of found files"""
@@ -50,42 +66,28 @@ class PearlGroundwaterExtractor:
                 continue
                 
             try:
-                with open(file_path, "r", encoding="ISO-8859-1") as f:
-                    content = f.read()
+                rows, _ = self.parse_cache.get_or_parse("pearl", file_path, self.parse_sum_file)
             except Exception as e:
-                print(f"Cannot read {file_path}: {str(e)}")
+                logger.warning("Cannot read %s: %s", file_path, e)
                 continue
-                
-            # Extract project name
-            p = re.search(r"Application_scheme\s+(\S+)", content)
-            project = p.group(1) if p else "Unknown"
-            
-            # Extract scenario/location
-            s = re.search(r"Location\s*[:]*\s*(.*)", content)
-            scenario_raw = s.group(1).strip() if s else "Unknown"
-            scenario = scenario_raw.capitalize()
             
-            # Extract compound results
-            comp_list = re.findall(r"Result_(\S+)\s+([\d.]+)", content)
-            
-            for i, (comp, val_str) in enumerate(comp_list):
-                ctype = "Parent" if i == 0 else "Metabolite"
-                try:
-                    val = float(val_str)
-                except:
-                    val = 0.0
-                    
-                self.all_data.append([
-                    project, 
-                    os.path.basename(file_path), 
-                    scenario, 
-                    comp, 
-                    val, 
-                    ctype
-                ])
+            # Rows are immutable tuples, shared with the parse cache and batches
+            self.all_data.extend(rows)
+        self.result_version += 1
+        
+        if self.results_index is not None and self.all_data:
+            try:
+                self.results_index.index_pearl(self.main_dir, self.all_data, self.sum_filepaths)
+            except Exception as e:
+                logger.warning("Error indexing results: %s", e)
         
         return self.get_table_data()
 
+    # The .sum parser lives in core.pearl, shared by every entry point;
+    # read_summary returns the full typed record behind the rows
+    parse_sum_file = staticmethod(pearl.parse_sum_file)
+    read_summary = staticmethod(pearl.read_summary)
+
     def get_table_data(self, compound_type="Parent", sort_by="Filename", limit_val=None):
         """Get filtered and sorted data for table display"""
         # Filter by compound type
@@ -135,14 +137,81 @@ class PearlGroundwaterExtractor:
         if not batch_name or not batch_name.strip():
             batch_name = f"Batch_{len(self.batches) + 1}"
         
-        new_copy = [row[:] for row in self.all_data]
-        self.batches.append((batch_name, new_copy))
+        self.batches.add(batch_name, self.all_data)
         
         return True, f"Batch '{batch_name}' added successfully"
 
+    def batch_groups(self, main_dir, patterns=None):
+        """{batch name: sorted .sum paths} under main_dir
+
+        Without patterns every subdirectory holding .sum files is a batch.
+        patterns maps batch names to glob patterns relative to main_dir (a
+        list uses each pattern as its own name); ** matches nested folders.
+        """
+        groups = {}
+        if patterns:
+            if not isinstance(patterns, dict):
+                patterns = {pattern: pattern for pattern in patterns}
+            for name, pattern in patterns.items():
+                paths = glob.glob(os.path.join(main_dir, pattern), recursive=True)
+                groups[name] = sorted(p for p in paths if p.endswith(".sum") and os.path.isfile(p))
+        else:
+            for entry in sorted(os.scandir(main_dir), key=lambda e: e.name):
+                if entry.is_dir():
+                    groups[entry.name] = sorted(
+                        e.path for e in os.scandir(entry.path) if e.name.endswith(".sum") and e.is_file()
+                    )
+        return {name: paths for name, paths in groups.items() if paths}
+
+    def build_batches(self, main_dir, patterns=None, max_workers=8):
+        """Extract every group of batch_groups concurrently and add each as a batch
+
+        Returns ({batch name: (file count, row count)}, errors) in group order.
+        A batch that already exists under a group's name is replaced in place.
+        The current result (all_data) is left untouched.
+        """
+        groups = self.batch_groups(main_dir, patterns)
+        # A file matched by several glob groups is parsed once
+        paths = list(dict.fromkeys(path for group in groups.values() for path in group))
+        if not paths:
+            return {}, []
+
+        def parse(path):
+            try:
+                return self.parse_cache.get_or_parse("pearl", path, self.parse_sum_file)[0], None
+            except Exception as e:
+                return (), f"Cannot read {path}: {str(e)}"
+
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(paths))) as pool:
+            parsed = dict(zip(paths, pool.map(parse, paths)))
+
+        built = {}
+        errors = []
+        all_rows = []
+        for name, group in groups.items():
+            rows = []
+            for path in group:
+                file_rows, error = parsed[path]
+                if error:
+                    errors.append(error)
+                rows.extend(file_rows)
+            if rows:
+                self.batches.add(name, rows, replace=True)
+                built[name] = (len(group), len(rows))
+                all_rows.extend(rows)
+
+        if self.results_index is not None and all_rows:
+            try:
+                self.results_index.index_pearl(main_dir, all_rows, paths)
+            except Exception as e:
+                logger.warning("Error indexing results: %s", e)
+
+        return built, errors
+
     def clear_data(self):
         """Clear all extracted data"""
         self.all_data.clear()
+        self.result_version += 1
         return True, "Data cleared"
 
     def clear_batches(self):
@@ -150,6 +219,56 @@ class PearlGroundwaterExtractor:
         self.batches.clear()
         return True, "Batches cleared"
 
+    def export_table(self, batch_mode=False):
+        """(header, rows) of the flat tabular export; batch mode adds a leading Batch column"""
+        if batch_mode:
+            rows = (
+                [name, r[0], r[1], r[5], r[2], r[3], r[4]]
+                for name, batch_rows in self.batches
+                for r in batch_rows
+            )
+            return ["Batch"] + TABLE_COLUMNS, rows
+        return TABLE_COLUMNS, ([r[0], r[1], r[5], r[2], r[3], r[4]] for r in self.all_data)
+
+    def _write_result_table(self, writer, styles, start_row, data_rows, title, limit_val=None):
+        """Write a titled Parent/Metabolite table and return the next free row
+
+        Each cell is written once; values above the limit are highlighted by a
+        single conditional format over the percentile column.
+        """
+        columns = [
+            "Project",
+            "Filename",
+            "Scenario",
+            "Compound",
+            "80th Percentile (µg/L)",
+        ]
+        # The title spans the table, so it does not count towards column widths
+        writer.worksheet.write(start_row, 0, title, styles["title"])
+        row_cursor = start_row + 1
+        
+        # Write headers
+        writer.write_row(row_cursor, 0, columns, styles["header"])
+        row_cursor += 1
+        first_data_row = row_cursor
+        
+        # Write data
+        for rdat in data_rows:
+            for cc in range(4):
+                writer.write(row_cursor, cc, str(rdat[cc]))
+            # 80th Percentile column: numeric where possible, original text otherwise
+            txt = str(rdat[4])
+            try:
+                writer.write_number(row_cursor, 4, float(txt))
+            except ValueError:
+                writer.write(row_cursor, 4, txt)
+            row_cursor += 1
+        
+        if limit_val is not None:
+            highlight_numbers(writer.worksheet, first_data_row, 4, row_cursor - 1, ">", limit_val, styles["exceeds"])
+        
+        return row_cursor
+
     def export_to_excel_single(self, limit_val=None):
         """Export single mode data to Excel"""
         if not self.all_data:
@@ -168,61 +287,20 @@ class PearlGroundwaterExtractor:
             parents.sort(key=lambda x: x[1].lower())
             mets.sort(key=lambda x: x[1].lower())
             
+            # Only needed for export, so keep it off the import path
+            import xlsxwriter
+            
             # Create Excel file in memory
             output = BytesIO()
             wb = xlsxwriter.Workbook(output)
-            ws = wb.add_worksheet("Results")
-            
-            header_fmt = wb.add_format({"bold": True, "bg_color": "#82C940"})
-            red_fmt = wb.add_format({"font_color": "red"})
+            styles = WorkbookStyles(wb)
+            writer = SheetWriter(wb.add_worksheet("Results"))
             
-            columns = [
-                "Project",
-                "Filename", 
-                "Scenario",
-                "Compound",
-                "80th Percentile (µg/L)",
-            ]
-
-            def write_table(start_row, data_rows, title):
-                col_width = [len(c) for c in columns]
-                ws.write(start_row, 0, title, wb.add_format({"bold": True}))
-                row_cursor = start_row + 1
-                
-                # Write headers
-                for col_i, h in enumerate(columns):
-                    ws.write(row_cursor, col_i, h, header_fmt)
-                row_cursor += 1
-                
-                # Write data
-                for rdat in data_rows:
-                    reorder = [rdat[0], rdat[1], rdat[2], rdat[3], rdat[4]]
-                    for cc, valx in enumerate(reorder):
-                        txt = str(valx)
-                        if cc == 4:  # 80th Percentile column
-                            try:
-                                fv = float(txt)
-                                ws.write_number(row_cursor, cc, fv)
-                                if limit_val is not None and fv > limit_val:
-                                    ws.write(row_cursor, cc, fv, red_fmt)
-                            except:
-                                ws.write(row_cursor, cc, txt)
-                            col_width[cc] = max(col_width[cc], len(txt))
-                        else:
-                            ws.write(row_cursor, cc, txt)
-                            col_width[cc] = max(col_width[cc], len(txt))
-                    row_cursor += 1
-                
-                # Set column widths
-                for cidx in range(len(columns)):
-                    ws.set_column(cidx, cidx, col_width[cidx] + 2)
-                
-                return row_cursor
-
             # Write parent and metabolite tables
-            nextrow = write_table(0, parents, "Parent Table")
+            nextrow = self._write_result_table(writer, styles, 0, parents, "Parent Table", limit_val)
             nextrow += 1
-            write_table(nextrow, mets, "Metabolite Table")
+            self._write_result_table(writer, styles, nextrow, mets, "Metabolite Table", limit_val)
+            writer.fit_columns()
             
             wb.close()
             output.seek(0)
@@ -238,56 +316,15 @@ class PearlGroundwaterExtractor:
             return False, "No batches to export"
         
         try:
+            import xlsxwriter
             output = BytesIO()
             wb = xlsxwriter.Workbook(output)
-            hfmt = wb.add_format({"bold": True, "bg_color": "#82C940"})
-            redf = wb.add_format({"font_color": "red"})
+            styles = WorkbookStyles(wb)
             
-            columns = [
-                "Project",
-                "Filename",
-                "Scenario", 
-                "Compound",
-                "80th Percentile (µg/L)",
-            ]
-
-            def write_section(ws, start, data_rows, title):
-                cw = [len(x) for x in columns]
-                ws.write(start, 0, title, wb.add_format({"bold": True}))
-                rowcur = start + 1
-                
-                # Write headers
-                for c_i, h in enumerate(columns):
-                    ws.write(rowcur, c_i, h, hfmt)
-                rowcur += 1
-                
-                # Write data
-                for rowd in data_rows:
-                    reorder = [rowd[0], rowd[1], rowd[2], rowd[3], rowd[4]]
-                    for cc, vv in enumerate(reorder):
-                        txt = str(vv)
-                        if cc == 4:  # 80th Percentile column
-                            try:
-                                fv = float(txt)
-                                ws.write_number(rowcur, cc, fv)
-                                if limit_val is not None and fv > limit_val:
-                                    ws.write(rowcur, cc, fv, redf)
-                            except:
-                                ws.write(rowcur, cc, txt)
-                            cw[cc] = max(cw[cc], len(txt))
-                        else:
-                            ws.write(rowcur, cc, txt)
-                            cw[cc] = max(cw[cc], len(txt))
-                    rowcur += 1
-                
-                # Set column widths
-                for c_col in range(len(columns)):
-                    ws.set_column(c_col, c_col, cw[c_col] + 2)
-                
-                return rowcur
-
-            # Write each batch to separate worksheet
-            for sheet_name, rows in self.batches:
+            # Write each batch to separate worksheet; spilled batches are
+            # read back one at a time
+            used_sheet_names = set()
+            for batch_name, rows in self.batches:
                 p = []
                 m = []
                 for r in rows:
@@ -299,10 +336,11 @@ class PearlGroundwaterExtractor:
                 p.sort(key=lambda x: x[1].lower())
                 m.sort(key=lambda x: x[1].lower())
                 
-                wsheet = wb.add_worksheet(sheet_name[:31])  # Excel sheet name limit
-                next_r = write_section(wsheet, 0, p, "Parent Table")
+                writer = SheetWriter(wb.add_worksheet(safe_sheet_name(batch_name, used_sheet_names)))
+                next_r = self._write_result_table(writer, styles, 0, p, "Parent Table", limit_val)
                 next_r += 1
-                write_section(wsheet, next_r, m, "Metabolite Table")
+                self._write_result_table(writer, styles, next_r, m, "Metabolite Table", limit_val)
+                writer.fit_columns()
             
             wb.close()
             output.seek(0)
@@ -312,10 +350,26 @@ class PearlGroundwaterExtractor:
         except Exception as e:
             return False, f"Export error: {str(e)}"
 
+    def export_fingerprint(self):
+        """Key for exports of the current data and batches
+
+        Exports only use the extracted rows, so they are hashed directly: the
+        current rows once per result_version, batches by the digest taken when
+        they were added. Re-extracting changed .sum files changes the rows and
+        thus the key.
+        """
+        version, digest = self._data_digest
+        if version != self.result_version or digest is None:
+            encoded = json.dumps(self.all_data, default=str)
+            digest = hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+            self._data_digest = (self.result_version, digest)
+        encoded = json.dumps([digest, self.batches.fingerprint()])
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()[:32]
+
     def get_available_files(self):
         """Get list of available .sum files"""
         return [os.path.basename(path) for path in self.sum_filepaths]
 
     def get_batches(self):
         """Get list of current batches"""
-        return [name for name, _ in self.batches]
+        return self.batches.names()
@@ -1,4 +1,4 @@
-from flask import Blueprint, render_template, request, jsonify, send_file
+from flask import Blueprint, render_template, request, jsonify
 import os
 import re
 import tempfile
@@ -75,19 +75,3 @@ def export_excel():
         })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
-
-@pearlex.route('/download_excel/<path:file_path>')
-def download_excel(file_path):
-    """Download Excel file"""
-    try:
-        if not os.path.exists(file_path):
-            return jsonify({'error': 'File not found'}), 404
-        
-        return send_file(
-            file_path,
-            as_attachment=True,
-            download_name='pearlex_data.xlsx',
-            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        )
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500 
\ No newline at end of file
@@ -4,7 +4,6 @@ os.environ["QT_API"] = "pyqt5"
 print("QT_API is set to:", os.environ["QT_API"])
 
 import sys
-import re
 import PyQt5.QtCore
 import PyQt5.QtGui
 import PyQt5.QtWidgets
@@ -17,8 +16,7 @@ from PyQt5.QtWidgets import (
     QFileDialog,
     QVBoxLayout,
     QHBoxLayout,
-    QTableWidget,
-    QTableWidgetItem,
+    QTableView,
     QLabel,
     QCheckBox,
     QListWidget,
@@ -26,12 +24,24 @@ from PyQt5.QtWidgets import (
     QMessageBox,
     QMenu,
     QHeaderView,
+    QProgressBar,
 )
 from PyQt5.QtGui import QPixmap, QColor, QDesktopServices, QFont, QIcon
-from PyQt5.QtCore import Qt, QUrl, QSize
+from PyQt5.QtCore import (
+    Qt,
+    QUrl,
+    QSize,
+    QThread,
+    QTimer,
+)
+
+# Let the script run from its own folder and still import the shared packages
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-import xlsxwriter
-from xlsxwriter.utility import xl_range
+from core import pelmo
+from core.parse_cache import parse_cache
+from gui_common.qt_models import ExtractionWorker, ResultsTableModel, ResultsProxyModel
+from pelmoex.extractor import PELMOExtractor as WorkbookExporter
 
 
 class PELMOExtractor(QWidget):
@@ -45,6 +55,15 @@ class PELMOExtractor(QWidget):
         self.all_rows = []
         # Default parametric limit value is not set until the user selects one.
         self.limit_value = None
+        self.extractThread = None
+        self.extractWorker = None
+        self.extracted = {}
+        self.extractErrors = []
+        # Redraw the table at most every 300 ms while results stream in
+        self.refreshTimer = QTimer(self)
+        self.refreshTimer.setSingleShot(True)
+        self.refreshTimer.setInterval(300)
+        self.refreshTimer.timeout.connect(self.updateTable)
 
         self.dark_stylesheet = """
         QWidget {
@@ -53,7 +72,7 @@ class PELMOExtractor(QWidget):
             font-family: 'Segoe UI', sans-serif;
             font-size: 16px;
         }
-        QTableWidget {
+        QTableView {
             background-color: #1E1E1E;
             gridline-color: #2E2E2E;
         }
@@ -91,7 +110,7 @@ class PELMOExtractor(QWidget):
             font-family: 'Segoe UI', sans-serif;
             font-size: 16px;
         }
-        QTableWidget {
+        QTableView {
             background-color: #FFFFFF;
             gridline-color: #C0C0C0;
         }
@@ -223,15 +242,25 @@ class PELMOExtractor(QWidget):
 
         data_layout.addLayout(button_layout)
 
-        # QTable to display extracted data.
-        self.tableWidget = QTableWidget()
-        self.tableWidget.setColumnCount(0)
-        self.tableWidget.horizontalHeader().setDefaultAlignment(Qt.AlignCenter)
-        self.tableWidget.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        # Table view over the extracted rows; clicking a header sorts by that column.
+        self.tableModel = ResultsTableModel(self)
+        self.tableProxy = ResultsProxyModel(self)
+        self.tableProxy.setSourceModel(self.tableModel)
+        self.tableView = QTableView()
+        self.tableView.setModel(self.tableProxy)
+        # Unsorted until a header is clicked: rows keep the project/crop/scenario folder order
+        self.tableView.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+        self.tableView.setSortingEnabled(True)
+        self.tableView.horizontalHeader().setDefaultAlignment(Qt.AlignCenter)
+        self.tableView.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         # Enable right-click context menu for copying.
-        self.tableWidget.setContextMenuPolicy(Qt.CustomContextMenu)
-        self.tableWidget.customContextMenuRequested.connect(self.showTableContextMenu)
-        data_layout.addWidget(self.tableWidget)
+        self.tableView.setContextMenuPolicy(Qt.CustomContextMenu)
+        self.tableView.customContextMenuRequested.connect(self.showTableContextMenu)
+        data_layout.addWidget(self.tableView)
+
+        self.progressBar = QProgressBar()
+        self.progressBar.setVisible(False)
+        data_layout.addWidget(self.progressBar)
 
         layout.addLayout(file_select_layout, 1)
         layout.addLayout(data_layout, 5)
@@ -268,6 +297,11 @@ class PELMOExtractor(QWidget):
                 self.fileList.addItem(proj)
 
     def extractData(self):
+        # While an extraction runs the Extract button cancels it
+        if self.extractWorker is not None:
+            self.extractWorker.cancel()
+            self.btnExtract.setEnabled(False)
+            return
         try:
             if not self.main_dir:
                 QMessageBox.warning(self, "Error", "Please select a PELMO directory first!")
@@ -278,8 +312,8 @@ class PELMOExtractor(QWidget):
                 QMessageBox.warning(self, "Error", "Please select one or more project folders for extraction!")
                 return
 
-            all_rows = []
-            all_extra_keys = set()  # To collect extra column names (active substance and metabolites)
+            # Folder checks run here; the period.plm files are parsed by the worker
+            jobs = []
             for item in selected_items:
                 project_folder_name = item.text()
                 project_path = os.path.join(self.main_dir, project_folder_name)
@@ -323,22 +357,7 @@ class PELMOExtractor(QWidget):
                             )
                             continue
                         scenario_found = True
-                        active_substance, active_pec_value, metabolites = self.extract_active_substance_and_metabolites(period_plm_path)
-                        if not active_substance or not active_pec_value:
-                            continue
-                        row = {}
-                        # Include the project name in the row.
-                        row["Project"] = project_folder_name
-                        row["Crop"] = self.extract_crop_from_path(period_plm_path)
-                        row["Scenario"] = self.extract_scenario_from_path(period_plm_path)
-                        active_col = f"{active_substance} µg/l"
-                        row[active_col] = self.convert_to_numeric(active_pec_value)
-                        all_extra_keys.add(active_col)
-                        for met, pec in metabolites:
-                            colname = f"{met} µg/l"
-                            row[colname] = self.convert_to_numeric(pec)
-                            all_extra_keys.add(colname)
-                        all_rows.append(row)
+                        jobs.append(((len(jobs), project_folder_name, period_plm_path), period_plm_path))
                     if not scenario_found:
                         QMessageBox.critical(
                             self,
@@ -346,96 +365,134 @@ class PELMOExtractor(QWidget):
                             f"No valid scenario folder with 'period.plm' found in crop folder '{crop_folder}'.",
                         )
 
-            if not all_rows:
+            if not jobs:
                 QMessageBox.critical(
                     self,
                     "Extraction Error",
                     "No valid period.plm files were found in any crop/scenario folder.",
                 )
                 return
-
-            # Build the table header: fixed columns plus extra keys.
-            header = ["Project", "Crop", "Scenario"] + sorted(all_extra_keys)
-            for row in all_rows:
-                for key in header:
-                    if key not in row:
-                        row[key] = ""
-            # Update the table widget.
-            self.tableWidget.setColumnCount(len(header))
-            self.tableWidget.setHorizontalHeaderLabels(header)
-            self.tableWidget.setRowCount(len(all_rows))
-            for row_idx, row in enumerate(all_rows):
-                for col_idx, key in enumerate(header):
-                    item = QTableWidgetItem(str(row[key]))
-                    self.tableWidget.setItem(row_idx, col_idx, item)
-
-            # Store the extracted rows for use in Excel export.
-            self.all_rows = all_rows
-            self.applyTableConditionalFormatting()
+            self.startExtraction(jobs)
 
         except Exception as e:
             QMessageBox.critical(self, "Extraction Error", f"Failed to extract data: {str(e)}")
 
+    def startExtraction(self, jobs):
+        self.extracted = {}
+        self.extractErrors = []
+        self.updateTable()
+        self.progressBar.setRange(0, len(jobs))
+        self.progressBar.setValue(0)
+        self.progressBar.setVisible(True)
+        self.btnExtract.setText("Cancel Extraction")
+
+        self.extractThread = QThread(self)
+        self.extractWorker = ExtractionWorker(jobs, self.parsePeriodFile)
+        self.extractWorker.moveToThread(self.extractThread)
+        self.extractThread.started.connect(self.extractWorker.run)
+        self.extractWorker.fileDone.connect(self.onFileExtracted)
+        self.extractWorker.fileFailed.connect(self.onFileFailed)
+        self.extractWorker.progress.connect(self.onExtractionProgress)
+        self.extractWorker.finished.connect(self.onExtractionFinished)
+        self.extractWorker.finished.connect(self.extractThread.quit)
+        self.extractThread.finished.connect(self.extractWorker.deleteLater)
+        self.extractThread.finished.connect(self.extractThread.deleteLater)
+        self.extractThread.start()
+
+    def parsePeriodFile(self, file_path):
+        """(active substance, 80th percentile PEC, metabolites) of one period.plm; runs on the worker's threads"""
+        result, _ = parse_cache.get_or_parse("pelmo", file_path, pelmo.parse_period_plm)
+        return result
+
+    def onFileExtracted(self, key, result):
+        if self.extractWorker.discarded:
+            return  # cleared while the file was being parsed
+        index, project_folder_name, period_plm_path = key
+        row = pelmo.result_row(project_folder_name, period_plm_path, result)
+        if row is None:
+            return
+        self.extracted[index] = row
+        if not self.refreshTimer.isActive():
+            self.refreshTimer.start()
+
+    def onFileFailed(self, key, message):
+        if self.extractWorker.discarded:
+            return
+        self.extractErrors.append(f"{key[2]}: {message}")
+
+    def onExtractionProgress(self, done, total):
+        self.progressBar.setValue(done)
+        self.progressBar.setFormat(f"{done} / {total} files")
+
+    def onExtractionFinished(self, cancelled):
+        self.refreshTimer.stop()
+        discarded = self.extractWorker.discarded
+        if not discarded:
+            self.updateTable()
+        self.extractWorker = None
+        self.extractThread = None
+        self.progressBar.setVisible(False)
+        self.btnExtract.setText("Extract Data")
+        self.btnExtract.setEnabled(True)
+
+        if discarded:
+            return
+        if self.extractErrors:
+            QMessageBox.warning(self, "Extraction Errors", "\n".join(self.extractErrors))
+        elif cancelled:
+            QMessageBox.information(self, "Extraction Cancelled", "Extraction cancelled; the files read so far are shown.")
+        elif not self.all_rows:
+            QMessageBox.critical(
+                self,
+                "Extraction Error",
+                "No valid period.plm files were found in any crop/scenario folder.",
+            )
+
+    def updateTable(self):
+        """Show the rows parsed so far, in project/crop/scenario folder order"""
+        all_rows = [self.extracted[index] for index in sorted(self.extracted)]
+        # Build the table header: fixed columns plus extra keys (active substance and metabolites).
+        header = pelmo.result_header(all_rows)
+        for row in all_rows:
+            for key in header:
+                if key not in row:
+                    row[key] = ""
+        # The model reads the rows in place; cells are formatted as they are painted.
+        self.tableModel.setRows(
+            [(key, lambda row, key=key: row[key]) for key in header] if all_rows else [],
+            all_rows,
+        )
+
+        # Store the extracted rows for use in Excel export.
+        self.all_rows = all_rows
+        self.applyTableConditionalFormatting()
+
+    def closeEvent(self, event):
+        if self.extractWorker is not None:
+            self.extractWorker.cancel()
+            self.extractThread.quit()
+            self.extractThread.wait()
+        super().closeEvent(event)
+
     def applyTableConditionalFormatting(self):
-        if self.limit_value is not None:
-            for row in range(self.tableWidget.rowCount()):
-                # Assume numeric columns start after the first three fixed columns.
-                for col in range(3, self.tableWidget.columnCount()):
-                    item = self.tableWidget.item(row, col)
-                    if item:
-                        try:
-                            val = float(item.text())
-                            if val >= self.limit_value:
-                                item.setForeground(QColor("red"))
-                            else:
-                                item.setForeground(QColor("white") if self.is_dark_mode else QColor("black"))
-                        except ValueError:
-                            pass
-
-    def extract_active_substance_and_metabolites(self, file_path):
-        active_substance = None
-        active_pec_value = None
-        metabolites = []
-        metabolite = None
-
-        with open(file_path, "r", encoding="ISO-8859-1") as file:
-            for line in file:
-                if "Results for ACTIVE SUBSTANCE" in line and "percolate at 1 m soil depth" in line:
-                    match = re.search(r"Results for ACTIVE SUBSTANCE \((.*?)\)", line)
-                    if match:
-                        active_substance = match.group(1)
-                if active_substance and "80 Perc." in line:
-                    active_pec_value = line.split()[-1]
-                if "Results for METABOLITE" in line and "percolate at 1 m soil depth" in line:
-                    match = re.search(r"Results for METABOLITE.*?\((.*?)\)", line)
-                    if match:
-                        metabolite = match.group(1)
-                if metabolite and "80 Perc." in line:
-                    pec_value = line.split()[-1]
-                    metabolites.append((metabolite, pec_value))
-                    metabolite = None
-
-        return active_substance, active_pec_value, metabolites
-
-    def extract_scenario_from_path(self, file_path):
-        folder_name = os.path.basename(os.path.dirname(file_path))
-        scenario = folder_name.split("_-_")[0] if "_-_" in folder_name else folder_name
-        return scenario
-
-    def extract_crop_from_path(self, file_path):
-        folder_parts = os.path.normpath(file_path).split(os.sep)
-        if len(folder_parts) >= 3:
-            third_last_folder = folder_parts[-3]
-            crop = third_last_folder.split(".run")[0] if ".run" in third_last_folder else third_last_folder
-            crop = crop.replace("_-_", " ")
-            return crop
-        return None
-
-    def convert_to_numeric(self, value):
-        try:
-            return float(value)
-        except ValueError:
-            return value
+        """Colour the substance columns against the limit; applied by the model at paint time"""
+        if self.limit_value is None:
+            self.tableModel.setForeground(None)
+            return
+        limit_value = self.limit_value
+        exceeds = QColor("red")
+        within = QColor("white") if self.is_dark_mode else QColor("black")
+
+        def foreground(column, value):
+            # Assume numeric columns start after the first three fixed columns.
+            if column < 3:
+                return None
+            try:
+                return exceeds if float(value) >= limit_value else within
+            except (TypeError, ValueError):
+                return None
+
+        self.tableModel.setForeground(foreground)
 
     def updateLimitValue(self):
         current = self.paramLimitComboBox.currentText().strip()
@@ -498,100 +555,27 @@ class PELMOExtractor(QWidget):
         if not filePath:
             return
 
-        workbook = xlsxwriter.Workbook(filePath)
-        # Group rows by project.
-        projects = {}
-        for row in self.all_rows:
-            proj = row["Project"]
-            projects.setdefault(proj, []).append(row)
-
-        used_sheet_names = set()
-        for project, rows in projects.items():
-            # Create a sheet name from the project folder name.
-            sheet_name = project[:-4] if project.lower().endswith(".run") else project
-            if len(sheet_name) > 31:
-                sheet_name = sheet_name[:31]
-            orig_sheet_name = sheet_name
-            count = 1
-            while sheet_name in used_sheet_names:
-                sheet_name = f"{orig_sheet_name}_{count}"
-                count += 1
-            used_sheet_names.add(sheet_name)
-
-            worksheet = workbook.add_worksheet(sheet_name)
-            # Re-calculate header for this project.
-            header = ["Project", "Crop", "Scenario"]
-            extra_keys = set()
-            for row in rows:
-                for key in row.keys():
-                    if key not in ["Project", "Crop", "Scenario"]:
-                        extra_keys.add(key)
-            header.extend(sorted(extra_keys))
-
-            header_format = workbook.add_format({"bold": True, "bg_color": "#DFF0D8", "border": 1})
-            for col, header_text in enumerate(header):
-                worksheet.write(0, col, header_text, header_format)
-
-            for r, row in enumerate(rows, start=1):
-                for col, key in enumerate(header):
-                    value = row.get(key, "")
-                    try:
-                        num_value = float(value)
-                        worksheet.write_number(r, col, num_value)
-                    except ValueError:
-                        worksheet.write(r, col, value)
-
-            # Adjust column widths.
-            for col in range(len(header)):
-                max_width = len(header[col])
-                for row in rows:
-                    cell_text = str(row.get(header[col], ""))
-                    max_width = max(max_width, len(cell_text))
-                worksheet.set_column(col, col, max_width + 2)
-
-            if self.limit_value is not None:
-                red_format = workbook.add_format({"font_color": "red"})
-                green_format = workbook.add_format({"font_color": "green"})
-                for col in range(3, len(header)):
-                    cell_range = xl_range(1, col, len(rows), col)
-                    worksheet.conditional_format(cell_range, {
-                        "type": "cell",
-                        "criteria": ">=",
-                        "value": self.limit_value,
-                        "format": red_format,
-                    })
-                    worksheet.conditional_format(cell_range, {
-                        "type": "cell",
-                        "criteria": "<",
-                        "value": self.limit_value,
-                        "format": green_format,
-                    })
-
-        workbook.close()
+        # The workbook layout is shared with the web app and the CLI
+        exporter = WorkbookExporter()
+        exporter.all_rows = self.all_rows
+        exporter.limit_value = self.limit_value
+        exporter.export_to_excel(filePath)
         QMessageBox.information(self, "Export Successful", f"Data exported to {filePath}")
         if self.chkOpenExcel.isChecked():
             QDesktopServices.openUrl(QUrl.fromLocalFile(filePath))
 
     def resetApplication(self):
-        self.tableWidget.setRowCount(0)
-        self.tableWidget.setColumnCount(0)  # Clear column headings
+        if self.extractWorker is not None:
+            self.extractWorker.discard()
+        self.refreshTimer.stop()
+        self.extracted = {}
+        self.extractErrors = []
+        self.tableModel.setRows([], [])  # Clear column headings
         self.all_rows.clear()
 
     def copyTableToClipboard(self):
-        clipboard_text = ""
-        colCount = self.tableWidget.columnCount()
-        rowCount = self.tableWidget.rowCount()
-        headers = []
-        for col in range(colCount):
-            header_item = self.tableWidget.horizontalHeaderItem(col)
-            header_text = header_item.text() if header_item else ""
-            headers.append(header_text)
-        clipboard_text += "\t".join(headers) + "\n"
-        for row in range(rowCount):
-            row_data = []
-            for col in range(colCount):
-                item = self.tableWidget.item(row, col)
-                row_data.append(item.text() if item else "")
+        clipboard_text = "\t".join(self.tableModel.headers()) + "\n"
+        for row_data in self.tableProxy.rowsText():
             clipboard_text += "\t".join(row_data) + "\n"
         QApplication.clipboard().setText(clipboard_text)
         QMessageBox.information(self, "Copied", "Table data copied to clipboard.")
@@ -599,7 +583,7 @@ class PELMOExtractor(QWidget):
     def showTableContextMenu(self, pos):
         menu = QMenu(self)
         copyAction = menu.addAction("Copy")
-        action = menu.exec_(self.tableWidget.viewport().mapToGlobal(pos))
+        action = menu.exec_(self.tableView.viewport().mapToGlobal(pos))
         if action == copyAction:
             self.copyTableToClipboard()
 
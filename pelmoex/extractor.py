@@ -1,70 +1,45 @@
+import logging
 import os
-import re
-import xlsxwriter
+from core import pelmo
+from core.parse_cache import parse_cache as shared_parse_cache, source_fingerprint
+from core.xlsx import SheetWriter, WorkbookStyles
+
+logger = logging.getLogger(__name__)
+
 
 class PELMOExtractor:
-    def __init__(self):
+    def __init__(self, parse_cache=None, results_index=None):
         self.main_dir = ""
         self.all_rows = []
+        self.row_files = []
+        self.active_columns = set()
         self.limit_value = None
-
-    def extract_active_substance_and_metabolites(self, file_path):
-        active_substance = None
-        active_pec_value = None
-        metabolites = []
-        metabolite = None
-
-        print(f"DEBUG: Reading file: {file_path}")
-        
-        with open(file_path, "r", encoding="ISO-8859-1") as file:
-            for line in file:
-                if "Results for ACTIVE SUBSTANCE" in line and "percolate at 1 m soil depth" in line:
-                    match = re.search(r"Results for ACTIVE SUBSTANCE \((.*?)\)", line)
-                    if match:
-                        active_substance = match.group(1)
-                        print(f"DEBUG: Found active substance: {active_substance}")
-                if active_substance and "80 Perc." in line:
-                    active_pec_value = line.split()[-1]
-                    print(f"DEBUG: Found active PEC value: {active_pec_value}")
-                if "Results for METABOLITE" in line and "percolate at 1 m soil depth" in line:
-                    match = re.search(r"Results for METABOLITE.*?\((.*?)\)", line)
-                    if match:
-                        metabolite = match.group(1)
-                        print(f"DEBUG: Found metabolite: {metabolite}")
-                if metabolite and "80 Perc." in line:
-                    pec_value = line.split()[-1]
-                    metabolites.append((metabolite, pec_value))
-                    print(f"DEBUG: Found metabolite PEC value: {metabolite} = {pec_value}")
-                    metabolite = None
-
-        print(f"DEBUG: Final results - Active: {active_substance}, PEC: {active_pec_value}, Metabolites: {metabolites}")
-        return active_substance, active_pec_value, metabolites
-
-    def extract_scenario_from_path(self, file_path):
-        folder_name = os.path.basename(os.path.dirname(file_path))
-        scenario = folder_name.split("_-_")[0] if "_-_" in folder_name else folder_name
-        return scenario
-
-    def extract_crop_from_path(self, file_path):
-        folder_parts = os.path.normpath(file_path).split(os.sep)
-        if len(folder_parts) >= 3:
-            third_last_folder = folder_parts[-3]
-            crop = third_last_folder.split(".run")[0] if ".run" in third_last_folder else third_last_folder
-            crop = crop.replace("_-_", " ")
-            return crop
-        return None
-
-    def convert_to_numeric(self, value):
-        try:
-            return float(value)
-        except ValueError:
-            return value
+        # Bumped whenever all_rows changes; keys the ETags of table responses
+        self.result_version = 0
+        self.parse_cache = parse_cache if parse_cache is not None else shared_parse_cache
+        self.extract_stats = {"reused": 0, "reparsed": 0}
+        self.results_index = results_index
+        # Measure column widths on a sample of rows beyond this many (None: every row)
+        self.width_sample_rows = None
+
+    # The period.plm parser lives in core.pelmo, shared by every entry point
+    extract_active_substance_and_metabolites = staticmethod(pelmo.parse_period_plm)
+    extract_scenario_from_path = staticmethod(pelmo.scenario_from_path)
+    extract_crop_from_path = staticmethod(pelmo.crop_from_path)
+    convert_to_numeric = staticmethod(pelmo.convert_to_numeric)
+
+    def export_fingerprint(self):
+        """Key for exports of the current result; changes with the period.plm files and limit value"""
+        return source_fingerprint(self.row_files, self.main_dir, self.limit_value, len(self.all_rows))
 
     def extract_data(self, main_dir, selected_projects, limit_value=None):
         """Extract data from PELMO directories"""
         self.main_dir = main_dir
         self.limit_value = limit_value
+        self.extract_stats = {"reused": 0, "reparsed": 0}
         all_rows = []
+        row_files = []
+        active_columns = set()
         all_extra_keys = set()
         errors = []
 
@@ -98,57 +73,68 @@ class PELMOExtractor:
                     scenario_folder_path = os.path.join(crop_folder_path, scenario_folder)
                     period_plm_path = os.path.join(scenario_folder_path, "period.plm")
                     
-                    if not os.path.exists(period_plm_path):
+                    try:
+                        plm_stat = os.stat(period_plm_path)
+                    except OSError:
                         errors.append(f"'period.plm' not found in scenario folder '{scenario_folder}'")
                         continue
                     
-                    active_substance, active_pec_value, metabolites = self.extract_active_substance_and_metabolites(period_plm_path)
-                    print(f"DEBUG: Extraction results for {scenario_folder}:")
-                    print(f"  Active substance: {active_substance}")
-                    print(f"  Active PEC value: {active_pec_value}")
-                    print(f"  Metabolites: {metabolites}")
+                    # Unchanged period.plm files are served from the parse cache
+                    (active_substance, active_pec_value, metabolites), reused = self.parse_cache.get_or_parse(
+                        "pelmo", period_plm_path, self.extract_active_substance_and_metabolites, plm_stat
+                    )
+                    self.extract_stats["reused" if reused else "reparsed"] += 1
+                    logger.debug("%s: active substance %s, PEC %s, metabolites %s",
+                                 scenario_folder, active_substance, active_pec_value, metabolites)
                     
-                    if not active_substance or not active_pec_value:
-                        print(f"DEBUG: Skipping {scenario_folder} - missing active substance or PEC value")
+                    row = pelmo.result_row(project_folder_name, period_plm_path, (active_substance, active_pec_value, metabolites))
+                    if row is None:
+                        logger.debug("Skipping %s - missing active substance or PEC value", scenario_folder)
                         continue
                     
-                    row = {}
-                    row["Project"] = project_folder_name
-                    row["Crop"] = self.extract_crop_from_path(period_plm_path)
-                    row["Scenario"] = self.extract_scenario_from_path(period_plm_path)
+                    all_extra_keys.update(key for key in row if key not in pelmo.FIXED_COLUMNS)
+                    active_columns.add(f"{active_substance} µg/l")
                     
-                    active_col = f"{active_substance} µg/l"
-                    row[active_col] = self.convert_to_numeric(active_pec_value)
-                    all_extra_keys.add(active_col)
-                    
-                    for met, pec in metabolites:
-                        colname = f"{met} µg/l"
-                        row[colname] = self.convert_to_numeric(pec)
-                        all_extra_keys.add(colname)
-                    
-                    print(f"DEBUG: Created row: {row}")
+                    logger.debug("Created row: %s", row)
                     all_rows.append(row)
+                    row_files.append(period_plm_path)
 
         # Build the table header
-        header = ["Project", "Crop", "Scenario"] + sorted(all_extra_keys)
-        print(f"DEBUG: Final header: {header}")
-        print(f"DEBUG: All extra keys: {sorted(all_extra_keys)}")
+        header = pelmo.FIXED_COLUMNS + sorted(all_extra_keys)
+        logger.debug("Final header: %s", header)
         
         for row in all_rows:
             for key in header:
                 if key not in row:
                     row[key] = ""
         
-        print(f"DEBUG: Final rows count: {len(all_rows)}")
-        for i, row in enumerate(all_rows):
-            print(f"DEBUG: Row {i}: {row}")
+        logger.debug("Final rows count: %d", len(all_rows))
 
         self.all_rows = all_rows
+        self.row_files = row_files
+        self.active_columns = active_columns
+        self.result_version += 1
+        
+        if self.results_index is not None and all_rows:
+            try:
+                self.results_index.index_pelmo(main_dir, all_rows, row_files, active_columns)
+            except Exception as e:
+                logger.warning("Error indexing results: %s", e)
+        
         return all_rows, header, errors
 
+    def export_table(self):
+        """(header, rows) of the flat tabular export; rows are generated lazily"""
+        extra_keys = sorted(set().union(*(row.keys() for row in self.all_rows)) - {"Project", "Crop", "Scenario"})
+        header = ["Project", "Crop", "Scenario"] + extra_keys
+        return header, ([row.get(key, "") for key in header] for row in self.all_rows)
+
     def export_to_excel(self, filepath):
         """Export data to Excel file"""
+        # Only needed for export, so keep it off the import path
+        import xlsxwriter
         workbook = xlsxwriter.Workbook(filepath)
+        styles = WorkbookStyles(workbook)
         
         # Group rows by project
         projects = {}
@@ -174,6 +160,7 @@ class PELMOExtractor:
             used_sheet_names.add(sheet_name)
 
             worksheet = workbook.add_worksheet(sheet_name)
+            writer = SheetWriter(worksheet, sample_rows=self.width_sample_rows)
             
             # Re-calculate header for this project
             header = ["Project", "Crop", "Scenario"]
@@ -184,43 +171,34 @@ class PELMOExtractor:
                         extra_keys.add(key)
             header.extend(sorted(extra_keys))
 
-            header_format = workbook.add_format({"bold": True, "bg_color": "#DFF0D8", "border": 1})
-            for col, header_text in enumerate(header):
-                worksheet.write(0, col, header_text, header_format)
+            writer.write_row(0, 0, header, styles["header_boxed"])
 
             for r, row in enumerate(rows, start=1):
                 for col, key in enumerate(header):
                     value = row.get(key, "")
                     try:
                         num_value = float(value)
-                        worksheet.write_number(r, col, num_value)
+                        writer.write_number(r, col, num_value)
                     except ValueError:
-                        worksheet.write(r, col, value)
+                        writer.write(r, col, value)
 
-            # Adjust column widths
-            for col in range(len(header)):
-                max_width = len(header[col])
-                for row in rows:
-                    cell_text = str(row.get(header[col], ""))
-                    max_width = max(max_width, len(cell_text))
-                worksheet.set_column(col, col, max_width + 2)
+            # Column widths were measured while writing
+            writer.fit_columns()
 
             # Apply conditional formatting if limit is set
             if self.limit_value is not None:
-                red_format = workbook.add_format({"font_color": "red"})
-                green_format = workbook.add_format({"font_color": "green"})
                 for col in range(3, len(header)):
                     worksheet.conditional_format(1, col, len(rows), col, {
                         "type": "cell",
                         "criteria": ">=",
                         "value": self.limit_value,
-                        "format": red_format,
+                        "format": styles["exceeds"],
                     })
                     worksheet.conditional_format(1, col, len(rows), col, {
                         "type": "cell",
                         "criteria": "<",
                         "value": self.limit_value,
-                        "format": green_format,
+                        "format": styles["within"],
                     })
 
         workbook.close() 
\ No newline at end of file
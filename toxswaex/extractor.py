@@ -1,16 +1,34 @@
+import logging
 import os
 import re
-import xlsxwriter
-import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from core.parse_cache import parse_cache as shared_parse_cache, source_fingerprint
+from core import toxswa
+from core.xlsx import SheetWriter, WorkbookStyles, highlight_numbers, safe_sheet_name
+
+logger = logging.getLogger(__name__)
+
+# Columns of the flat CSV / JSON Lines / Parquet export
+TABLE_COLUMNS = ["Project", "Filename", "Compound", "Type", "Scenario", "Waterbody",
+                 "Max PECsw", "Max PECsed", "Areic mean deposition", "Route"]
 
 class TOXSWAExtractor:
-    def __init__(self):
+    def __init__(self, parse_cache=None, results_index=None):
         self.all_data = {}
         self.project_shortcodes = {}
         self.main_dir = ""
         self.areic_comparison_enabled = False
+        # Max PECsw/PECsed above the RAC are highlighted in the workbook
+        self.rac_value = None
         self.summary_mode = False
         self.project_order = []
+        # Bumped whenever all_data changes; keys the ETags of table responses
+        self.result_version = 0
+        self.parse_cache = parse_cache if parse_cache is not None else shared_parse_cache
+        self.extract_stats = {"reused": 0, "reparsed": 0}
+        self.results_index = results_index
+        # Measure column widths on a sample of rows beyond this many (None: every row)
+        self.width_sample_rows = None
         
     def extract_data(self, main_dir, selected_projects, selected_files=None, rac_value=None, areic_comparison=False, summary_mode=False, project_order=None):
         """Extract data from TOXSWA files"""
@@ -18,9 +36,11 @@ class TOXSWAExtractor:
             self.main_dir = main_dir
             self.areic_comparison_enabled = areic_comparison
             self.summary_mode = summary_mode
+            self.rac_value = rac_value
             self.project_order = project_order or []
             self.all_data.clear()
             self.project_shortcodes.clear()
+            self.extract_stats = {"reused": 0, "reparsed": 0}
             
             errors = []
             
@@ -34,238 +54,122 @@ class TOXSWAExtractor:
                 else:
                     errors.append(f"Project path not found: {project_path}")
             
+            if self.results_index is not None and self.all_data:
+                try:
+                    self.results_index.index_toxswa(main_dir, self.all_data)
+                except Exception as e:
+                    logger.warning("Error indexing results: %s", e)
+            
             return self.all_data, errors
             
         except Exception as e:
             return {}, [f"Error extracting data: {str(e)}"]
+        finally:
+            self.result_version += 1
     
+    # The .sum and SWAN_log.txt parsers live in core.toxswa, shared by every entry point
+    parse_sum_file = staticmethod(toxswa.parse_sum_file)
+    extract_shortcode = staticmethod(toxswa.extract_shortcode)
+    parse_value = staticmethod(toxswa.parse_value)
+    format_for_display = staticmethod(toxswa.format_for_display)
+    format_for_excel = staticmethod(toxswa.format_for_excel)
+    extract_daily_value = staticmethod(toxswa.extract_daily_value)
+    extract_date_only = staticmethod(toxswa.extract_date_only)
+    safe_sheet_name = staticmethod(safe_sheet_name)
+
+    def export_fingerprint(self):
+        """Key for exports of the current result; changes with the source files and export-relevant options"""
+        # The workbook is written from the parsed rows, which follow the state of these files
+        paths = list(dict.fromkeys(row["FilePath"] for rows in self.all_data.values() for row in rows))
+        return source_fingerprint(
+            paths, list(self.all_data), self.project_shortcodes, self.areic_comparison_enabled,
+            self.summary_mode, self.project_order, self.rac_value,
+        )
+
     def process_files(self, folder_path, project_name, selected_files=None):
-        """Process TOXSWA .sum files"""
-        files = sorted([f for f in os.listdir(folder_path) if f.endswith(".sum")])
+        """Process TOXSWA .sum files, re-parsing only files changed since the last run"""
+        entries = sorted(
+            (e for e in os.scandir(folder_path) if e.name.endswith(".sum")),
+            key=lambda e: e.name,
+        )
         if selected_files:
-            files = [f for f in files if f in selected_files]
+            selected = set(selected_files)
+            entries = [e for e in entries if e.name in selected]
 
         project_root = os.path.dirname(folder_path)
-        shortcode = self.extract_shortcode(project_root)
+        shortcode = self.project_shortcode(project_root)
         self.project_shortcodes[project_name] = shortcode if shortcode else "Step 3"
 
         all_rows = []
-        for filename in files:
-            file_path = os.path.join(folder_path, filename)
+        for entry in entries:
             try:
-                with open(file_path, "r", encoding="ISO-8859-1") as f:
-                    content = f.read()
-            except Exception as e:
-                print(f"Error reading {file_path}: {e}")
+                rows, reused = self.parse_cache.get_or_parse("toxswa", entry.path, self.parse_sum_file, entry.stat())
+            except OSError as e:
+                logger.warning("Error reading %s: %s", entry.path, e)
                 continue
-
-            # Extract Areic mean deposition value
-            areic_value = self.extract_areic_mean_deposition(content)
-
-            scenario = "Unknown"
-            waterbody = "Unknown"
-            scenario_match = re.search(r"\* Scenario\s*:\s*([^\r\n]+)", content)
-            if scenario_match:
-                scenario_raw = scenario_match.group(1).strip()
-                if "_" in scenario_raw:
-                    parts = scenario_raw.split("_", 1)
-                    scenario = parts[0].strip()
-                    waterbody = parts[1].strip().capitalize()
-                else:
-                    scenario = scenario_raw
-                    wb_match = re.search(r"\* Water Body Type\s*:\s*(\S+)", content)
-                    waterbody = wb_match.group(1).capitalize() if wb_match else "Unknown"
-
-            app_dates = []
-            app_section = re.search(r"Appl\.No\s+Date/Hour.*?\n(.*?)\n\n", content, re.DOTALL)
-            if app_section:
-                for line in app_section.group(1).split("\n"):
-                    date_match = re.search(r"\d{2}-[A-Za-z]{3}-\d{4}-\d{2}h\d{2}", line)
-                    if date_match:
-                        app_dates.append(date_match.group().strip())
-
-            max_date = ""
-            max_match = re.search(r"Global max.*?(\d{2}-[A-Za-z]{3}-\d{4}-\d{2}h\d{2})", content, re.IGNORECASE | re.DOTALL)
-            if max_match:
-                max_date = max_match.group(1).strip()
-
-            if max_date in app_dates:
-                route = "Spray Drift"
-            else:
-                scenario_code = scenario[:1].upper() if scenario else ""
-                if scenario_code == "D":
-                    route = "Drainage"
-                elif scenario_code == "R":
-                    route = "Runoff"
-                else:
-                    route = "Spray Drift"
-
-            parent_compound = self.extract_value(content, r"\* Substance\s*:\s*(\S+)", "Unknown")
-            parent_max_sw = self.extract_float(content, r"Global max.*?([\d.]+)")
-            pecsed_match = re.search(r"PEC in sediment of substance:\s*\S+.*?Global max\s+([<]?\s*\d+(?:\.\d+)?(?:e[+-]?\d+)?)", content, re.DOTALL)
-            parent_max_sed_str = pecsed_match.group(1).strip() if pecsed_match else "0"
-            parent_max_sed = self.parse_value(parent_max_sed_str)
-
-            row_parent = {
-                "Filename": filename,
-                "Scenario": scenario,
-                "Waterbody": waterbody,
-                "Compound": parent_compound,
-                "Max PECsw": self.format_for_display(parent_max_sw),
-                "Max PECsed": self.format_for_display(parent_max_sed),
-                "Areic mean deposition": areic_value,
-                "Route": route,
-                "Type": "Parent",
-                "ApplicationDates": app_dates,
-                "FilePath": file_path,
-            }
-            all_rows.append(row_parent)
-
-            # Process metabolites
-            subs = []
-            for match2 in re.finditer(r"\* Substance\s+\d+:\s+(\S+)", content):
-                sub = match2.group(1).strip()
-                if sub != parent_compound:
-                    subs.append(sub)
-            if not subs:
-                soil = self.extract_value(content, r"\* Soil metabolite:\s*(\S+)", "")
-                if soil and soil != parent_compound:
-                    subs.append(soil)
-            for sub in subs:
-                max_sw_str = self.extract_value(content, rf"\* Table:\s*PEC in water layer of substance:\s+{re.escape(sub)}.*?Global max\s+([<]?\s*\S+)", "0")
-                max_sed_str = self.extract_value(content, rf"\* Table:\s*PEC in sediment of substance:\s+{re.escape(sub)}.*?Global max\s+([<]?\s*\S+)", "0")
-                row_met = {
-                    "Filename": filename,
-                    "Scenario": scenario,
-                    "Waterbody": waterbody,
-                    "Compound": sub,
-                    "Max PECsw": self.format_for_display(self.parse_value(max_sw_str)),
-                    "Max PECsed": self.format_for_display(self.parse_value(max_sed_str)),
-                    "Route": route,
-                    "Type": "Metabolite",
-                    "ApplicationDates": app_dates,
-                    "FilePath": file_path,
-                }
-                all_rows.append(row_met)
+            self.extract_stats["reused" if reused else "reparsed"] += 1
+            all_rows.extend(rows)
 
         if all_rows:
             self.all_data[project_name] = all_rows
-    
-    def extract_shortcode(self, folder_path):
-        """Extract shortcode from SWAN_log.txt"""
-        swan_log_path = os.path.join(folder_path, "SWAN_log.txt")
-        if not os.path.exists(swan_log_path):
-            return ""
-        try:
-            with open(swan_log_path, "r", encoding="ISO-8859-1") as f:
-                content = f.read()
-        except Exception as e:
-            print(f"Error reading {swan_log_path}: {e}")
-            return ""
-
-        buffer = ""
-        nozzle = ""
-        vfs = ""
-        vfs_flag = ""
-
-        spray_section = re.search(r"Spray drift mitigation.*?(?=Run-off mitigation)", content, re.DOTALL | re.IGNORECASE)
-        spray_content = spray_section.group(0) if spray_section else content
-
-        m = re.search(r"Buffer\s*width\s*\(m\)\s*:\s*(\d+)", spray_content, re.IGNORECASE)
-        if m:
-            buffer = f"{m.group(1)}b"
 
-        m = re.search(r"Nozzle\s*reduction\s*\(\%\)\s*:\s*(\d+)", spray_content, re.IGNORECASE)
-        if m:
-            nozzle_val = int(m.group(1))
-            if nozzle_val > 0:
-                nozzle = f"{nozzle_val}%"
+    def scan_projects(self, main_dir, max_workers=8):
+        """Return {project: metadata} for every folder of main_dir with a toxswa subfolder
 
-        runoff_section = re.search(r"Run-off mitigation.*?(?=Dry deposition)", content, re.DOTALL | re.IGNORECASE)
-        if runoff_section:
-            runoff_content = runoff_section.group(0)
-            if re.search(r"Reduction\s*run-?off\s*mode:\s*VfsMod", runoff_content, re.IGNORECASE):
-                m = re.search(r"Filter\s*strip\s*buffer\s*width\s*:\s*(\d+)", runoff_content, re.IGNORECASE)
-                if m:
-                    vfs = f"{m.group(1)}vfs"
-                vfs_flag = " VFSMOD"
-
-            elif re.search(r"Reduction\s*run-?off\s*mode:\s*ManualReduction", runoff_content, re.IGNORECASE):
-                fr_volume_match = re.search(r"Fractional\s+reduction\s+in\s+run-off\s+volume\s*:\s*([\d.]+)", runoff_content, re.IGNORECASE)
-                if fr_volume_match:
-                    try:
-                        vol_value = float(fr_volume_match.group(1))
-                    except ValueError:
-                        vol_value = None
-                    if vol_value is not None:
-                        if abs(vol_value - 0.6) < 1E-6:
-                            vfs = "10vfs"
-                        elif abs(vol_value - 0.8) < 1E-6:
-                            vfs = "20vfs"
-
-        return f"{buffer}{vfs}{nozzle}{vfs_flag}"
-    
-    def extract_areic_mean_deposition(self, content):
-        """Extract areic mean deposition value"""
-        m = re.search(r"Areic mean deposition\s*\(mg\.m-2\).*?\n\s*\d+\s+[^\n]*\s+([\d\.Ee-]+)", content, re.IGNORECASE)
-        return m.group(1).strip() if m else "N/A"
-    
-    def extract_value(self, content, pattern, default_value):
-        """Extract value using regex pattern"""
-        m = re.search(pattern, content, re.DOTALL)
-        return m.group(1).strip() if m else default_value
-    
-    def extract_float(self, content, pattern):
-        """Extract float value using regex pattern"""
-        m = re.search(pattern, content)
-        if not m:
-            return None
-        val_str = m.group(1).strip()
-        return self.parse_value(val_str)
-    
-    def parse_value(self, value_str):
-        """Parse numeric value from string"""
-        if not value_str:
-            return None
-        value_str = value_str.strip()
-        if value_str.startswith("<"):
-            raw = value_str.lstrip("<").strip()
+        The projects are inspected concurrently; see project_metadata.
+        """
+        project_dirs = {}
+        for entry in os.scandir(main_dir):
+            if entry.is_dir() and os.path.isdir(os.path.join(entry.path, "toxswa")):
+                project_dirs[entry.name] = entry.path
+        names = sorted(project_dirs)
+        if not names:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(names))) as pool:
+            results = pool.map(self.project_metadata, (project_dirs[name] for name in names))
+            return dict(zip(names, results))
+
+    def project_metadata(self, project_root):
+        """Shortcode, .sum file count, total .sum bytes and newest .sum mtime of one project"""
+        sum_files = 0
+        total_bytes = 0
+        newest_mtime = None
+        try:
+            entries = list(os.scandir(os.path.join(project_root, "toxswa")))
+        except OSError as e:
+            logger.warning("Error scanning %s: %s", project_root, e)
+            entries = []
+        for entry in entries:
+            if not entry.name.endswith(".sum"):
+                continue
             try:
-                numeric = float(raw)
-                if numeric < 1E-6:
-                    return "<1E-06"
-                return "<1E-06"
-            except:
-                return "<1E-06"
+                stat = entry.stat()
+            except OSError:
+                continue
+            sum_files += 1
+            total_bytes += stat.st_size
+            if newest_mtime is None or stat.st_mtime > newest_mtime:
+                newest_mtime = stat.st_mtime
+        shortcode = self.project_shortcode(project_root)
+        return {
+            "shortcode": shortcode if shortcode else "Step 3",
+            "sum_files": sum_files,
+            "bytes": total_bytes,
+            "newest_mtime": newest_mtime,
+        }
+
+    def project_shortcode(self, project_root):
+        """Shortcode of a project, re-reading SWAN_log.txt only when it has changed"""
+        swan_log_path = os.path.join(project_root, "SWAN_log.txt")
         try:
-            numeric_val = float(value_str)
-            if numeric_val < 1E-6:
-                return "<1E-06"
-            return numeric_val
-        except:
-            return None
-    
-    def format_for_display(self, val, compound_type="Parent"):
-        """Format value for display"""
-        PARENT_DECIMALS_SMALL = 4
-        PARENT_DECIMALS_LARGE = 2
-        METABOLITE_DECIMALS_SMALL = 6
-        METABOLITE_DECIMALS_LARGE = 2
+            stat = os.stat(swan_log_path)
+        except OSError:
+            return ""
+        shortcode, _ = self.parse_cache.get_or_parse(
+            "toxswa", swan_log_path, lambda path: toxswa.extract_shortcode(os.path.dirname(path)), stat
+        )
+        return shortcode
 
-        try:
-            num = float(val)
-            if num <= 1E-6:
-                return "<1E-06"
-            
-            if compound_type == "Parent":
-                decimals = PARENT_DECIMALS_SMALL if num < 1 else PARENT_DECIMALS_LARGE
-            else:
-                decimals = METABOLITE_DECIMALS_SMALL if num < 1 else METABOLITE_DECIMALS_LARGE
-                
-            return f"{num:.{decimals}f}"
-        except:
-            return str(val)
-    
     def get_table_data(self, compound_type="Parent", sort_by="Filename"):
         """Get table data for display"""
         if not self.all_data:
@@ -346,25 +250,17 @@ class TOXSWAExtractor:
         except (ValueError, TypeError):
             return 0.0
 
-    def create_summary_sheet(self, workbook):
+    def create_summary_sheet(self, workbook, styles=None):
         """Create summary sheet with project comparison"""
         try:
             summary_ws = workbook.add_worksheet("Summary")
             
-            # Create formats.
-            scientific_format = workbook.add_format({
-                "num_format": '[<=0.000001]"<1E-06";0.000000',
-                "align": "right"
-            })
-            header_format = workbook.add_format({
-                "bold": True,
-                "bg_color": "#DFF0D8",
-                "border": 1,
-                "align": "center",
-                "valign": "vcenter"
-            })
-            right_align = workbook.add_format({"align": "right"})
-            bold_format = workbook.add_format({"align": "right", "bold": True})
+            # Shared formats.
+            styles = styles or WorkbookStyles(workbook)
+            scientific_format = styles["scientific"]
+            header_format = styles["header_boxed_centered"]
+            right_align = styles["right"]
+            bold_format = styles["right_bold"]
             
             # Determine project order.
             if self.project_order:
@@ -499,48 +395,41 @@ class TOXSWAExtractor:
                     col_offset += 2
             
         except Exception as e:
-            print(f"Summary Error: {str(e)}")
-
-    def extract_daily_value(self, content, label, version, start_index=0):
-        """Extract daily value from content"""
-        pos = content.find(label, start_index)
-        if pos == -1:
-            return "N/A"
-        if version == 3:
-            offset = 13
-            length = 22
-        else:
-            offset = 18
-            length = 18
-        start = pos + offset
-        val_str = content[start : start + length].strip()
-        if val_str.startswith("<"):
-            try:
-                return "< " + str(float(val_str.lstrip("<").strip()))
-            except:
-                return "< 1E-6"
-        try:
-            numeric_val = float(val_str)
-            if numeric_val < 1E-6:
-                return "<1E-06"
-            return numeric_val
-        except:
-            return "N/A"
-
-    def extract_date_only(self, date_str):
-        """Extract date only from date string"""
-        m = re.match(r"(\d{2}-[A-Za-z]{3}-\d{4})", date_str)
-        return m.group(1) if m else date_str
-
-    def format_for_excel(self, value):
-        """Format value for Excel export"""
-        try:
-            num = float(value)
-            if num <= 1E-6:
-                return "<1E-06"
-            return num
-        except Exception:
-            return value
+            logger.warning("Summary Error: %s", e)
+
+    def export_table(self):
+        """(header, rows) of the flat tabular export; rows are generated lazily"""
+        rows = (
+            [project] + [row.get(col, "") for col in TABLE_COLUMNS[1:]]
+            for project, project_rows in self.all_data.items()
+            for row in project_rows
+        )
+        return TABLE_COLUMNS, rows
+
+    def _write_sheet_row(self, writer, row_index, r, values, right_align):
+        """Write one water or sediment table row from the parsed sheet values; returns the next row"""
+        app_dates = [self.extract_date_only(d) for d in r["ApplicationDates"][:2]]
+        while len(app_dates) < 2:
+            app_dates.append("")
+        max_value, max_date, *daily = values
+        data_row = [
+            r["Filename"],
+            r["Compound"],
+            r["Scenario"],
+            r["Waterbody"],
+            app_dates[0],
+            app_dates[1],
+            max_value,
+            max_date,
+            r["Route"],
+            *daily,
+        ]
+        for col, cell in enumerate(data_row):
+            if col == 6 or col >= 9:
+                writer.write(row_index, col, cell, right_align)
+            else:
+                writer.write(row_index, col, cell)
+        return row_index + 1
 
     def export_to_excel(self, filepath):
         """Export data to Excel with identical formatting to original"""
@@ -548,77 +437,20 @@ class TOXSWAExtractor:
             return False
             
         try:
+            # Only needed for export, so keep it off the import path
+            import xlsxwriter
             workbook = xlsxwriter.Workbook(filepath)
+            styles = WorkbookStyles(workbook)
             
             # Create summary sheet if summary mode is enabled
-            print(f"Summary mode enabled: {self.summary_mode}")
+            logger.debug("Summary mode enabled: %s", self.summary_mode)
             if self.summary_mode:
-                print("Creating summary sheet...")
-                self.create_summary_sheet(workbook)
-                print("Summary sheet created successfully")
+                self.create_summary_sheet(workbook, styles)
             
-            # Create formats
-            right_align = workbook.add_format({"align": "right"})
-            header_format = workbook.add_format({
-                "bg_color": "#82C940",
-                "font_color": "#000000",
-                "bold": True,
-                "align": "left",
-            })
+            # Shared formats
+            right_align = styles["right"]
+            header_format = styles["header_left"]
 
-            # Daily search arrays (identical to original)
-            sw_daily_search = [
-                "PECsw_1_day",
-                "PECsw_2 days",
-                "PECsw_3_days",
-                "PECsw_4_days",
-                "PECsw_7_days",
-                "PECsw_14_days",
-                "PECsw_21_days",
-                "PECsw_28_days",
-                "PECsw_42_days",
-                "PECsw_50_days",
-                "PECsw_100_days",
-            ]
-            twaec_sw_search = [
-                "TWAECsw_1_day",
-                "TWAECsw_2_days",
-                "TWAECsw_3_days",
-                "TWAECsw_4_days",
-                "TWAECsw_7_days",
-                "TWAECsw_14_days",
-                "TWAECsw_21_days",
-                "TWAECsw_28_days",
-                "TWAECsw_42_days",
-                "TWAECsw_50_days",
-                "TWAECsw_100_days",
-            ]
-            sed_daily_search = [
-                "PECsed_1_day",
-                "PECsed_2_days",
-                "PECsed_3_days",
-                "PECsed_4_days",
-                "PECsed_7_days",
-                "PECsed_14_days",
-                "PECsed_21_days",
-                "PECsed_28_days",
-                "PECsed_42_days",
-                "PECsed_50_days",
-                "PECsed_100_days",
-            ]
-            twaec_sed_headers = [
-                "TWAECsed_1_day",
-                "TWAECsed_2_days",
-                "TWAECsed_3_days",
-                "TWAECsed_4_days",
-                "TWAECsed_7_days",
-                "TWAECsed_14_days",
-                "TWAECsed_21_days",
-                "TWAECsed_28_days",
-                "TWAECsed_42_days",
-                "TWAECsed_50_days",
-                "TWAECsed_100_days",
-            ]
             sw_daily_headers = [
                 "PECsw 1 day",
                 "PECsw 2 days",
@@ -652,6 +484,7 @@ class TOXSWAExtractor:
             for project, rows in self.all_data.items():
                 # Create safe sheet name
                 worksheet = workbook.add_worksheet(self.safe_sheet_name(project, existing_sheet_names))
+                writer = SheetWriter(worksheet, sample_rows=self.width_sample_rows)
                 
                 # Sort rows (identical to original)
                 def get_sum_number(filename):
@@ -676,102 +509,15 @@ class TOXSWAExtractor:
                         "Route of entry",
                     ]
                     + sw_daily_headers
-                    + twaec_sw_search
+                    + list(toxswa.TWAEC_SW_LABELS)
                 )
-                for col, header in enumerate(sw_header):
-                    worksheet.write(0, col, header, header_format)
+                writer.write_row(0, 0, sw_header, header_format)
 
                 current_row = 1
                 for r in sorted_rows:
-                    try:
-                        with open(r["FilePath"], "r", encoding="ISO-8859-1") as f:
-                            content = f.read()
-                    except:
-                        continue
-
-                    version = 4
-                    if "FOCUS_TOXSWA v3.3.1" in content:
-                        version = 3
-                    elif "* FOCUS  TOXSWA version" in content:
-                        version = 4
-
-                    app_dates = r["ApplicationDates"][:2]
-                    app_dates = [self.extract_date_only(d) for d in app_dates]
-                    while len(app_dates) < 2:
-                        app_dates.append("")
-
-                    if r["Type"] == "Parent":
-                        water_start = 0
-                    else:
-                        m_sw = re.search(
-                            r"\* Table:\s*PEC in water layer of substance:\s+" + re.escape(r["Compound"]),
-                            content,
-                            re.IGNORECASE,
-                        )
-                        water_start = m_sw.start() if m_sw else 0
-
-                    max_date_full = ""
-                    max_match_full = re.search(
-                        r"Global max.*?(\d{2}-[A-Za-z]{3}-\d{4}-\d{2}h\d{2})",
-                        content,
-                        re.IGNORECASE | re.DOTALL,
-                    )
-                    if max_match_full:
-                        max_date_full = max_match_full.group(1).strip()
-
-                    if max_date_full in r["ApplicationDates"]:
-                        main_route = "Spray Drift"
-                    else:
-                        scenario_code = r["Scenario"][:1].upper() if r["Scenario"] else ""
-                        if scenario_code == "D":
-                            main_route = "Drainage"
-                        elif scenario_code == "R":
-                            main_route = "Runoff"
-                        else:
-                            main_route = "Spray Drift"
-
-                    try:
-                        pos_global = content.find("Global max", water_start)
-                        max_sw_val = float(content[pos_global + 0x11 : pos_global + 0x11 + 0x13].strip())
-                    except:
-                        max_sw_val = 0.0
-
-                    m_date = re.search(r"(\d{2}-[A-Za-z]{3}-\d{4})", content[pos_global:])
-                    max_sw_date = m_date.group(1) if m_date else ""
-
-                    if r["Type"] == "Parent":
-                        pecsw_vals = [self.extract_daily_value(content, key, version, 0) for key in sw_daily_search]
-                        twaecsw_vals = [self.extract_daily_value(content, key, version, 0) for key in twaec_sw_search]
-                    else:
-                        pecsw_vals = [self.extract_daily_value(content, key, version, water_start) for key in sw_daily_search]
-                        twaecsw_vals = [self.extract_daily_value(content, key, version, water_start) for key in twaec_sw_search]
-
-                    formatted_max_sw = self.format_for_excel(max_sw_val)
-
-                    data_row = (
-                        [
-                            r["Filename"],
-                            r["Compound"],
-                            r["Scenario"],
-                            r["Waterbody"],
-                            app_dates[0],
-                            app_dates[1],
-                            formatted_max_sw,
-                            max_sw_date,
-                            main_route,
-                        ]
-                        + pecsw_vals
-                        + twaecsw_vals
-                    )
-
-                    for col, cell in enumerate(data_row):
-                        if col == 6 or col >= 9:
-                            worksheet.write(current_row, col, cell, right_align)
-                        else:
-                            worksheet.write(current_row, col, cell)
-                    current_row += 1
+                    current_row = self._write_sheet_row(writer, current_row, r, r["WaterValues"], right_align)
 
-                worksheet.set_column(0, 50, 15)
+                last_water_row = current_row - 1
 
                 # --- Sediment Sheet Header & Data Row ---
                 current_row += 1
@@ -788,125 +534,26 @@ class TOXSWAExtractor:
                         "Route of entry",
                     ]
                     + sed_daily_headers
-                    + twaec_sed_headers
+                    + list(toxswa.TWAEC_SED_LABELS)
                 )
 
-                for col, header in enumerate(sed_header):
-                    worksheet.write(current_row, col, header, header_format)
+                writer.write_row(current_row, 0, sed_header, header_format)
                 current_row += 1
+                first_sed_row = current_row
 
                 for r in sorted_rows:
-                    try:
-                        with open(r["FilePath"], "r", encoding="ISO-8859-1") as f:
-                            content = f.read()
-                    except:
-                        continue
-
-                    version = 4
-                    if "FOCUS_TOXSWA v3.3.1" in content:
-                        version = 3
-                    elif "* FOCUS  TOXSWA version" in content:
-                        version = 4
-
-                    app_dates = r["ApplicationDates"][:2]
-                    app_dates = [self.extract_date_only(d) for d in app_dates]
-                    while len(app_dates) < 2:
-                        app_dates.append("")
+                    current_row = self._write_sheet_row(writer, current_row, r, r["SedimentValues"], right_align)
 
-                    if r["Type"] == "Parent":
-                        sed_start = 0
-                    else:
-                        m_sed = re.search(
-                            r"\* Table:\s*PEC in sediment of substance:\s+" + re.escape(r["Compound"]),
-                            content,
-                            re.IGNORECASE,
-                        )
-                        sed_start = m_sed.start() if m_sed else 0
-
-                    max_date_full = ""
-                    max_match_full = re.search(
-                        r"Global max.*?(\d{2}-[A-Za-z]{3}-\d{4}-\d{2}h\d{2})",
-                        content,
-                        re.IGNORECASE | re.DOTALL,
-                    )
-                    if max_match_full:
-                        max_date_full = max_match_full.group(1).strip()
+                if self.rac_value is not None:
+                    highlight_numbers(worksheet, 1, 6, last_water_row, ">", self.rac_value, styles["exceeds"])
+                    highlight_numbers(worksheet, first_sed_row, 6, current_row - 1, ">", self.rac_value, styles["exceeds"])
 
-                    if max_date_full in r["ApplicationDates"]:
-                        main_route = "Spray Drift"
-                    else:
-                        scenario_code = r["Scenario"][:1].upper() if r["Scenario"] else ""
-                        if scenario_code == "D":
-                            main_route = "Drainage"
-                        elif scenario_code == "R":
-                            main_route = "Runoff"
-                        else:
-                            main_route = "Spray Drift"
-
-                    try:
-                        pos_global_sed = content.rfind("Global max", sed_start)
-                        max_sed_val = float(content[pos_global_sed + 0x11 : pos_global_sed + 0x11 + 0x13].strip())
-                    except:
-                        max_sed_val = 0.0
-
-                    m_date_sed = re.search(r"(\d{2}-[A-Za-z]{3}-\d{4})", content[pos_global_sed:])
-                    max_sed_date = m_date_sed.group(1) if m_date_sed else ""
-
-                    if r["Type"] == "Parent":
-                        pecsed_vals = [self.extract_daily_value(content, key, version, 0) for key in sed_daily_search]
-                        twaecsed_vals = [self.extract_daily_value(content, key, version, 0) for key in twaec_sed_headers]
-                    else:
-                        pecsed_vals = [self.extract_daily_value(content, key, version, sed_start) for key in sed_daily_search]
-                        twaecsed_vals = [self.extract_daily_value(content, key, version, sed_start) for key in twaec_sed_headers]
-
-                    formatted_max_sed = self.format_for_excel(max_sed_val)
-
-                    data_row = (
-                        [
-                            r["Filename"],
-                            r["Compound"],
-                            r["Scenario"],
-                            r["Waterbody"],
-                            app_dates[0],
-                            app_dates[1],
-                            formatted_max_sed,
-                            max_sed_date,
-                            main_route,
-                        ]
-                        + pecsed_vals
-                        + twaecsed_vals
-                    )
-
-                    for col, cell in enumerate(data_row):
-                        if col == 6 or col >= 9:
-                            worksheet.write(current_row, col, cell, right_align)
-                        else:
-                            worksheet.write(current_row, col, cell)
-                    current_row += 1
-
-                worksheet.set_column(0, 50, 15)
+                # Widths measured over both tables; never narrower than the former fixed 15
+                writer.fit_columns(min_width=15)
 
             workbook.close()
             return True
             
         except Exception as e:
-            print(f"Error exporting to Excel: {str(e)}")
+            logger.warning("Error exporting to Excel: %s", e)
             return False
-    
-    def safe_sheet_name(self, name, existing_names):
-        """Create safe Excel sheet name"""
-        invalid_chars = "[]:*?/\\"
-        for ch in invalid_chars:
-            name = name.replace(ch, "")
-        name = name.strip()
-        if len(name) > 31:
-            name = name[:31]
-        base_name = name
-        counter = 1
-        while name in existing_names:
-            suffix = str(counter)
-            truncated_length = 31 - len(suffix)
-            name = base_name[:truncated_length] + suffix
-            counter += 1
-        existing_names.add(name)
-        return name 
\ No newline at end of file